@@ -0,0 +1,107 @@
+"""auth context resolution and change notifications
+
+Revision ID: 20261018_0004
+Revises: 20260131_0003
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "20261018_0004"
+down_revision = "20260131_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_resolve_auth_context(p_user_id uuid, p_tenant_id uuid)
+        RETURNS TABLE (user_exists boolean, is_active boolean, role_id uuid, permission_codes text[])
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT
+            u.id IS NOT NULL,
+            COALESCE(u.is_active, false),
+            m.role_id,
+            COALESCE(
+              (SELECT array_agg(rp.permission_code ORDER BY rp.permission_code)
+               FROM role_permissions rp
+               WHERE rp.role_id = m.role_id),
+              ARRAY[]::text[]
+            )
+          FROM (SELECT 1) AS one
+          LEFT JOIN users u ON u.id = p_user_id
+          LEFT JOIN memberships m ON m.user_id = u.id AND m.tenant_id = p_tenant_id;
+        $$;
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_notify_auth_change()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+          v_row jsonb;
+        BEGIN
+          FOREACH v_row IN ARRAY ARRAY[to_jsonb(OLD), to_jsonb(NEW)] LOOP
+            CONTINUE WHEN v_row IS NULL;
+            PERFORM pg_notify(
+              'app_auth_changed',
+              json_build_object(
+                'table', TG_TABLE_NAME,
+                'tenant_id', CASE WHEN TG_TABLE_NAME = 'users' THEN NULL ELSE v_row ->> 'tenant_id' END,
+                'user_id', CASE WHEN TG_TABLE_NAME = 'users' THEN v_row ->> 'id'
+                                WHEN TG_TABLE_NAME = 'memberships' THEN v_row ->> 'user_id'
+                                ELSE NULL END
+              )::text
+            );
+          END LOOP;
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_memberships_notify_auth
+        AFTER INSERT OR UPDATE OR DELETE ON memberships
+        FOR EACH ROW EXECUTE FUNCTION app_notify_auth_change();
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_roles_notify_auth
+        AFTER UPDATE OR DELETE ON roles
+        FOR EACH ROW EXECUTE FUNCTION app_notify_auth_change();
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_role_permissions_notify_auth
+        AFTER INSERT OR UPDATE OR DELETE ON role_permissions
+        FOR EACH ROW EXECUTE FUNCTION app_notify_auth_change();
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_users_notify_auth
+        AFTER UPDATE OF is_active OR DELETE ON users
+        FOR EACH ROW EXECUTE FUNCTION app_notify_auth_change();
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_users_notify_auth ON users;")
+    op.execute("DROP TRIGGER IF EXISTS trg_role_permissions_notify_auth ON role_permissions;")
+    op.execute("DROP TRIGGER IF EXISTS trg_roles_notify_auth ON roles;")
+    op.execute("DROP TRIGGER IF EXISTS trg_memberships_notify_auth ON memberships;")
+    op.execute("DROP FUNCTION IF EXISTS app_notify_auth_change();")
+    op.execute("DROP FUNCTION IF EXISTS app_resolve_auth_context(uuid, uuid);")
@@ -0,0 +1,225 @@
+"""per-tenant and per-user state versions for conditional GETs
+
+Revision ID: 20261018_0005
+Revises: 20261018_0004
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0005"
+down_revision = "20261018_0004"
+branch_labels = None
+depends_on = None
+
+
+_TRACKED_TABLES = ["tenants", "users", "roles", "role_permissions", "memberships"]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tenant_versions",
+        sa.Column("tenant_id", sa.Uuid(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), server_default=sa.text("1"), nullable=False),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"], ondelete="CASCADE"),
+    )
+    op.create_table(
+        "user_versions",
+        sa.Column("user_id", sa.Uuid(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), server_default=sa.text("1"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+    )
+    # Only reachable through the SECURITY DEFINER helpers below.
+    for table in ["tenant_versions", "user_versions"]:
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY;")
+        op.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY;")
+
+    op.execute("CREATE SEQUENCE permissions_version_seq;")
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_bump_versions(p_tenant_ids uuid[], p_user_ids uuid[])
+        RETURNS void
+        LANGUAGE sql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          INSERT INTO tenant_versions (tenant_id, version)
+            SELECT DISTINCT t.id, 1
+            FROM unnest(p_tenant_ids) AS ids(id)
+            JOIN tenants t ON t.id = ids.id
+          ON CONFLICT (tenant_id) DO UPDATE SET version = tenant_versions.version + 1;
+
+          INSERT INTO user_versions (user_id, version)
+            SELECT DISTINCT u.id, 1
+            FROM unnest(p_user_ids) AS ids(id)
+            JOIN users u ON u.id = ids.id
+          ON CONFLICT (user_id) DO UPDATE SET version = user_versions.version + 1;
+        $$;
+        """
+    )
+
+    # Statement-level: one bump per affected tenant/user per statement, whatever
+    # the number of rows. Transition tables require one trigger per event.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_on_versioned_change()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        DECLARE
+          v_rows jsonb[];
+          v_tenant_ids uuid[];
+          v_user_ids uuid[];
+        BEGIN
+          IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(to_jsonb(r)) INTO v_rows FROM new_rows r;
+          ELSIF TG_OP = 'UPDATE' THEN
+            SELECT array_agg(x) INTO v_rows FROM (
+              SELECT to_jsonb(r) AS x FROM new_rows r
+              UNION ALL
+              SELECT to_jsonb(r) FROM old_rows r
+            ) s;
+          ELSE
+            SELECT array_agg(to_jsonb(r)) INTO v_rows FROM old_rows r;
+          END IF;
+          IF v_rows IS NULL THEN
+            RETURN NULL;
+          END IF;
+
+          IF TG_TABLE_NAME = 'users' THEN
+            SELECT array_agg(DISTINCT (x ->> 'id')::uuid) INTO v_user_ids FROM unnest(v_rows) x;
+            SELECT array_agg(DISTINCT m.tenant_id) INTO v_tenant_ids
+              FROM memberships m WHERE m.user_id = ANY (v_user_ids);
+          ELSIF TG_TABLE_NAME = 'tenants' THEN
+            SELECT array_agg(DISTINCT (x ->> 'id')::uuid) INTO v_tenant_ids FROM unnest(v_rows) x;
+          ELSE
+            SELECT array_agg(DISTINCT (x ->> 'tenant_id')::uuid) INTO v_tenant_ids FROM unnest(v_rows) x;
+            IF TG_TABLE_NAME = 'memberships' THEN
+              SELECT array_agg(DISTINCT (x ->> 'user_id')::uuid) INTO v_user_ids FROM unnest(v_rows) x;
+            END IF;
+          END IF;
+
+          PERFORM app_bump_versions(COALESCE(v_tenant_ids, '{}'), COALESCE(v_user_ids, '{}'));
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    for table in _TRACKED_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_versions_ins
+            AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION app_on_versioned_change();
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_versions_upd
+            AFTER UPDATE ON {table}
+            REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION app_on_versioned_change();
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_versions_del
+            AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION app_on_versioned_change();
+            """
+        )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_on_permissions_change()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        BEGIN
+          PERFORM nextval('permissions_version_seq');
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_permissions_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON permissions
+        FOR EACH STATEMENT EXECUTE FUNCTION app_on_permissions_change();
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_tenant_version(p_tenant_id uuid) RETURNS bigint
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT COALESCE((SELECT v.version FROM tenant_versions v WHERE v.tenant_id = p_tenant_id), 0);
+        $$;
+        """
+    )
+    # Covers everything /auth/me and /tenants render: the user row plus the
+    # tenants (and their roles) the user belongs to.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_user_state_version(p_user_id uuid) RETURNS text
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT md5(
+            COALESCE((SELECT uv.version FROM user_versions uv WHERE uv.user_id = p_user_id), 0)::text
+            || '|'
+            || COALESCE(
+                 (SELECT string_agg(m.tenant_id::text || ':' || COALESCE(tv.version, 0)::text, ',' ORDER BY m.tenant_id)
+                  FROM memberships m
+                  LEFT JOIN tenant_versions tv ON tv.tenant_id = m.tenant_id
+                  WHERE m.user_id = p_user_id),
+                 ''
+               )
+          );
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_permissions_version() RETURNS bigint
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT last_value FROM permissions_version_seq;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS app_permissions_version();")
+    op.execute("DROP FUNCTION IF EXISTS app_user_state_version(uuid);")
+    op.execute("DROP FUNCTION IF EXISTS app_tenant_version(uuid);")
+    op.execute("DROP TRIGGER IF EXISTS trg_permissions_version ON permissions;")
+    op.execute("DROP FUNCTION IF EXISTS app_on_permissions_change();")
+    for table in reversed(_TRACKED_TABLES):
+        for suffix in ["del", "upd", "ins"]:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_versions_{suffix} ON {table};")
+    op.execute("DROP FUNCTION IF EXISTS app_on_versioned_change();")
+    op.execute("DROP FUNCTION IF EXISTS app_bump_versions(uuid[], uuid[]);")
+    op.execute("DROP SEQUENCE IF EXISTS permissions_version_seq;")
+    op.drop_table("user_versions")
+    op.drop_table("tenant_versions")
@@ -0,0 +1,78 @@
+"""notify workers when the permissions catalog changes
+
+Revision ID: 20261018_0006
+Revises: 20261018_0005
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "20261018_0006"
+down_revision = "20261018_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A fresh sequence reports last_value = 1 before its first nextval, which
+    # would make the first change indistinguishable from the initial state.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_permissions_version() RETURNS bigint
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM permissions_version_seq;
+        $$;
+        """
+    )
+    # The payload is the new catalog version, so workers that already reloaded
+    # past it can ignore the notification.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_on_permissions_change()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        BEGIN
+          PERFORM pg_notify('app_permissions_changed', nextval('permissions_version_seq')::text);
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_permissions_version() RETURNS bigint
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT last_value FROM permissions_version_seq;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_on_permissions_change()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        BEGIN
+          PERFORM nextval('permissions_version_seq');
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
@@ -0,0 +1,121 @@
+"""indexed audit log search
+
+Revision ID: 20261018_0007
+Revises: 20261018_0006
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0007"
+down_revision = "20261018_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin;")
+
+    # Email of the actor at the time of the action, so listing and searching
+    # the log no longer calls app_user_email() per row.
+    op.add_column("audit_log", sa.Column("actor_email", sa.Text(), nullable=True))
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_set_audit_actor_email()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        BEGIN
+          SELECT u.email::text INTO NEW.actor_email FROM users u WHERE u.id = NEW.actor_user_id;
+          RETURN NEW;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_audit_log_actor_email
+        BEFORE INSERT OR UPDATE OF actor_user_id ON audit_log
+        FOR EACH ROW EXECUTE FUNCTION app_set_audit_actor_email();
+        """
+    )
+    op.execute(
+        """
+        UPDATE audit_log a
+        SET actor_email = u.email::text
+        FROM users u
+        WHERE u.id = a.actor_user_id;
+        """
+    )
+
+    # Everything `q` matches against, including the before/after payloads.
+    # Queries must call this exact function for the index to be used.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_audit_search_document(
+          p_action text, p_entity_type text, p_actor_email text, p_before json, p_after json
+        ) RETURNS text
+        LANGUAGE sql
+        IMMUTABLE
+        PARALLEL SAFE
+        AS $$
+          SELECT p_action || ' ' || p_entity_type || ' ' || COALESCE(p_actor_email, '')
+            || ' ' || COALESCE(p_before::text, '') || ' ' || COALESCE(p_after::text, '');
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX ix_audit_tenant_search_trgm ON audit_log USING gin (
+          tenant_id,
+          app_audit_search_document(action, entity_type, actor_email, before, after) gin_trgm_ops
+        );
+        """
+    )
+    # Expression statistics let the planner choose between this index (rare
+    # terms) and walking ix_audit_tenant_created_at (terms matching most rows).
+    op.execute("ANALYZE audit_log;")
+
+    # ILIKE is not leakproof, so under RLS the planner may not use it as an
+    # index condition and every search turns into a scan of the tenant's rows.
+    # This helper checks membership once, then runs the indexable query itself.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_search_audit_log(
+          p_pattern text,
+          p_entity_type text,
+          p_cursor_created_at timestamptz,
+          p_cursor_id uuid,
+          p_limit integer
+        ) RETURNS SETOF audit_log
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT a.*
+          FROM audit_log a
+          WHERE app_is_member(app_current_tenant_id(), app_current_user_id())
+            AND a.tenant_id = app_current_tenant_id()
+            AND app_audit_search_document(a.action, a.entity_type, a.actor_email, a.before, a.after) ILIKE p_pattern
+            AND (p_entity_type IS NULL OR a.entity_type = p_entity_type)
+            AND (p_cursor_created_at IS NULL OR (a.created_at, a.id) < (p_cursor_created_at, p_cursor_id))
+          ORDER BY a.created_at DESC, a.id DESC
+          LIMIT p_limit;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS app_search_audit_log(text, text, timestamptz, uuid, integer);")
+    op.execute("DROP INDEX IF EXISTS ix_audit_tenant_search_trgm;")
+    op.execute("DROP FUNCTION IF EXISTS app_audit_search_document(text, text, text, json, json);")
+    op.execute("DROP TRIGGER IF EXISTS trg_audit_log_actor_email ON audit_log;")
+    op.execute("DROP FUNCTION IF EXISTS app_set_audit_actor_email();")
+    op.drop_column("audit_log", "actor_email")
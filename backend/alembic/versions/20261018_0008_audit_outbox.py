@@ -0,0 +1,138 @@
+"""transactional outbox for audit entries
+
+Revision ID: 20261018_0008
+Revises: 20261018_0007
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0008"
+down_revision = "20261018_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Append-only staging area written in the request transaction. Only the
+    # primary key is indexed; audit_log indexes are maintained in batches by
+    # app_drain_audit_outbox().
+    op.create_table(
+        "audit_outbox",
+        sa.Column("id", sa.BigInteger(), sa.Identity(always=True), primary_key=True),
+        sa.Column("tenant_id", sa.Uuid(), nullable=False),
+        sa.Column("actor_user_id", sa.Uuid(), nullable=False),
+        sa.Column("action", sa.Text(), nullable=False),
+        sa.Column("entity_type", sa.Text(), nullable=False),
+        sa.Column("entity_id", sa.Uuid(), nullable=True),
+        sa.Column("before", sa.JSON(), nullable=True),
+        sa.Column("after", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.execute("ALTER TABLE audit_outbox ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE audit_outbox FORCE ROW LEVEL SECURITY;")
+    op.execute(
+        """
+        CREATE POLICY audit_outbox_tenant_insert ON audit_outbox
+          FOR INSERT
+          WITH CHECK (
+            audit_outbox.tenant_id = app_current_tenant_id()
+            AND app_is_member(audit_outbox.tenant_id, app_current_user_id())
+          );
+        """
+    )
+
+    # The drain passes actor_email itself (one join per batch instead of one
+    # lookup per row); direct inserts still get it from the trigger.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_set_audit_actor_email()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        BEGIN
+          IF TG_OP = 'INSERT' AND NEW.actor_email IS NOT NULL THEN
+            RETURN NEW;
+          END IF;
+          SELECT u.email::text INTO NEW.actor_email FROM users u WHERE u.id = NEW.actor_user_id;
+          RETURN NEW;
+        END;
+        $$;
+        """
+    )
+
+    # Moves up to p_limit entries, oldest first, in one statement: the DELETE
+    # and the INSERT commit or roll back together, so each entry lands exactly
+    # once. The advisory lock serializes drainers so entries are appended in
+    # outbox order.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_drain_audit_outbox(p_limit integer)
+        RETURNS integer
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        DECLARE
+          v_moved integer;
+        BEGIN
+          IF NOT pg_try_advisory_xact_lock(hashtext('app_drain_audit_outbox')) THEN
+            RETURN 0;
+          END IF;
+
+          WITH batch AS (
+            DELETE FROM audit_outbox o
+            WHERE o.id IN (SELECT id FROM audit_outbox ORDER BY id LIMIT p_limit)
+            RETURNING o.*
+          )
+          INSERT INTO audit_log (tenant_id, actor_user_id, actor_email, action, entity_type, entity_id, before, after, created_at)
+          SELECT b.tenant_id, b.actor_user_id, u.email::text, b.action, b.entity_type, b.entity_id, b.before, b.after, b.created_at
+          FROM batch b
+          LEFT JOIN users u ON u.id = b.actor_user_id
+          ORDER BY b.id;
+
+          GET DIAGNOSTICS v_moved = ROW_COUNT;
+          RETURN v_moved;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_audit_outbox_lag()
+        RETURNS TABLE (pending bigint, oldest_created_at timestamptz)
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT count(*), min(created_at) FROM audit_outbox;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS app_audit_outbox_lag();")
+    op.execute("DROP FUNCTION IF EXISTS app_drain_audit_outbox(integer);")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_set_audit_actor_email()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        BEGIN
+          SELECT u.email::text INTO NEW.actor_email FROM users u WHERE u.id = NEW.actor_user_id;
+          RETURN NEW;
+        END;
+        $$;
+        """
+    )
+    op.execute("DROP POLICY IF EXISTS audit_outbox_tenant_insert ON audit_outbox;")
+    op.drop_table("audit_outbox")
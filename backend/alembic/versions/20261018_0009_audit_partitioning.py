@@ -0,0 +1,351 @@
+"""monthly partitions and retention for audit_log
+
+Revision ID: 20261018_0009
+Revises: 20261018_0008
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0009"
+down_revision = "20261018_0008"
+branch_labels = None
+depends_on = None
+
+
+_POLICY = """
+    CREATE POLICY audit_log_tenant_access ON audit_log
+      FOR ALL
+      USING (
+        audit_log.tenant_id = app_current_tenant_id()
+        AND app_is_member(audit_log.tenant_id, app_current_user_id())
+      )
+      WITH CHECK (
+        audit_log.tenant_id = app_current_tenant_id()
+        AND app_is_member(audit_log.tenant_id, app_current_user_id())
+      );
+"""
+
+_INDEXES_AND_TRIGGER = """
+    CREATE INDEX ix_audit_tenant_created_at ON audit_log (tenant_id, created_at DESC, id DESC);
+    CREATE INDEX ix_audit_tenant_entity ON audit_log (tenant_id, entity_type, entity_id);
+    CREATE INDEX ix_audit_tenant_search_trgm ON audit_log USING gin (
+      tenant_id,
+      app_audit_search_document(action, entity_type, actor_email, before, after) gin_trgm_ops
+    );
+    CREATE TRIGGER trg_audit_log_actor_email
+    BEFORE INSERT OR UPDATE OF actor_user_id ON audit_log
+    FOR EACH ROW EXECUTE FUNCTION app_set_audit_actor_email();
+"""
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tenants",
+        sa.Column("audit_retention_days", sa.Integer(), sa.CheckConstraint("audit_retention_days > 0"), nullable=True),
+    )
+    # PUT /audit/retention. New tenants get it through app_seed_system_roles().
+    op.execute(
+        """
+        INSERT INTO permissions (code, description) VALUES
+          ('audit:manage', 'Configure audit log retention')
+        ON CONFLICT (code) DO NOTHING;
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO role_permissions (role_id, permission_code, tenant_id)
+          SELECT r.id, 'audit:manage', r.tenant_id
+          FROM roles r
+          WHERE r.is_system AND r.name IN ('Owner', 'Admin')
+        ON CONFLICT (role_id, permission_code) DO NOTHING;
+        """
+    )
+    op.execute(
+        """
+        CREATE POLICY tenants_update ON tenants
+          FOR UPDATE
+          USING (
+            tenants.id = app_current_tenant_id()
+            AND app_is_member(tenants.id, app_current_user_id())
+          )
+          WITH CHECK (
+            tenants.id = app_current_tenant_id()
+            AND app_is_member(tenants.id, app_current_user_id())
+          );
+        """
+    )
+
+    # The search helper returns SETOF audit_log and is recreated below.
+    op.execute("DROP FUNCTION app_search_audit_log(text, text, timestamptz, uuid, integer);")
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_unpartitioned;")
+    # The partition key has to be part of the primary key.
+    op.execute(
+        """
+        CREATE TABLE audit_log (LIKE audit_log_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (created_at);
+        """
+    )
+
+    # One partition per UTC month, named audit_log_pYYYYMM. A partition is
+    # built as a plain table and then attached, which only needs a SHARE
+    # UPDATE EXCLUSIVE lock on audit_log (CREATE TABLE ... PARTITION OF would
+    # block readers). Rows that landed in the default partition for that
+    # month are moved over first. Partitions get RLS without any policy:
+    # access through audit_log uses the parent's policy, direct access to a
+    # partition sees nothing.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_ensure_audit_partitions(p_from timestamptz, p_months_ahead integer)
+        RETURNS SETOF text
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        DECLARE
+          v_month timestamp := date_trunc('month', p_from AT TIME ZONE 'UTC');
+          v_last timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => p_months_ahead);
+          v_lower timestamptz;
+          v_upper timestamptz;
+          v_name text;
+        BEGIN
+          WHILE v_month <= v_last LOOP
+            v_name := 'audit_log_p' || to_char(v_month, 'YYYYMM');
+            v_lower := v_month AT TIME ZONE 'UTC';
+            v_upper := (v_month + interval '1 month') AT TIME ZONE 'UTC';
+            IF to_regclass(v_name) IS NULL THEN
+              EXECUTE format('CREATE TABLE %I (LIKE audit_log INCLUDING DEFAULTS)', v_name);
+              EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_name);
+              EXECUTE format('ALTER TABLE %I FORCE ROW LEVEL SECURITY', v_name);
+              IF to_regclass('audit_log_default') IS NOT NULL THEN
+                EXECUTE format(
+                  'WITH moved AS (DELETE FROM audit_log_default WHERE created_at >= %L AND created_at < %L RETURNING *)
+                   INSERT INTO %I SELECT * FROM moved',
+                  v_lower, v_upper, v_name
+                );
+              END IF;
+              EXECUTE format(
+                'ALTER TABLE audit_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                v_name, v_lower, v_upper
+              );
+              RETURN NEXT v_name;
+            END IF;
+            v_month := v_month + interval '1 month';
+          END LOOP;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        SELECT app_ensure_audit_partitions(
+          COALESCE((SELECT min(created_at) FROM audit_log_unpartitioned), now()),
+          3
+        );
+        """
+    )
+    # Catches entries outside the prepared months (clock skew, maintenance not
+    # running) instead of failing the outbox drain.
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT;")
+    op.execute("ALTER TABLE audit_log_default ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE audit_log_default FORCE ROW LEVEL SECURITY;")
+
+    op.execute("INSERT INTO audit_log SELECT * FROM audit_log_unpartitioned;")
+    op.execute("DROP TABLE audit_log_unpartitioned;")
+
+    op.execute("ALTER TABLE audit_log ADD CONSTRAINT audit_log_pkey PRIMARY KEY (id, created_at);")
+    op.execute(
+        """
+        ALTER TABLE audit_log ADD CONSTRAINT audit_log_tenant_id_fkey
+          FOREIGN KEY (tenant_id) REFERENCES tenants (id) ON DELETE CASCADE;
+        """
+    )
+    op.execute(_INDEXES_AND_TRIGGER)
+    op.execute("ALTER TABLE audit_log ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE audit_log FORCE ROW LEVEL SECURITY;")
+    op.execute(_POLICY)
+
+    # Start of the window a tenant may still read. Shorter per-tenant
+    # retention is enforced here, at read time; the rows themselves go when
+    # their month is dropped by app_maintain_audit_partitions(). STABLE, so
+    # `created_at >= app_audit_retention_cutoff(...)` prunes partitions when
+    # the executor starts.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_audit_retention_cutoff(p_tenant_id uuid, p_default_days integer)
+        RETURNS timestamptz
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT COALESCE(
+            now() - make_interval(days => COALESCE(
+              (SELECT t.audit_retention_days FROM tenants t WHERE t.id = p_tenant_id),
+              p_default_days
+            )),
+            '-infinity'
+          );
+        $$;
+        """
+    )
+
+    # Same query as before, with the bounds written so that partitions outside
+    # [retention cutoff, cursor] are pruned: the row comparison alone does not
+    # let the planner derive a bound on created_at.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_search_audit_log(
+          p_pattern text,
+          p_entity_type text,
+          p_cursor_created_at timestamptz,
+          p_cursor_id uuid,
+          p_limit integer,
+          p_default_retention_days integer
+        ) RETURNS SETOF audit_log
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT a.*
+          FROM audit_log a
+          WHERE app_is_member(app_current_tenant_id(), app_current_user_id())
+            AND a.tenant_id = app_current_tenant_id()
+            AND app_audit_search_document(a.action, a.entity_type, a.actor_email, a.before, a.after) ILIKE p_pattern
+            AND (p_entity_type IS NULL OR a.entity_type = p_entity_type)
+            AND a.created_at >= app_audit_retention_cutoff(app_current_tenant_id(), p_default_retention_days)
+            AND a.created_at <= COALESCE(p_cursor_created_at, 'infinity')
+            AND (p_cursor_created_at IS NULL OR (a.created_at, a.id) < (p_cursor_created_at, p_cursor_id))
+          ORDER BY a.created_at DESC, a.id DESC
+          LIMIT p_limit;
+        $$;
+        """
+    )
+
+    # Periodic upkeep, safe to run at any frequency:
+    # - prepares the next p_months_ahead months;
+    # - drops (or detaches, to archive them elsewhere) months that are past
+    #   the longest retention of any tenant, tenants without their own
+    #   setting using p_default_days (NULL: keep forever);
+    # - adds a BRIN index on created_at to closed months, which are no longer
+    #   written to and stay in insertion order, for time-range scans.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_maintain_audit_partitions(
+          p_months_ahead integer,
+          p_default_days integer,
+          p_detach boolean
+        ) RETURNS TABLE (action text, partition_name text)
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        DECLARE
+          v_horizon timestamptz;
+          v_current timestamptz := date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+          v_part record;
+        BEGIN
+          IF NOT pg_try_advisory_xact_lock(hashtext('app_maintain_audit_partitions')) THEN
+            RETURN;
+          END IF;
+
+          RETURN QUERY SELECT 'created'::text, p FROM app_ensure_audit_partitions(now(), p_months_ahead) p;
+
+          SELECT CASE
+                   WHEN bool_or(COALESCE(t.audit_retention_days, p_default_days) IS NULL) THEN NULL
+                   ELSE now() - make_interval(days => max(COALESCE(t.audit_retention_days, p_default_days)))
+                 END
+          INTO v_horizon
+          FROM tenants t;
+
+          FOR v_part IN
+            SELECT c.relname AS name,
+                   (to_date(right(c.relname, 6), 'YYYYMM') + interval '1 month') AT TIME ZONE 'UTC' AS upper_bound
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'audit_log'::regclass
+              AND c.relname ~ '^audit_log_p[0-9]{6}$'
+            ORDER BY c.relname
+          LOOP
+            IF v_part.upper_bound <= v_horizon THEN
+              IF p_detach THEN
+                EXECUTE format('ALTER TABLE audit_log DETACH PARTITION %I', v_part.name);
+                action := 'detached';
+              ELSE
+                EXECUTE format('DROP TABLE %I', v_part.name);
+                action := 'dropped';
+              END IF;
+              partition_name := v_part.name;
+              RETURN NEXT;
+            ELSIF v_part.upper_bound <= v_current
+                  AND to_regclass(v_part.name || '_created_at_brin') IS NULL THEN
+              EXECUTE format(
+                'CREATE INDEX %I ON %I USING brin (created_at)', v_part.name || '_created_at_brin', v_part.name
+              );
+              action := 'brin';
+              partition_name := v_part.name;
+              RETURN NEXT;
+            END IF;
+          END LOOP;
+        END;
+        $$;
+        """
+    )
+    op.execute("ANALYZE audit_log;")
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS app_maintain_audit_partitions(integer, integer, boolean);")
+    op.execute("DROP FUNCTION IF EXISTS app_search_audit_log(text, text, timestamptz, uuid, integer, integer);")
+    op.execute("DROP FUNCTION IF EXISTS app_audit_retention_cutoff(uuid, integer);")
+
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned;")
+    op.execute("CREATE TABLE audit_log (LIKE audit_log_partitioned INCLUDING DEFAULTS);")
+    op.execute("INSERT INTO audit_log SELECT * FROM audit_log_partitioned;")
+    op.execute("DROP TABLE audit_log_partitioned;")
+    op.execute("DROP FUNCTION IF EXISTS app_ensure_audit_partitions(timestamptz, integer);")
+
+    op.execute("ALTER TABLE audit_log ADD CONSTRAINT audit_log_pkey PRIMARY KEY (id);")
+    op.execute(
+        """
+        ALTER TABLE audit_log ADD CONSTRAINT audit_log_tenant_id_fkey
+          FOREIGN KEY (tenant_id) REFERENCES tenants (id) ON DELETE CASCADE;
+        """
+    )
+    op.execute(_INDEXES_AND_TRIGGER)
+    op.execute("ALTER TABLE audit_log ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE audit_log FORCE ROW LEVEL SECURITY;")
+    op.execute(_POLICY)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_search_audit_log(
+          p_pattern text,
+          p_entity_type text,
+          p_cursor_created_at timestamptz,
+          p_cursor_id uuid,
+          p_limit integer
+        ) RETURNS SETOF audit_log
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT a.*
+          FROM audit_log a
+          WHERE app_is_member(app_current_tenant_id(), app_current_user_id())
+            AND a.tenant_id = app_current_tenant_id()
+            AND app_audit_search_document(a.action, a.entity_type, a.actor_email, a.before, a.after) ILIKE p_pattern
+            AND (p_entity_type IS NULL OR a.entity_type = p_entity_type)
+            AND (p_cursor_created_at IS NULL OR (a.created_at, a.id) < (p_cursor_created_at, p_cursor_id))
+          ORDER BY a.created_at DESC, a.id DESC
+          LIMIT p_limit;
+        $$;
+        """
+    )
+    op.execute("DROP POLICY IF EXISTS tenants_update ON tenants;")
+    op.execute("DELETE FROM role_permissions WHERE permission_code = 'audit:manage';")
+    op.execute("DELETE FROM permissions WHERE code = 'audit:manage';")
+    op.drop_column("tenants", "audit_retention_days")
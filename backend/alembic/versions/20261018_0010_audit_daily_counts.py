@@ -0,0 +1,139 @@
+"""daily audit activity rollup
+
+Revision ID: 20261018_0010
+Revises: 20261018_0009
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0010"
+down_revision = "20261018_0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row per (tenant, UTC day, action, entity type, actor): a few
+    # thousand rows per tenant-month whatever the audit volume.
+    op.create_table(
+        "audit_daily_counts",
+        sa.Column("tenant_id", sa.Uuid(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("action", sa.Text(), nullable=False),
+        sa.Column("entity_type", sa.Text(), nullable=False),
+        sa.Column("actor_user_id", sa.Uuid(), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("tenant_id", "day", "action", "entity_type", "actor_user_id"),
+    )
+    op.execute("ALTER TABLE audit_daily_counts ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE audit_daily_counts FORCE ROW LEVEL SECURITY;")
+    # The membership check does not depend on the row, so it is written as an
+    # InitPlan evaluated once per query rather than once per rollup row.
+    op.execute(
+        """
+        CREATE POLICY audit_daily_counts_tenant_select ON audit_daily_counts
+          FOR SELECT
+          USING (
+            audit_daily_counts.tenant_id = app_current_tenant_id()
+            AND (SELECT app_is_member(app_current_tenant_id(), app_current_user_id()))
+          );
+        """
+    )
+
+    # Statement-level, so the outbox drain (one INSERT per batch) costs one
+    # grouped upsert. Rows are upserted in key order to avoid deadlocks
+    # between concurrent writers.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_count_audit_entries()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        BEGIN
+          INSERT INTO audit_daily_counts AS c (tenant_id, day, action, entity_type, actor_user_id, count)
+          SELECT n.tenant_id, (n.created_at AT TIME ZONE 'UTC')::date, n.action, n.entity_type, n.actor_user_id, count(*)
+          FROM new_rows n
+          GROUP BY 1, 2, 3, 4, 5
+          ORDER BY 1, 2, 3, 4, 5
+          ON CONFLICT (tenant_id, day, action, entity_type, actor_user_id)
+          DO UPDATE SET count = c.count + EXCLUDED.count;
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_audit_log_daily_counts
+        AFTER INSERT ON audit_log
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION app_count_audit_entries();
+        """
+    )
+
+    # Recomputes the rollup of one tenant (or all of them) from audit_log.
+    # SHARE mode lets readers through but holds back inserts, which would
+    # otherwise be counted twice or not at all.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_rebuild_audit_daily_counts(p_tenant_id uuid)
+        RETURNS bigint
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        DECLARE
+          v_rows bigint;
+        BEGIN
+          LOCK TABLE audit_log IN SHARE MODE;
+          DELETE FROM audit_daily_counts WHERE p_tenant_id IS NULL OR tenant_id = p_tenant_id;
+          INSERT INTO audit_daily_counts (tenant_id, day, action, entity_type, actor_user_id, count)
+          SELECT a.tenant_id, (a.created_at AT TIME ZONE 'UTC')::date, a.action, a.entity_type, a.actor_user_id, count(*)
+          FROM audit_log a
+          WHERE p_tenant_id IS NULL OR a.tenant_id = p_tenant_id
+          GROUP BY 1, 2, 3, 4, 5;
+          GET DIAGNOSTICS v_rows = ROW_COUNT;
+          RETURN v_rows;
+        END;
+        $$;
+        """
+    )
+    op.execute("SELECT app_rebuild_audit_daily_counts(NULL);")
+
+    # Days entirely past a tenant's retention (see app_audit_retention_cutoff).
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_prune_audit_daily_counts(p_default_days integer)
+        RETURNS bigint
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        DECLARE
+          v_rows bigint;
+        BEGIN
+          DELETE FROM audit_daily_counts c
+          USING tenants t
+          WHERE t.id = c.tenant_id
+            AND c.day < (app_audit_retention_cutoff(t.id, p_default_days) AT TIME ZONE 'UTC')::date;
+          GET DIAGNOSTICS v_rows = ROW_COUNT;
+          RETURN v_rows;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS app_prune_audit_daily_counts(integer);")
+    op.execute("DROP FUNCTION IF EXISTS app_rebuild_audit_daily_counts(uuid);")
+    op.execute("DROP TRIGGER IF EXISTS trg_audit_log_daily_counts ON audit_log;")
+    op.execute("DROP FUNCTION IF EXISTS app_count_audit_entries();")
+    op.execute("DROP POLICY IF EXISTS audit_daily_counts_tenant_select ON audit_daily_counts;")
+    op.drop_table("audit_daily_counts")
@@ -0,0 +1,70 @@
+"""composite role/tenant foreign key instead of the role_permissions trigger
+
+Revision ID: 20261018_0011
+Revises: 20261018_0010
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "20261018_0011"
+down_revision = "20261018_0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # role_permissions.tenant_id must match the role's tenant. The BEFORE
+    # INSERT trigger enforced that with one lookup per row, and could not see
+    # a role inserted earlier in the same statement (data-modifying CTEs
+    # share one snapshot). A composite foreign key is checked at the end of
+    # the statement instead and replaces the plain role_id key.
+    op.execute("DROP TRIGGER IF EXISTS trg_role_permissions_tenant_id ON role_permissions;")
+    op.execute("DROP FUNCTION IF EXISTS app_role_permissions_set_tenant_id();")
+    op.create_unique_constraint("uq_roles_id_tenant", "roles", ["id", "tenant_id"])
+    op.create_foreign_key(
+        "fk_role_permissions_role_tenant",
+        "role_permissions",
+        "roles",
+        ["role_id", "tenant_id"],
+        ["id", "tenant_id"],
+        ondelete="CASCADE",
+    )
+    op.drop_constraint("role_permissions_role_id_fkey", "role_permissions", type_="foreignkey")
+
+
+def downgrade() -> None:
+    op.create_foreign_key(
+        "role_permissions_role_id_fkey", "role_permissions", "roles", ["role_id"], ["id"], ondelete="CASCADE"
+    )
+    op.drop_constraint("fk_role_permissions_role_tenant", "role_permissions", type_="foreignkey")
+    op.drop_constraint("uq_roles_id_tenant", "roles", type_="unique")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_role_permissions_set_tenant_id()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        DECLARE
+          v_tenant_id uuid;
+        BEGIN
+          SELECT r.tenant_id INTO v_tenant_id FROM roles r WHERE r.id = NEW.role_id;
+          IF v_tenant_id IS NULL THEN
+            RAISE EXCEPTION 'role_id % does not exist', NEW.role_id;
+          END IF;
+          NEW.tenant_id := v_tenant_id;
+          RETURN NEW;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_role_permissions_tenant_id
+        BEFORE INSERT OR UPDATE ON role_permissions
+        FOR EACH ROW EXECUTE FUNCTION app_role_permissions_set_tenant_id();
+        """
+    )
@@ -0,0 +1,113 @@
+"""bulk member import jobs
+
+Revision ID: 20261018_0012
+Revises: 20261018_0011
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0012"
+down_revision = "20261018_0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row per POST /members/import, updated by the worker as batches
+    # commit; the counters are what the status endpoint reports.
+    op.create_table(
+        "member_import_jobs",
+        sa.Column("id", sa.Uuid(), primary_key=True, server_default=sa.text("gen_random_uuid()")),
+        sa.Column("tenant_id", sa.Uuid(), nullable=False),
+        sa.Column("actor_user_id", sa.Uuid(), nullable=False),
+        sa.Column("status", sa.Text(), server_default=sa.text("'queued'"), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("processed", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("created", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("existing", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("failed", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"], ondelete="CASCADE"),
+        sa.CheckConstraint(
+            "status IN ('queued', 'running', 'succeeded', 'failed')", name="ck_member_import_jobs_status"
+        ),
+    )
+
+    # Outcome of every input line, written in bulk per batch.
+    op.create_table(
+        "member_import_rows",
+        sa.Column("job_id", sa.Uuid(), nullable=False),
+        sa.Column("line", sa.Integer(), nullable=False),
+        sa.Column("tenant_id", sa.Uuid(), nullable=False),
+        sa.Column("email", sa.Text(), nullable=False),
+        sa.Column("status", sa.Text(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("user_id", sa.Uuid(), nullable=True),
+        sa.Column("membership_id", sa.Uuid(), nullable=True),
+        sa.ForeignKeyConstraint(["job_id"], ["member_import_jobs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("job_id", "line"),
+        sa.CheckConstraint("status IN ('created', 'existing', 'failed')", name="ck_member_import_rows_status"),
+    )
+
+    for table in ["member_import_jobs", "member_import_rows"]:
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY;")
+        op.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY;")
+        op.execute(
+            f"""
+            CREATE POLICY {table}_tenant_access ON {table}
+              FOR ALL
+              USING (
+                {table}.tenant_id = app_current_tenant_id()
+                AND (SELECT app_is_member(app_current_tenant_id(), app_current_user_id()))
+              )
+              WITH CHECK (
+                {table}.tenant_id = app_current_tenant_id()
+                AND (SELECT app_is_member(app_current_tenant_id(), app_current_user_id()))
+              );
+            """
+        )
+
+    # Set-based app_upsert_user(): users are global and hidden by RLS, so the
+    # import needs a definer function to create or resolve them. Existing
+    # users keep their password. A user created concurrently by another
+    # transaction is not visible to this statement and comes back without id.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_upsert_users(p_emails citext[], p_password_hashes text[])
+        RETURNS TABLE (email citext, user_id uuid, created boolean)
+        LANGUAGE sql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          WITH input AS (
+            SELECT DISTINCT ON (i.email) i.email, i.password_hash
+            FROM unnest(p_emails, p_password_hashes) AS i(email, password_hash)
+            ORDER BY i.email
+          ),
+          inserted AS (
+            INSERT INTO users (email, password_hash)
+            SELECT input.email, input.password_hash FROM input ORDER BY input.email
+            ON CONFLICT (email) DO NOTHING
+            RETURNING users.id, users.email
+          )
+          SELECT input.email, COALESCE(n.id, u.id), n.id IS NOT NULL
+          FROM input
+          LEFT JOIN inserted n ON n.email = input.email
+          LEFT JOIN users u ON u.email = input.email;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS app_upsert_users(citext[], text[]);")
+    for table in ["member_import_rows", "member_import_jobs"]:
+        op.execute(f"DROP POLICY IF EXISTS {table}_tenant_access ON {table};")
+    op.drop_table("member_import_rows")
+    op.drop_table("member_import_jobs")
@@ -0,0 +1,159 @@
+"""keyset-paginated, searchable member directory
+
+Revision ID: 20261018_0013
+Revises: 20261018_0012
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0013"
+down_revision = "20261018_0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The member's email, so listing and searching no longer call
+    # app_user_email() per row. Set on insert and kept in sync with users.
+    op.add_column("memberships", sa.Column("email", sa.Text(), nullable=True))
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_set_membership_email()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        BEGIN
+          SELECT u.email::text INTO NEW.email FROM users u WHERE u.id = NEW.user_id;
+          RETURN NEW;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_memberships_email
+        BEFORE INSERT OR UPDATE OF user_id ON memberships
+        FOR EACH ROW EXECUTE FUNCTION app_set_membership_email();
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_sync_membership_email()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        BEGIN
+          UPDATE memberships m SET email = n.email::text
+          FROM new_rows n
+          JOIN old_rows o ON o.id = n.id
+          WHERE m.user_id = n.id AND n.email IS DISTINCT FROM o.email;
+          RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_users_membership_email
+        AFTER UPDATE ON users
+        REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION app_sync_membership_email();
+        """
+    )
+    op.execute("UPDATE memberships m SET email = u.email::text FROM users u WHERE u.id = m.user_id;")
+    op.alter_column("memberships", "email", nullable=False)
+
+    # Keyset order of GET /members, with and without the role filter.
+    op.drop_index("ix_memberships_tenant_role", table_name="memberships")
+    op.execute(
+        "CREATE INDEX ix_memberships_tenant_role_created_at ON memberships (tenant_id, role_id, created_at DESC, id DESC);"
+    )
+    op.execute("CREATE INDEX ix_memberships_tenant_created_at ON memberships (tenant_id, created_at DESC, id DESC);")
+    op.execute(
+        "CREATE INDEX ix_memberships_tenant_email_trgm ON memberships USING gin (tenant_id, lower(email) gin_trgm_ops);"
+    )
+    op.execute("ANALYZE memberships;")
+
+    # Same reason as app_search_audit_log(): LIKE is not leakproof, so under
+    # RLS the trigram index could not be used. Membership is checked once,
+    # then the indexable query runs as the owner. p_email_pattern is a LIKE
+    # pattern over lower(email).
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_search_memberships(
+          p_email_pattern text,
+          p_role_id uuid,
+          p_cursor_created_at timestamptz,
+          p_cursor_id uuid,
+          p_limit integer
+        ) RETURNS SETOF memberships
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT m.*
+          FROM memberships m
+          WHERE app_is_member(app_current_tenant_id(), app_current_user_id())
+            AND m.tenant_id = app_current_tenant_id()
+            AND lower(m.email) LIKE p_email_pattern
+            AND (p_role_id IS NULL OR m.role_id = p_role_id)
+            AND (p_cursor_created_at IS NULL OR (m.created_at, m.id) < (p_cursor_created_at, p_cursor_id))
+          ORDER BY m.created_at DESC, m.id DESC
+          LIMIT p_limit;
+        $$;
+        """
+    )
+
+    # Planner estimate of the members matching the filters, read from EXPLAIN
+    # instead of counting them (volatile: EXPLAIN is not allowed otherwise).
+    # Only fixed fragments are concatenated; the values are passed as
+    # parameters.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_estimate_memberships(p_email_pattern text, p_role_id uuid)
+        RETURNS bigint
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        DECLARE
+          v_sql text := 'EXPLAIN (FORMAT JSON) SELECT 1 FROM memberships m WHERE m.tenant_id = $1';
+          v_plan json;
+        BEGIN
+          IF NOT app_is_member(app_current_tenant_id(), app_current_user_id()) THEN
+            RETURN 0;
+          END IF;
+          IF p_email_pattern IS NOT NULL THEN
+            v_sql := v_sql || ' AND lower(m.email) LIKE $2';
+          END IF;
+          IF p_role_id IS NOT NULL THEN
+            v_sql := v_sql || ' AND m.role_id = $3';
+          END IF;
+          EXECUTE v_sql INTO v_plan USING app_current_tenant_id(), p_email_pattern, p_role_id;
+          RETURN (v_plan -> 0 -> 'Plan' ->> 'Plan Rows')::bigint;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS app_estimate_memberships(text, uuid);")
+    op.execute("DROP FUNCTION IF EXISTS app_search_memberships(text, uuid, timestamptz, uuid, integer);")
+    op.execute("DROP INDEX IF EXISTS ix_memberships_tenant_email_trgm;")
+    op.execute("DROP INDEX IF EXISTS ix_memberships_tenant_created_at;")
+    op.execute("DROP INDEX IF EXISTS ix_memberships_tenant_role_created_at;")
+    op.create_index("ix_memberships_tenant_role", "memberships", ["tenant_id", "role_id"], unique=False)
+    op.execute("DROP TRIGGER IF EXISTS trg_users_membership_email ON users;")
+    op.execute("DROP FUNCTION IF EXISTS app_sync_membership_email();")
+    op.execute("DROP TRIGGER IF EXISTS trg_memberships_email ON memberships;")
+    op.execute("DROP FUNCTION IF EXISTS app_set_membership_email();")
+    op.drop_column("memberships", "email")
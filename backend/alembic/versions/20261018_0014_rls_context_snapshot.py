@@ -0,0 +1,207 @@
+"""rls membership verified once per transaction
+
+Revision ID: 20261018_0014
+Revises: 20261018_0013
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "20261018_0014"
+down_revision = "20261018_0013"
+branch_labels = None
+depends_on = None
+
+
+_PER_ROW = "app_is_member({table}.{column}, app_current_user_id())"
+_PER_QUERY = "(SELECT app_is_member(app_current_tenant_id(), app_current_user_id()))"
+_SNAPSHOT = "(SELECT app_has_tenant_access())"
+
+# (table, policy, command, tenant column, membership check it had before)
+_POLICIES = [
+    ("tenants", "tenants_update", "UPDATE", "id", _PER_ROW),
+    ("roles", "roles_insert", "INSERT", "tenant_id", _PER_ROW),
+    ("roles", "roles_update", "UPDATE", "tenant_id", _PER_ROW),
+    ("roles", "roles_delete", "DELETE", "tenant_id", _PER_ROW),
+    ("role_permissions", "role_permissions_tenant_access", "ALL", "tenant_id", _PER_ROW),
+    ("memberships", "memberships_insert", "INSERT", "tenant_id", _PER_ROW),
+    ("memberships", "memberships_update", "UPDATE", "tenant_id", _PER_ROW),
+    ("memberships", "memberships_delete", "DELETE", "tenant_id", _PER_ROW),
+    ("audit_log", "audit_log_tenant_access", "ALL", "tenant_id", _PER_ROW),
+    ("audit_outbox", "audit_outbox_tenant_insert", "INSERT", "tenant_id", _PER_ROW),
+    ("audit_daily_counts", "audit_daily_counts_tenant_select", "SELECT", "tenant_id", _PER_QUERY),
+    ("member_import_jobs", "member_import_jobs_tenant_access", "ALL", "tenant_id", _PER_QUERY),
+    ("member_import_rows", "member_import_rows_tenant_access", "ALL", "tenant_id", _PER_QUERY),
+]
+
+
+def _alter_policy(table: str, policy: str, command: str, check: str) -> str:
+    clauses = []
+    if command != "INSERT":
+        clauses.append(f"USING ({check})")
+    if command in ("ALL", "INSERT", "UPDATE"):
+        clauses.append(f"WITH CHECK ({check})")
+    return f"ALTER POLICY {policy} ON {table} {' '.join(clauses)};"
+
+
+def _tenant_check(table: str, column: str, membership: str, *, current_tenant: str = "app_current_tenant_id()") -> str:
+    return f"{table}.{column} = {current_tenant} AND {membership.format(table=table, column=column)}"
+
+
+def _snapshot_check(table: str, column: str) -> str:
+    # The current tenant as an InitPlan too: compared per row, the setting
+    # would otherwise be read and cast to uuid for every row.
+    return _tenant_check(table, column, _SNAPSHOT, current_tenant="(SELECT app_current_tenant_id())")
+
+
+def upgrade() -> None:
+    # Key signing the verified context. Only reachable through the SECURITY
+    # DEFINER helpers below; gen_random_uuid() draws from the strong random
+    # source, two of them give a 256-bit key.
+    op.execute(
+        """
+        CREATE TABLE app_context_keys (
+          id boolean PRIMARY KEY DEFAULT true CHECK (id),
+          secret bytea NOT NULL
+        );
+        INSERT INTO app_context_keys (secret) VALUES (uuid_send(gen_random_uuid()) || uuid_send(gen_random_uuid()));
+        ALTER TABLE app_context_keys ENABLE ROW LEVEL SECURITY;
+        ALTER TABLE app_context_keys FORCE ROW LEVEL SECURITY;
+        """
+    )
+
+    # Signature of (user, tenant) for the current transaction: the backend pid
+    # and transaction start make it worthless outside of it. Keyed hash with
+    # the builtin sha256() (no pgcrypto). Not executable by the app role,
+    # otherwise it could sign any context.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_context_signature(p_user_id uuid, p_tenant_id uuid) RETURNS text
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT encode(
+            sha256(k.secret || sha256(k.secret || convert_to(
+              format(
+                '%s:%s:%s:%s', p_user_id, p_tenant_id, pg_backend_pid(), extract(epoch FROM transaction_timestamp())
+              ),
+              'UTF8'
+            ))),
+            'hex'
+          )
+          FROM app_context_keys k;
+        $$;
+        REVOKE ALL ON FUNCTION app_context_signature(uuid, uuid) FROM PUBLIC;
+        """
+    )
+
+    # Binds app.user_id / app.tenant_id (a NULL argument keeps the bound
+    # value) and checks membership once. A member gets app.context_signature,
+    # which the policies trust for the rest of the transaction.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_bind_context(p_user_id uuid, p_tenant_id uuid) RETURNS boolean
+        LANGUAGE plpgsql
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+        DECLARE
+          v_user_id uuid;
+          v_tenant_id uuid;
+          v_verified boolean;
+        BEGIN
+          IF p_user_id IS NOT NULL THEN
+            PERFORM set_config('app.user_id', p_user_id::text, true);
+          END IF;
+          IF p_tenant_id IS NOT NULL THEN
+            PERFORM set_config('app.tenant_id', p_tenant_id::text, true);
+          END IF;
+          v_user_id := app_current_user_id();
+          v_tenant_id := app_current_tenant_id();
+          v_verified := v_user_id IS NOT NULL AND v_tenant_id IS NOT NULL AND app_is_member(v_tenant_id, v_user_id);
+          PERFORM set_config(
+            'app.context_signature',
+            CASE WHEN v_verified THEN app_context_signature(v_user_id, v_tenant_id) ELSE '' END,
+            true
+          );
+          RETURN v_verified;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_context_verified() RETURNS boolean
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT COALESCE(
+            current_setting('app.context_signature', true)
+              = app_context_signature(app_current_user_id(), app_current_tenant_id()),
+            false
+          );
+        $$;
+        """
+    )
+
+    # What the tenant policies check, once per query (as an InitPlan). A
+    # context bound with plain set_config() (workers, ad-hoc sessions) is not
+    # signed and falls back to the membership lookup, so a crafted context is
+    # still checked against memberships.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_has_tenant_access() RETURNS boolean
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT app_context_verified() OR app_is_member(app_current_tenant_id(), app_current_user_id());
+        $$;
+        """
+    )
+
+    for table, policy, command, column, _membership in _POLICIES:
+        op.execute(_alter_policy(table, policy, command, _snapshot_check(table, column)))
+    # Both still let a user see their own rows in every tenant (GET /tenants);
+    # rows of the current tenant no longer cost a membership lookup each.
+    op.execute(
+        f"""
+        ALTER POLICY memberships_self_or_tenant_access ON memberships
+          USING (
+            memberships.user_id = (SELECT app_current_user_id())
+            OR ({_snapshot_check("memberships", "tenant_id")})
+          );
+        ALTER POLICY roles_select_member ON roles
+          USING (
+            ({_snapshot_check("roles", "tenant_id")})
+            OR app_is_member(roles.tenant_id, app_current_user_id())
+          );
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        f"""
+        ALTER POLICY roles_select_member ON roles USING (app_is_member(roles.tenant_id, app_current_user_id()));
+        ALTER POLICY memberships_self_or_tenant_access ON memberships
+          USING (
+            memberships.user_id = app_current_user_id()
+            OR ({_tenant_check("memberships", "tenant_id", _PER_ROW)})
+          );
+        """
+    )
+    for table, policy, command, column, membership in _POLICIES:
+        op.execute(_alter_policy(table, policy, command, _tenant_check(table, column, membership)))
+
+    op.execute("DROP FUNCTION IF EXISTS app_has_tenant_access();")
+    op.execute("DROP FUNCTION IF EXISTS app_context_verified();")
+    op.execute("DROP FUNCTION IF EXISTS app_bind_context(uuid, uuid);")
+    op.execute("DROP FUNCTION IF EXISTS app_context_signature(uuid, uuid);")
+    op.execute("DROP TABLE IF EXISTS app_context_keys;")
@@ -0,0 +1,94 @@
+"""member import uploads staged in the database, stale jobs reclaimed
+
+Revision ID: 20261018_0015
+Revises: 20261018_0014
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0015"
+down_revision = "20261018_0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The lines of an upload that have not been imported yet, plaintext
+    # passwords included, so they never travel through the broker. UNLOGGED
+    # keeps them out of the WAL, and so out of replicas, base backups and WAL
+    # archives; standbys cannot read the table at all. The worker deletes each
+    # batch in the transaction that imports it; a crash empties the table, and
+    # the job then fails for the lines it had not reached.
+    op.create_table(
+        "member_import_pending",
+        sa.Column("job_id", sa.Uuid(), nullable=False),
+        sa.Column("line", sa.Integer(), nullable=False),
+        sa.Column("tenant_id", sa.Uuid(), nullable=False),
+        sa.Column("email", sa.Text(), nullable=False),
+        sa.Column("password", sa.Text(), nullable=False),
+        sa.Column("role_id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["job_id"], ["member_import_jobs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("job_id", "line"),
+        prefixes=["UNLOGGED"],
+    )
+    op.execute("ALTER TABLE member_import_pending ENABLE ROW LEVEL SECURITY;")
+    op.execute("ALTER TABLE member_import_pending FORCE ROW LEVEL SECURITY;")
+    op.execute(
+        """
+        CREATE POLICY member_import_pending_tenant_access ON member_import_pending
+          FOR ALL
+          USING (
+            member_import_pending.tenant_id = (SELECT app_current_tenant_id())
+            AND (SELECT app_has_tenant_access())
+          )
+          WITH CHECK (
+            member_import_pending.tenant_id = (SELECT app_current_tenant_id())
+            AND (SELECT app_has_tenant_access())
+          );
+        """
+    )
+
+    # A running job bumps heartbeat_at with every batch; attempts counts the
+    # runs that claimed it, so a job that keeps killing its worker gives up.
+    op.add_column("member_import_jobs", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column(
+        "member_import_jobs", sa.Column("attempts", sa.Integer(), server_default=sa.text("0"), nullable=False)
+    )
+    op.execute(
+        """
+        CREATE INDEX ix_member_import_jobs_unfinished ON member_import_jobs (created_at)
+        WHERE status IN ('queued', 'running');
+        """
+    )
+
+    # Jobs whose task was lost (still queued) or whose worker stopped
+    # heartbeating, across tenants, for the periodic reclaim task.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION app_stale_member_imports(p_stale_seconds double precision)
+        RETURNS TABLE (job_id uuid, tenant_id uuid, actor_user_id uuid)
+        LANGUAGE sql
+        STABLE
+        SECURITY DEFINER
+        SET search_path = public
+        AS $$
+          SELECT j.id, j.tenant_id, j.actor_user_id
+          FROM member_import_jobs j
+          WHERE j.status IN ('queued', 'running')
+            AND COALESCE(j.heartbeat_at, j.created_at) < now() - make_interval(secs => p_stale_seconds)
+          ORDER BY j.created_at;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS app_stale_member_imports(double precision);")
+    op.execute("DROP INDEX IF EXISTS ix_member_import_jobs_unfinished;")
+    op.drop_column("member_import_jobs", "attempts")
+    op.drop_column("member_import_jobs", "heartbeat_at")
+    op.execute("DROP POLICY IF EXISTS member_import_pending_tenant_access ON member_import_pending;")
+    op.drop_table("member_import_pending")
@@ -0,0 +1,165 @@
+"""state versions striped over counter slots
+
+Revision ID: 20261018_0016
+Revises: 20261018_0015
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "20261018_0016"
+down_revision = "20261018_0015"
+branch_labels = None
+depends_on = None
+
+
+# Each tenant (user) has up to this many counter rows, picked by backend pid,
+# so concurrent writers of one tenant rarely wait on each other's row lock.
+# The version is their sum: it grows with every committed bump whatever the
+# commit order, which a max over nextval() or xact ids would not.
+_SLOTS = 16
+
+_BUMP_VERSIONS = """
+    CREATE OR REPLACE FUNCTION app_bump_versions(p_tenant_ids uuid[], p_user_ids uuid[])
+    RETURNS void
+    LANGUAGE sql
+    SECURITY DEFINER
+    SET search_path = public
+    AS $$
+      -- Ordered, so transactions bumping several tenants lock them in the same order.
+      INSERT INTO tenant_versions (tenant_id, slot, version)
+        SELECT DISTINCT t.id, {slot}, 1
+        FROM unnest(p_tenant_ids) AS ids(id)
+        JOIN tenants t ON t.id = ids.id
+        ORDER BY t.id
+      ON CONFLICT (tenant_id, slot) DO UPDATE SET version = tenant_versions.version + 1;
+
+      INSERT INTO user_versions (user_id, slot, version)
+        SELECT DISTINCT u.id, {slot}, 1
+        FROM unnest(p_user_ids) AS ids(id)
+        JOIN users u ON u.id = ids.id
+        ORDER BY u.id
+      ON CONFLICT (user_id, slot) DO UPDATE SET version = user_versions.version + 1;
+    $$;
+"""
+
+_TENANT_VERSION = """
+    CREATE OR REPLACE FUNCTION app_tenant_version(p_tenant_id uuid) RETURNS bigint
+    LANGUAGE sql
+    STABLE
+    SECURITY DEFINER
+    SET search_path = public
+    AS $$
+      SELECT COALESCE(sum(v.version), 0)::bigint FROM tenant_versions v WHERE v.tenant_id = p_tenant_id;
+    $$;
+"""
+
+_USER_STATE_VERSION = """
+    CREATE OR REPLACE FUNCTION app_user_state_version(p_user_id uuid) RETURNS text
+    LANGUAGE sql
+    STABLE
+    SECURITY DEFINER
+    SET search_path = public
+    AS $$
+      SELECT md5(
+        COALESCE((SELECT sum(uv.version) FROM user_versions uv WHERE uv.user_id = p_user_id), 0)::text
+        || '|'
+        || COALESCE(
+             (SELECT string_agg(
+                       m.tenant_id::text || ':'
+                       || (SELECT COALESCE(sum(tv.version), 0) FROM tenant_versions tv WHERE tv.tenant_id = m.tenant_id)::text,
+                       ',' ORDER BY m.tenant_id
+                     )
+              FROM memberships m
+              WHERE m.user_id = p_user_id),
+             ''
+           )
+      );
+    $$;
+"""
+
+# As of 20261018_0005.
+_OLD_BUMP_VERSIONS = """
+    CREATE OR REPLACE FUNCTION app_bump_versions(p_tenant_ids uuid[], p_user_ids uuid[])
+    RETURNS void
+    LANGUAGE sql
+    SECURITY DEFINER
+    SET search_path = public
+    AS $$
+      INSERT INTO tenant_versions (tenant_id, version)
+        SELECT DISTINCT t.id, 1
+        FROM unnest(p_tenant_ids) AS ids(id)
+        JOIN tenants t ON t.id = ids.id
+      ON CONFLICT (tenant_id) DO UPDATE SET version = tenant_versions.version + 1;
+
+      INSERT INTO user_versions (user_id, version)
+        SELECT DISTINCT u.id, 1
+        FROM unnest(p_user_ids) AS ids(id)
+        JOIN users u ON u.id = ids.id
+      ON CONFLICT (user_id) DO UPDATE SET version = user_versions.version + 1;
+    $$;
+"""
+
+_OLD_TENANT_VERSION = """
+    CREATE OR REPLACE FUNCTION app_tenant_version(p_tenant_id uuid) RETURNS bigint
+    LANGUAGE sql
+    STABLE
+    SECURITY DEFINER
+    SET search_path = public
+    AS $$
+      SELECT COALESCE((SELECT v.version FROM tenant_versions v WHERE v.tenant_id = p_tenant_id), 0);
+    $$;
+"""
+
+_OLD_USER_STATE_VERSION = """
+    CREATE OR REPLACE FUNCTION app_user_state_version(p_user_id uuid) RETURNS text
+    LANGUAGE sql
+    STABLE
+    SECURITY DEFINER
+    SET search_path = public
+    AS $$
+      SELECT md5(
+        COALESCE((SELECT uv.version FROM user_versions uv WHERE uv.user_id = p_user_id), 0)::text
+        || '|'
+        || COALESCE(
+             (SELECT string_agg(m.tenant_id::text || ':' || COALESCE(tv.version, 0)::text, ',' ORDER BY m.tenant_id)
+              FROM memberships m
+              LEFT JOIN tenant_versions tv ON tv.tenant_id = m.tenant_id
+              WHERE m.user_id = p_user_id),
+             ''
+           )
+      );
+    $$;
+"""
+
+
+def upgrade() -> None:
+    # Existing counters become slot 0, so versions carry on from their value.
+    for table, key in [("tenant_versions", "tenant_id"), ("user_versions", "user_id")]:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN slot smallint NOT NULL DEFAULT 0;")
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_pkey;")
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({key}, slot);")
+    op.execute(_BUMP_VERSIONS.format(slot=f"CAST(pg_backend_pid() % {_SLOTS} AS smallint)"))
+    op.execute(_TENANT_VERSION)
+    op.execute(_USER_STATE_VERSION)
+
+
+def downgrade() -> None:
+    op.execute(_OLD_USER_STATE_VERSION)
+    op.execute(_OLD_TENANT_VERSION)
+    op.execute(_OLD_BUMP_VERSIONS)
+    for table, key in [("tenant_versions", "tenant_id"), ("user_versions", "user_id")]:
+        op.execute(
+            f"""
+            WITH merged AS (
+              DELETE FROM {table} WHERE slot <> 0 RETURNING {key}, version
+            )
+            INSERT INTO {table} ({key}, slot, version)
+              SELECT {key}, 0, sum(version) FROM merged GROUP BY {key}
+            ON CONFLICT ({key}, slot) DO UPDATE SET version = {table}.version + excluded.version;
+            """
+        )
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_pkey;")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN slot;")
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({key});")
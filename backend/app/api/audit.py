@@ -1,34 +1,164 @@
 from __future__ import annotations
 
-import base64
-import json
-from datetime import datetime
+import csv
+import io
+from collections.abc import AsyncIterator
+from datetime import UTC, date, datetime, timedelta
+from typing import Any, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.db_json import fetch_json_response, sql_keyset_cursor, sql_timestamp
+from app.api.pagination import decode_cursor, encode_cursor, escape_like
+from app.audit import enqueue_audit
 from app.auth.deps import require_permission
 from app.db.context import set_db_app_context
-from app.db.session import get_db_session
+from app.db.session import DbSessionRoute, db_transaction, get_db_session, request_client_keys
+from app.settings import settings
 
 
-router = APIRouter()
+router = APIRouter(route_class=DbSessionRoute)
 
 
-def _encode_cursor(created_at: datetime, row_id: UUID) -> str:
-    return base64.urlsafe_b64encode(json.dumps({"created_at": created_at.isoformat(), "id": str(row_id)}).encode()).decode()
+class AuditEntryOut(BaseModel):
+    id: UUID
+    created_at: datetime
+    actor_user_id: UUID
+    actor_email: str | None
+    action: str
+    entity_type: str
+    entity_id: UUID | None
+    before: Any
+    after: Any
 
 
-def _decode_cursor(cursor: str) -> tuple[datetime, UUID] | None:
-    if not cursor:
-        return None
-    data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
-    return datetime.fromisoformat(data["created_at"]), UUID(data["id"])
+class AuditPage(BaseModel):
+    items: list[AuditEntryOut]
+    next_cursor: str | None
 
 
-@router.get("/audit")
+class AuditSeriesPoint(BaseModel):
+    day: date
+    key: str | None
+    count: int
+
+
+class AuditFacet(BaseModel):
+    value: str
+    count: int
+
+
+class AuditActorFacet(BaseModel):
+    actor_user_id: UUID
+    actor_email: str | None
+    count: int
+
+
+class AuditStats(BaseModel):
+    since: date
+    until: date
+    total: int
+    series: list[AuditSeriesPoint]
+    actions: list[AuditFacet]
+    entity_types: list[AuditFacet]
+    actors: list[AuditActorFacet]
+
+
+class AuditRetention(BaseModel):
+    # None falls back to AUDIT_RETENTION_DAYS.
+    days: int | None = Field(default=None, ge=1)
+
+
+def _audit_query(
+    tenant_id: UUID,
+    *,
+    q: str | None,
+    entity_type: str | None,
+    cursor_vals: tuple[datetime, UUID] | None,
+    limit: int | None,
+) -> tuple[str, dict[str, object]]:
+    """SQL and parameters selecting the matching entries, newest first.
+
+    ``limit=None`` selects every entry (``LIMIT NULL``).
+    """
+    params: dict[str, object] = {
+        "tenant_id": str(tenant_id),
+        "limit": limit,
+        "retention_days": settings.audit_retention_days,
+    }
+    if q:
+        # Searches go through a SECURITY DEFINER helper so the trigram index
+        # is usable despite RLS (see migration 20261018_0007).
+        params.update(
+            q=f"%{escape_like(q)}%",
+            entity_type=entity_type or None,
+            cursor_created_at=cursor_vals[0] if cursor_vals else None,
+            cursor_id=str(cursor_vals[1]) if cursor_vals else None,
+        )
+        return (
+            """
+            SELECT a.*
+            FROM app_search_audit_log(
+              CAST(:q AS text),
+              CAST(:entity_type AS text),
+              CAST(:cursor_created_at AS timestamptz),
+              CAST(:cursor_id AS uuid),
+              CAST(:limit AS integer),
+              CAST(:retention_days AS integer)
+            ) a
+            WHERE a.tenant_id = :tenant_id
+            """,
+            params,
+        )
+
+    # Both created_at bounds are what lets Postgres skip the monthly
+    # partitions outside the page (see migration 20261018_0009).
+    where = [
+        "a.tenant_id = :tenant_id",
+        "a.created_at >= app_audit_retention_cutoff(CAST(:tenant_id AS uuid), CAST(:retention_days AS integer))",
+    ]
+    if entity_type:
+        where.append("a.entity_type = :entity_type")
+        params["entity_type"] = entity_type
+    if cursor_vals:
+        created_at, row_id = cursor_vals
+        where.append("a.created_at <= :cursor_created_at")
+        where.append("(a.created_at, a.id) < (:cursor_created_at, :cursor_id)")
+        params["cursor_created_at"] = created_at
+        params["cursor_id"] = str(row_id)
+    return (
+        f"""
+        SELECT a.*
+        FROM audit_log a
+        WHERE {' AND '.join(where)}
+        ORDER BY a.created_at DESC, a.id DESC
+        LIMIT CAST(:limit AS integer)
+        """,
+        params,
+    )
+
+
+def _sql_entry_json(alias: str) -> str:
+    """``json_build_object`` rendering an entry exactly like ``AuditEntryOut``."""
+    return f"""json_build_object(
+      'id', {alias}.id,
+      'created_at', {sql_timestamp(f"{alias}.created_at")},
+      'actor_user_id', {alias}.actor_user_id,
+      'actor_email', {alias}.actor_email,
+      'action', {alias}.action,
+      'entity_type', {alias}.entity_type,
+      'entity_id', {alias}.entity_id,
+      'before', {alias}.before,
+      'after', {alias}.after
+    )"""
+
+
+@router.get("/audit", response_model=AuditPage)
 async def list_audit(
     ctx: tuple[UUID, UUID] = Depends(require_permission("audit:read")),
     session: AsyncSession = Depends(get_db_session),
@@ -36,27 +166,41 @@ async def list_audit(
     entity_type: str | None = Query(default=None),
     limit: int = Query(default=50, ge=1, le=200),
     cursor: str | None = Query(default=None),
-) -> dict:
+) -> dict | Response:
     tenant_id, _user_id = ctx
     await set_db_app_context(session, tenant_id=tenant_id)
 
-    cursor_vals = _decode_cursor(cursor) if cursor else None
+    page_sql, params = _audit_query(
+        tenant_id,
+        q=q,
+        entity_type=entity_type,
+        cursor_vals=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+    )
 
-    params: dict[str, object] = {"tenant_id": str(tenant_id), "limit": limit}
-    where = ["a.tenant_id = :tenant_id"]
-    if entity_type:
-        where.append("a.entity_type = :entity_type")
-        params["entity_type"] = entity_type
-    if q:
-        where.append(
-            "(a.action ILIKE :q OR a.entity_type ILIKE :q OR app_user_email(a.actor_user_id) ILIKE :q)"
+    if settings.db_render_json:
+        return await fetch_json_response(
+            session,
+            text(
+                f"""
+                WITH page AS ({page_sql})
+                SELECT json_build_object(
+                  'items', COALESCE(
+                    json_agg({_sql_entry_json("p")} ORDER BY p.created_at DESC, p.id DESC),
+                    '[]'::json
+                  ),
+                  'next_cursor', CASE WHEN count(*) = :limit THEN (
+                    SELECT {sql_keyset_cursor("l.created_at", "l.id")}
+                    FROM page l
+                    ORDER BY l.created_at ASC, l.id ASC
+                    LIMIT 1
+                  ) END
+                )::text
+                FROM page p;
+                """
+            ),
+            params,
         )
-        params["q"] = f"%{q}%"
-    if cursor_vals:
-        created_at, row_id = cursor_vals
-        where.append("(a.created_at, a.id) < (:cursor_created_at, :cursor_id)")
-        params["cursor_created_at"] = created_at
-        params["cursor_id"] = str(row_id)
 
     rows = (
         await session.execute(
@@ -66,16 +210,14 @@ async def list_audit(
                   a.id,
                   a.created_at,
                   a.actor_user_id,
-                  app_user_email(a.actor_user_id) AS actor_email,
+                  a.actor_email,
                   a.action,
                   a.entity_type,
                   a.entity_id,
                   a.before,
                   a.after
-                FROM audit_log a
-                WHERE {' AND '.join(where)}
-                ORDER BY a.created_at DESC, a.id DESC
-                LIMIT :limit;
+                FROM ({page_sql}) a
+                ORDER BY a.created_at DESC, a.id DESC;
                 """
             ),
             params,
@@ -85,6 +227,263 @@ async def list_audit(
     next_cursor = None
     if len(rows) == limit:
         last = rows[-1]
-        next_cursor = _encode_cursor(last["created_at"], UUID(str(last["id"])))
-    return {"items": [dict(r) for r in rows], "next_cursor": next_cursor}
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+_CSV_COLUMNS = [
+    "id",
+    "created_at",
+    "actor_user_id",
+    "actor_email",
+    "action",
+    "entity_type",
+    "entity_id",
+    "before",
+    "after",
+]
 
+
+async def _stream_export(
+    user_id: UUID,
+    tenant_id: UUID,
+    export_format: str,
+    export_sql: str,
+    params: dict[str, object],
+    client_keys: tuple[str, ...],
+) -> AsyncIterator[bytes]:
+    # The request's session is gone once the handler returns, so the body is
+    # read in a transaction of its own, through a server-side cursor. It is
+    # routed like the request's would be, so a client's own recent writes
+    # keep it on the primary.
+    async with db_transaction(read_only=True, client_keys=client_keys) as session:
+        await set_db_app_context(session, user_id=user_id, tenant_id=tenant_id)
+        result = await session.stream(text(export_sql), params)
+        batch_size = settings.audit_export_batch_size
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(_CSV_COLUMNS)
+            async for rows in result.partitions(batch_size):
+                writer.writerows(rows)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+        else:
+            async for lines in result.scalars().partitions(batch_size):
+                yield ("\n".join(lines) + "\n").encode()
+
+
+@router.get("/audit/export", response_class=StreamingResponse)
+async def export_audit(
+    request: Request,
+    ctx: tuple[UUID, UUID] = Depends(require_permission("audit:read")),
+    q: str | None = Query(default=None),
+    entity_type: str | None = Query(default=None),
+    export_format: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+) -> StreamingResponse:
+    """Every entry matching ``q``/``entity_type``, newest first, as NDJSON or CSV.
+
+    Rows are rendered by Postgres and forwarded in batches of
+    ``AUDIT_EXPORT_BATCH_SIZE``, so memory use does not grow with the export.
+    """
+    tenant_id, user_id = ctx
+    export_sql, params = _audit_query(tenant_id, q=q, entity_type=entity_type, cursor_vals=None, limit=None)
+    if export_format == "csv":
+        export_sql = f"""
+            SELECT
+              e.id::text,
+              {sql_timestamp("e.created_at")},
+              e.actor_user_id::text,
+              e.actor_email,
+              e.action,
+              e.entity_type,
+              e.entity_id::text,
+              e.before::text,
+              e.after::text
+            FROM ({export_sql}) e
+            ORDER BY e.created_at DESC, e.id DESC;
+        """
+        media_type = "text/csv"
+    else:
+        export_sql = f"""
+            SELECT {_sql_entry_json("e")}::text
+            FROM ({export_sql}) e
+            ORDER BY e.created_at DESC, e.id DESC;
+        """
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        _stream_export(user_id, tenant_id, export_format, export_sql, params, request_client_keys(request)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="audit-export.{export_format}"'},
+    )
+
+
+_BREAKDOWN_COLUMNS = {"action": "c.action", "entity_type": "c.entity_type", "actor": "c.actor_user_id"}
+
+
+@router.get("/audit/stats", response_model=AuditStats)
+async def audit_stats(
+    ctx: tuple[UUID, UUID] = Depends(require_permission("audit:read")),
+    session: AsyncSession = Depends(get_db_session),
+    since: date | None = Query(default=None),
+    until: date | None = Query(default=None),
+    action: str | None = Query(default=None),
+    entity_type: str | None = Query(default=None),
+    actor_user_id: UUID | None = Query(default=None),
+    breakdown: Literal["action", "entity_type", "actor"] | None = Query(default=None),
+    facet_limit: int = Query(default=20, ge=1, le=100),
+) -> dict:
+    """Daily counts and facets over UTC days, read from ``audit_daily_counts``.
+
+    Defaults to the last 30 days. ``breakdown`` splits the series by action,
+    entity type or actor.
+    """
+    tenant_id, _user_id = ctx
+    until = until or datetime.now(UTC).date()
+    since = since or until - timedelta(days=29)
+    if since > until or (until - since).days > 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "VALIDATION_ERROR", "message": "since must precede until by at most 366 days"},
+        )
+    await set_db_app_context(session, tenant_id=tenant_id)
+
+    where = [
+        "c.tenant_id = :tenant_id",
+        "c.day BETWEEN :since AND :until",
+        "c.day >= (app_audit_retention_cutoff(CAST(:tenant_id AS uuid), CAST(:retention_days AS integer)) AT TIME ZONE 'UTC')::date",
+    ]
+    params: dict[str, object] = {
+        "tenant_id": str(tenant_id),
+        "since": since,
+        "until": until,
+        "retention_days": settings.audit_retention_days,
+    }
+    for column, value in [("action", action), ("entity_type", entity_type), ("actor_user_id", actor_user_id)]:
+        if value is not None:
+            where.append(f"c.{column} = :{column}")
+            params[column] = str(value)
+    series_key = _BREAKDOWN_COLUMNS[breakdown] if breakdown else None
+    series_set = f"(c.day, {series_key})" if series_key else "(c.day)"
+
+    # Every facet and the series in one pass over the rollup; each facet is
+    # cut to its top ``facet_limit`` values before anything leaves the database.
+    rows = (
+        await session.execute(
+            text(
+                f"""
+                WITH grouped AS (
+                  SELECT
+                    GROUPING(c.day) = 0 AS is_series,
+                    GROUPING(c.action) = 0 AS is_action,
+                    GROUPING(c.entity_type) = 0 AS is_entity_type,
+                    GROUPING(c.actor_user_id) = 0 AS is_actor,
+                    c.day,
+                    c.action,
+                    c.entity_type,
+                    c.actor_user_id,
+                    sum(c.count)::bigint AS count
+                  FROM audit_daily_counts c
+                  WHERE {' AND '.join(where)}
+                  GROUP BY GROUPING SETS ({series_set}, (c.action), (c.entity_type), (c.actor_user_id), ())
+                ),
+                ranked AS (
+                  SELECT
+                    g.*,
+                    row_number() OVER (
+                      PARTITION BY g.is_series, g.is_action, g.is_entity_type, g.is_actor
+                      ORDER BY g.count DESC, g.action COLLATE "C", g.entity_type COLLATE "C", g.actor_user_id::text
+                    ) AS rank
+                  FROM grouped g
+                )
+                SELECT
+                  r.is_series,
+                  r.is_action,
+                  r.is_entity_type,
+                  r.is_actor,
+                  r.day,
+                  r.action,
+                  r.entity_type,
+                  r.actor_user_id,
+                  CASE WHEN NOT r.is_series AND r.is_actor THEN app_user_email(r.actor_user_id) END AS actor_email,
+                  r.count
+                FROM ranked r
+                WHERE r.is_series OR r.rank <= :facet_limit;
+                """
+            ),
+            {**params, "facet_limit": facet_limit},
+        )
+    ).mappings().all()
+
+    stats: dict = {
+        "since": since,
+        "until": until,
+        "total": 0,
+        "series": [],
+        "actions": [],
+        "entity_types": [],
+        "actors": [],
+    }
+    for row in rows:
+        if row["is_series"]:
+            key = None
+            if breakdown == "actor":
+                key = str(row["actor_user_id"])
+            elif breakdown:
+                key = row[breakdown]
+            stats["series"].append({"day": row["day"], "key": key, "count": row["count"]})
+        elif row["is_action"]:
+            stats["actions"].append({"value": row["action"], "count": row["count"]})
+        elif row["is_entity_type"]:
+            stats["entity_types"].append({"value": row["entity_type"], "count": row["count"]})
+        elif row["is_actor"]:
+            stats["actors"].append(
+                {"actor_user_id": row["actor_user_id"], "actor_email": row["actor_email"], "count": row["count"]}
+            )
+        else:
+            stats["total"] = row["count"] or 0
+
+    stats["series"].sort(key=lambda point: (point["day"], point["key"] or ""))
+    stats["actions"].sort(key=lambda item: (-item["count"], item["value"]))
+    stats["entity_types"].sort(key=lambda item: (-item["count"], item["value"]))
+    stats["actors"].sort(key=lambda item: (-item["count"], str(item["actor_user_id"])))
+    return stats
+
+
+@router.put("/audit/retention", response_model=AuditRetention)
+async def update_audit_retention(
+    body: AuditRetention,
+    ctx: tuple[UUID, UUID] = Depends(require_permission("audit:manage")),
+    session: AsyncSession = Depends(get_db_session),
+) -> dict:
+    tenant_id, actor_user_id = ctx
+    await set_db_app_context(session, tenant_id=tenant_id)
+
+    before = (
+        await session.execute(
+            text(
+                """
+                UPDATE tenants t
+                SET audit_retention_days = :days, updated_at = now()
+                FROM (SELECT audit_retention_days FROM tenants WHERE id = :tenant_id FOR UPDATE) old
+                WHERE t.id = :tenant_id
+                RETURNING old.audit_retention_days;
+                """
+            ),
+            {"tenant_id": str(tenant_id), "days": body.days},
+        )
+    ).scalar_one()
+    await enqueue_audit(
+        session,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        action="audit.retention_updated",
+        entity_type="tenant",
+        entity_id=tenant_id,
+        before={"days": before},
+        after={"days": body.days},
+    )
+    return {"days": body.days}
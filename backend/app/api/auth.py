@@ -2,20 +2,22 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.etag import is_not_modified, make_etag, not_modified_response, set_etag, user_state_version
+from app.api.schemas import TenantOut, TenantSummaryOut, UserOut
 from app.auth.deps import get_bearer_token, get_current_user_id
 from app.auth.jwt import create_access_token
-from app.auth.password import hash_password, verify_password
+from app.auth.password import password_hasher
 from app.db.context import set_db_app_context
-from app.db.session import get_db_session
+from app.db.session import DbSessionRoute, get_db_session, release_db_session
 from app.settings import settings
 
 
-router = APIRouter()
+router = APIRouter(route_class=DbSessionRoute)
 
 
 class BootstrapRequest(BaseModel):
@@ -30,14 +32,33 @@ class LoginRequest(BaseModel):
     password: str
 
 
-class TenantOut(BaseModel):
-    id: UUID
-    name: str
-    slug: str
-    role: dict
+class BootstrapResponse(BaseModel):
+    token: str
+    user: UserOut
+    tenant: TenantSummaryOut
 
 
-@router.post("/auth/bootstrap")
+class LoginResponse(BaseModel):
+    token: str
+    user: UserOut
+    tenants: list[TenantOut]
+
+
+class MeResponse(BaseModel):
+    user: UserOut
+    tenants: list[TenantOut]
+
+
+async def _require_no_users(session: AsyncSession) -> None:
+    users_count = (await session.execute(text("SELECT app_users_count() AS n;"))).scalar_one()
+    if users_count > 0:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"code": "FORBIDDEN", "message": "Bootstrap not allowed (users already exist)"},
+        )
+
+
+@router.post("/auth/bootstrap", response_model=BootstrapResponse)
 async def bootstrap(
     body: BootstrapRequest,
     session: AsyncSession = Depends(get_db_session),
@@ -50,16 +71,17 @@ async def bootstrap(
                 detail={"code": "FORBIDDEN", "message": "Invalid bootstrap token"},
             )
     else:
-        users_count = (
-            await session.execute(text("SELECT app_users_count() AS n;"))
-        ).scalar_one()
-        if users_count > 0:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail={"code": "FORBIDDEN", "message": "Bootstrap not allowed (users already exist)"},
-            )
-
-    password_hash = hash_password(body.password)
+        await _require_no_users(session)
+        await release_db_session(session)
+
+    password_hash = await password_hasher.hash(body.password)
+    if not settings.bootstrap_token:
+        # Checked again now that the connection is back, under a lock held
+        # until this transaction commits, so concurrent first boots create a
+        # single owner. Separate statements: the count must be read after the
+        # lock is granted.
+        await session.execute(text("SELECT pg_advisory_xact_lock(hashtext('app_bootstrap'));"))
+        await _require_no_users(session)
     row = (
         await session.execute(
             text(
@@ -68,7 +90,7 @@ async def bootstrap(
                 FROM app_bootstrap(
                   :tenant_name,
                   :tenant_slug,
-                  :email::citext,
+                  CAST(:email AS citext),
                   :password_hash
                 );
                 """
@@ -87,8 +109,7 @@ async def bootstrap(
             detail={"code": "INTERNAL", "message": "Bootstrap failed"},
         )
 
-    user_id = UUID(str(row.user_id))
-    tenant_id = UUID(str(row.tenant_id))
+    user_id, tenant_id = row.user_id, row.tenant_id
     await set_db_app_context(session, user_id=user_id, tenant_id=tenant_id)
 
     token = create_access_token(user_id=user_id)
@@ -105,23 +126,25 @@ async def bootstrap(
         )
     ).mappings().first()
 
-    return {"token": token, "user": dict(user), "tenant": dict(tenant)}
+    return {"token": token, "user": user, "tenant": tenant}
 
 
-@router.post("/auth/login")
+@router.post("/auth/login", response_model=LoginResponse)
 async def login(body: LoginRequest, session: AsyncSession = Depends(get_db_session)) -> dict:
     row = (
         await session.execute(
             text(
                 """
                 SELECT id, email, password_hash, is_active
-                FROM app_get_user_for_login(:email::citext);
+                FROM app_get_user_for_login(CAST(:email AS citext));
                 """
             ),
             {"email": str(body.email)},
         )
     ).mappings().first()
-    if not row or not verify_password(body.password, row["password_hash"]):
+    # No connection held while bcrypt runs.
+    await release_db_session(session)
+    if not row or not await password_hasher.verify(body.password, row["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"code": "UNAUTHORIZED", "message": "Invalid credentials"},
@@ -132,7 +155,7 @@ async def login(body: LoginRequest, session: AsyncSession = Depends(get_db_sessi
             detail={"code": "FORBIDDEN", "message": "Inactive user"},
         )
 
-    user_id = UUID(str(row["id"]))
+    user_id = row["id"]
     await set_db_app_context(session, user_id=user_id)
     token = create_access_token(user_id=user_id)
 
@@ -156,26 +179,27 @@ async def login(body: LoginRequest, session: AsyncSession = Depends(get_db_sessi
 
     return {
         "token": token,
-        "user": {"id": str(user_id), "email": row["email"]},
+        "user": {"id": user_id, "email": row["email"]},
         "tenants": [
-            {
-                "id": UUID(str(t["id"])),
-                "name": t["name"],
-                "slug": t["slug"],
-                "role": {"id": UUID(str(t["role_id"])), "name": t["role_name"]},
-            }
+            {"id": t["id"], "name": t["name"], "slug": t["slug"], "role": {"id": t["role_id"], "name": t["role_name"]}}
             for t in tenants
         ],
     }
 
 
-@router.get("/auth/me")
+@router.get("/auth/me", response_model=MeResponse)
 async def me(
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_db_session),
     user_id: UUID = Depends(get_current_user_id),
     _token: str = Depends(get_bearer_token),
-) -> dict:
+) -> dict | Response:
     await set_db_app_context(session, user_id=user_id)
+    etag = make_etag("me", user_id, await user_state_version(session, user_id))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
     user = (
         await session.execute(
             text("SELECT id, email::text AS email FROM users WHERE id = :id;"),
@@ -202,14 +226,9 @@ async def me(
     ).mappings().all()
 
     return {
-        "user": dict(user),
+        "user": user,
         "tenants": [
-            {
-                "id": UUID(str(t["id"])),
-                "name": t["name"],
-                "slug": t["slug"],
-                "role": {"id": UUID(str(t["role_id"])), "name": t["role_name"]},
-            }
+            {"id": t["id"], "name": t["name"], "slug": t["slug"], "role": {"id": t["role_id"], "name": t["role_name"]}}
             for t in tenants
         ],
     }
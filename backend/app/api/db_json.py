@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from fastapi import Response
+from sqlalchemy import TextClause
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def sql_timestamp(expr: str) -> str:
+    """ISO-8601 UTC rendering of a timestamptz, stable regardless of the session TimeZone."""
+    return f"""to_char({expr} AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"')"""
+
+
+def sql_keyset_cursor(created_at_expr: str, id_expr: str) -> str:
+    """SQL equivalent of the API's urlsafe-base64 ``{"created_at", "id"}`` cursor."""
+    # Byte-identical to json.dumps({"created_at": ..., "id": ...}) in app/api/pagination.py.
+    document = f"""format('{{"created_at": "%s", "id": "%s"}}', {sql_timestamp(created_at_expr)}, {id_expr})"""
+    return f"translate(encode(convert_to({document}, 'UTF8'), 'base64'), E'+/\\n', '-_')"
+
+
+async def fetch_json_response(
+    session: AsyncSession,
+    statement: TextClause,
+    params: dict[str, object],
+    *,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """Run a statement returning one ``text`` JSON document and pass its bytes through.
+
+    The document must be cast to ``text`` in SQL: a ``json`` value would be
+    decoded into Python objects by the driver.
+    """
+    body = (await session.execute(statement, params)).scalar_one()
+    return Response(content=body.encode(), media_type="application/json", headers=headers)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import hashlib
+from uuid import UUID
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def make_etag(*parts: object) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    # Always revalidate: the body is per-user/per-tenant and must never be served stale.
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization, X-Tenant-ID"}
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers.update(cache_headers(etag))
+
+
+async def tenant_state_version(session: AsyncSession, tenant_id: UUID) -> int:
+    return (
+        await session.execute(text("SELECT app_tenant_version(:tenant_id);"), {"tenant_id": str(tenant_id)})
+    ).scalar_one()
+
+
+async def user_state_version(session: AsyncSession, user_id: UUID) -> str:
+    return (
+        await session.execute(text("SELECT app_user_state_version(:user_id);"), {"user_id": str(user_id)})
+    ).scalar_one()
@@ -1,10 +1,56 @@
-from fastapi import APIRouter
+import hmac
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy import text
+
+from app.auth.cache import auth_context_cache
+from app.auth.jwt import verified_token_cache
+from app.db.engine import get_async_engine
+from app.db.pool import pool_stats
+from app.db.replicas import replica_router
+from app.db.session import request_hold_seconds
+from app.settings import settings
 
 
 router = APIRouter()
 
 
+def require_internal_token(x_internal_token: str | None = Header(default=None, alias="X-Internal-Token")) -> None:
+    """Internal state is only served with ``X-Internal-Token``, or to anyone in
+    local/dev when ``INTERNAL_TOKEN`` is unset; otherwise the route does not exist."""
+    if settings.internal_token:
+        allowed = x_internal_token is not None and hmac.compare_digest(x_internal_token, settings.internal_token)
+    else:
+        allowed = settings.environment in {"local", "dev"}
+    if not allowed:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "Not found"})
+
+
 @router.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
+
+@router.get("/health/caches", dependencies=[Depends(require_internal_token)])
+def health_caches() -> dict[str, dict]:
+    return {"auth_context": auth_context_cache.stats(), "verified_jwt": verified_token_cache.stats()}
+
+
+@router.get("/health/pool", dependencies=[Depends(require_internal_token)])
+def health_pool() -> dict:
+    return {**pool_stats(get_async_engine().sync_engine), "request_hold_seconds": request_hold_seconds.snapshot()}
+
+
+@router.get("/health/replicas", dependencies=[Depends(require_internal_token)])
+def health_replicas() -> dict:
+    return replica_router.stats()
+
+
+@router.get("/health/audit", dependencies=[Depends(require_internal_token)])
+async def health_audit() -> dict[str, int | float]:
+    # Entries written by requests but not yet visible in /audit.
+    async with get_async_engine().connect() as conn:
+        pending, oldest = (await conn.execute(text("SELECT pending, oldest_created_at FROM app_audit_outbox_lag();"))).one()
+    lag = (datetime.now(UTC) - oldest).total_seconds() if oldest else 0.0
+    return {"pending": pending, "lag_seconds": lag}
@@ -1,20 +1,35 @@
 from __future__ import annotations
 
+from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-import json
 
+from app.api.db_json import fetch_json_response, sql_keyset_cursor, sql_timestamp
+from app.api.etag import (
+    cache_headers,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    set_etag,
+    tenant_state_version,
+)
+from app.api.pagination import decode_cursor, encode_cursor, escape_like
+from app.audit import enqueue_audit
 from app.auth.deps import require_permission
-from app.auth.password import hash_password
+from app.auth.password import password_hasher
 from app.db.context import set_db_app_context
-from app.db.session import get_db_session
+from app.db.session import DbSessionRoute, get_db_session, release_db_session
+from app.member_import import ImportFormat, parse_member_import
+from app.settings import settings
+from app.worker import import_members as import_members_task
 
 
-router = APIRouter()
+router = APIRouter(route_class=DbSessionRoute)
 
 
 class CreateMemberRequest(BaseModel):
@@ -23,37 +38,220 @@ class CreateMemberRequest(BaseModel):
     role_id: UUID
 
 
-@router.get("/members")
+class MemberOut(BaseModel):
+    id: UUID
+    user_id: UUID
+    email: str
+    role_id: UUID
+    role_name: str
+    created_at: datetime
+
+
+class MembersPage(BaseModel):
+    items: list[MemberOut]
+    next_cursor: str | None
+    # Exact when the first page holds every match, a planner estimate otherwise.
+    total_estimate: int
+
+
+class CreatedMemberOut(BaseModel):
+    id: UUID
+    user_id: UUID
+    role_id: UUID
+
+
+class MemberImportJobOut(BaseModel):
+    id: UUID
+    status: Literal["queued", "running", "succeeded", "failed"]
+    total: int
+    processed: int
+    created: int
+    existing: int
+    failed: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+class MemberImportRowOut(BaseModel):
+    line: int
+    email: str
+    status: Literal["created", "existing", "failed"]
+    error: str | None
+    user_id: UUID | None
+    membership_id: UUID | None
+
+
+class MemberImportRowsPage(BaseModel):
+    items: list[MemberImportRowOut]
+    next_cursor: int | None
+
+
+def _members_query(
+    tenant_id: UUID,
+    *,
+    email_prefix: str | None,
+    role_id: UUID | None,
+    cursor_vals: tuple[datetime, UUID] | None,
+    limit: int,
+) -> tuple[str, dict[str, object]]:
+    """SQL and parameters selecting one page of matching memberships, newest first."""
+    params: dict[str, object] = {
+        "tenant_id": str(tenant_id),
+        "limit": limit,
+        "email_pattern": f"{escape_like(email_prefix.lower())}%" if email_prefix else None,
+        "role_id": str(role_id) if role_id else None,
+    }
+    if email_prefix:
+        # Prefix searches go through a SECURITY DEFINER helper so the trigram
+        # index is usable despite RLS (see migration 20261018_0013).
+        params.update(
+            cursor_created_at=cursor_vals[0] if cursor_vals else None,
+            cursor_id=str(cursor_vals[1]) if cursor_vals else None,
+        )
+        return (
+            """
+            SELECT m.*
+            FROM app_search_memberships(
+              CAST(:email_pattern AS text),
+              CAST(:role_id AS uuid),
+              CAST(:cursor_created_at AS timestamptz),
+              CAST(:cursor_id AS uuid),
+              CAST(:limit AS integer)
+            ) m
+            WHERE m.tenant_id = :tenant_id
+            """,
+            params,
+        )
+
+    where = ["m.tenant_id = :tenant_id"]
+    if role_id:
+        where.append("m.role_id = :role_id")
+    if cursor_vals:
+        where.append("(m.created_at, m.id) < (:cursor_created_at, :cursor_id)")
+        params["cursor_created_at"], params["cursor_id"] = cursor_vals[0], str(cursor_vals[1])
+    return (
+        f"""
+        SELECT m.*
+        FROM memberships m
+        WHERE {' AND '.join(where)}
+        ORDER BY m.created_at DESC, m.id DESC
+        LIMIT :limit
+        """,
+        params,
+    )
+
+
+# A first page that is not full holds every match; otherwise the planner's
+# estimate (see app_estimate_memberships) stands in for a count.
+_SQL_TOTAL_ESTIMATE = """
+    CASE
+      WHEN NOT CAST(:paged AS boolean) AND count(*) < :limit THEN count(*)
+      ELSE GREATEST(app_estimate_memberships(CAST(:email_pattern AS text), CAST(:role_id AS uuid)), count(*))
+    END
+"""
+
+
+@router.get("/members", response_model=MembersPage)
 async def list_members(
+    request: Request,
+    response: Response,
+    email_prefix: str | None = Query(default=None, min_length=1),
+    role_id: UUID | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = Query(default=None),
     ctx: tuple[UUID, UUID] = Depends(require_permission("members:read")),
     session: AsyncSession = Depends(get_db_session),
-) -> list[dict]:
+) -> dict | Response:
     tenant_id, _user_id = ctx
     await set_db_app_context(session, tenant_id=tenant_id)
+    etag = make_etag(
+        "members", tenant_id, await tenant_state_version(session, tenant_id), email_prefix, role_id, limit, cursor
+    )
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    page_sql, params = _members_query(
+        tenant_id,
+        email_prefix=email_prefix,
+        role_id=role_id,
+        cursor_vals=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+    )
+    params["paged"] = cursor is not None
+    if settings.db_render_json:
+        return await fetch_json_response(
+            session,
+            text(
+                f"""
+                WITH page AS (
+                  SELECT m.id, m.user_id, m.email, m.role_id, r.name AS role_name, m.created_at
+                  FROM ({page_sql}) m
+                  JOIN roles r ON r.id = m.role_id
+                )
+                SELECT json_build_object(
+                  'items', COALESCE(
+                    json_agg(
+                      json_build_object(
+                        'id', p.id,
+                        'user_id', p.user_id,
+                        'email', p.email,
+                        'role_id', p.role_id,
+                        'role_name', p.role_name,
+                        'created_at', {sql_timestamp("p.created_at")}
+                      )
+                      ORDER BY p.created_at DESC, p.id DESC
+                    ),
+                    '[]'::json
+                  ),
+                  'next_cursor', CASE WHEN count(*) = :limit THEN (
+                    SELECT {sql_keyset_cursor("l.created_at", "l.id")}
+                    FROM page l
+                    ORDER BY l.created_at ASC, l.id ASC
+                    LIMIT 1
+                  ) END,
+                  'total_estimate', {_SQL_TOTAL_ESTIMATE}
+                )::text
+                FROM page p;
+                """
+            ),
+            params,
+            headers=cache_headers(etag),
+        )
+
+    set_etag(response, etag)
     rows = (
         await session.execute(
             text(
-                """
-                SELECT
-                  m.id,
-                  m.user_id,
-                  app_user_email(m.user_id) AS email,
-                  r.id AS role_id,
-                  r.name AS role_name,
-                  m.created_at
-                FROM memberships m
+                f"""
+                SELECT m.id, m.user_id, m.email, m.role_id, r.name AS role_name, m.created_at
+                FROM ({page_sql}) m
                 JOIN roles r ON r.id = m.role_id
-                WHERE m.tenant_id = :tenant_id
-                ORDER BY m.created_at DESC;
+                ORDER BY m.created_at DESC, m.id DESC;
                 """
             ),
-            {"tenant_id": str(tenant_id)},
+            params,
         )
     ).mappings().all()
-    return [dict(r) for r in rows]
+
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    if cursor is None and len(rows) < limit:
+        total_estimate = len(rows)
+    else:
+        estimate = (
+            await session.execute(
+                text("SELECT app_estimate_memberships(CAST(:email_pattern AS text), CAST(:role_id AS uuid));"),
+                params,
+            )
+        ).scalar_one()
+        total_estimate = max(estimate, len(rows))
+    return {"items": rows, "next_cursor": next_cursor, "total_estimate": total_estimate}
 
 
-@router.post("/members", status_code=201)
+@router.post("/members", status_code=201, response_model=CreatedMemberOut)
 async def create_member(
     ctx: tuple[UUID, UUID] = Depends(require_permission("members:write")),
     session: AsyncSession = Depends(get_db_session),
@@ -66,14 +264,35 @@ async def create_member(
         )
 
     tenant_id, actor_user_id = ctx
-    await set_db_app_context(session, tenant_id=tenant_id)
+    # No connection held while bcrypt runs; the context is bound again after.
+    await release_db_session(session)
+    password_hash = await password_hasher.hash(body.password)
+    await set_db_app_context(session, user_id=actor_user_id, tenant_id=tenant_id)
 
+    # Binding only re-verifies membership: the permission checked on entry is
+    # checked again, in case the actor's role changed while bcrypt ran.
     user_id = (
         await session.execute(
-            text("SELECT app_upsert_user(:email::citext, :password_hash) AS id;"),
-            {"email": str(body.email), "password_hash": hash_password(body.password)},
+            text(
+                """
+                SELECT app_upsert_user(CAST(:email AS citext), :password_hash) AS id
+                FROM app_resolve_auth_context(CAST(:actor_user_id AS uuid), CAST(:tenant_id AS uuid)) a
+                WHERE a.is_active AND 'members:write' = ANY (a.permission_codes);
+                """
+            ),
+            {
+                "email": str(body.email),
+                "password_hash": password_hash,
+                "actor_user_id": str(actor_user_id),
+                "tenant_id": str(tenant_id),
+            },
+        )
+    ).scalar_one_or_none()
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"code": "FORBIDDEN", "message": "Missing permission: members:write"},
         )
-    ).scalar_one()
 
     exists = (
         await session.execute(
@@ -102,24 +321,155 @@ async def create_member(
         )
     ).scalar_one()
 
-    await session.execute(
-        text(
-            """
-            INSERT INTO audit_log (tenant_id, actor_user_id, action, entity_type, entity_id, before, after)
-            VALUES (:tenant_id, :actor_user_id, 'member.created', 'membership', :entity_id, NULL, :after_json::jsonb);
-            """
-        ),
-        {
-            "tenant_id": str(tenant_id),
-            "actor_user_id": str(actor_user_id),
-            "entity_id": str(membership_id),
-            "after_json": json.dumps({
-                "membership_id": str(membership_id),
-                "user_id": str(user_id),
-                "email": str(body.email),
-                "role_id": str(body.role_id),
-            }),
+    await enqueue_audit(
+        session,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        action="member.created",
+        entity_type="membership",
+        entity_id=membership_id,
+        after={
+            "membership_id": membership_id,
+            "user_id": user_id,
+            "email": str(body.email),
+            "role_id": body.role_id,
         },
     )
 
     return {"id": membership_id, "user_id": user_id, "role_id": body.role_id}
+
+
+_JOB_COLUMNS = "id, status, total, processed, created, existing, failed, error, created_at, started_at, finished_at"
+
+
+@router.post("/members/import", status_code=202, response_model=MemberImportJobOut)
+async def import_members(
+    request: Request,
+    import_format: ImportFormat = Query(default="ndjson", alias="format"),
+    ctx: tuple[UUID, UUID] = Depends(require_permission("members:write")),
+    session: AsyncSession = Depends(get_db_session),
+) -> dict:
+    tenant_id, actor_user_id = ctx
+    try:
+        rows = parse_member_import(await request.body(), import_format)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "VALIDATION_ERROR", "message": str(exc)},
+        ) from exc
+    if not rows or len(rows) > settings.member_import_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "code": "VALIDATION_ERROR",
+                "message": f"An import must contain between 1 and {settings.member_import_max_rows} members",
+            },
+        )
+
+    await set_db_app_context(session, tenant_id=tenant_id)
+    # The upload waits in the unlogged member_import_pending table until the
+    # worker imports it, so passwords never go through the broker or the WAL.
+    job = (
+        await session.execute(
+            text(
+                f"""
+                WITH job AS (
+                  INSERT INTO member_import_jobs (tenant_id, actor_user_id, total)
+                  VALUES (:tenant_id, :actor_user_id, :total)
+                  RETURNING {_JOB_COLUMNS}
+                ),
+                pending AS (
+                  INSERT INTO member_import_pending (job_id, line, tenant_id, email, password, role_id)
+                  SELECT job.id, u.line, CAST(:tenant_id AS uuid), u.email, u.password, u.role_id
+                  FROM job, unnest(
+                    CAST(:lines AS integer[]), CAST(:emails AS text[]), CAST(:passwords AS text[]), CAST(:role_ids AS uuid[])
+                  ) AS u(line, email, password, role_id)
+                )
+                SELECT {_JOB_COLUMNS} FROM job;
+                """
+            ),
+            {
+                "tenant_id": str(tenant_id),
+                "actor_user_id": str(actor_user_id),
+                "total": len(rows),
+                "lines": [line for line, _ in rows],
+                "emails": [str(row.email) for _, row in rows],
+                "passwords": [row.password for _, row in rows],
+                "role_ids": [str(row.role_id) for _, row in rows],
+            },
+        )
+    ).mappings().one()
+    # The worker looks the job up on its own connection.
+    await session.commit()
+
+    import_members_task.delay(str(job["id"]), str(tenant_id), str(actor_user_id))
+    return job
+
+
+@router.get("/members/import/{job_id}", response_model=MemberImportJobOut)
+async def get_member_import(
+    job_id: UUID = Path(...),
+    ctx: tuple[UUID, UUID] = Depends(require_permission("members:read")),
+    session: AsyncSession = Depends(get_db_session),
+) -> dict:
+    tenant_id, _user_id = ctx
+    await set_db_app_context(session, tenant_id=tenant_id)
+    job = (
+        await session.execute(
+            text(f"SELECT {_JOB_COLUMNS} FROM member_import_jobs WHERE tenant_id = :tenant_id AND id = :job_id;"),
+            {"tenant_id": str(tenant_id), "job_id": str(job_id)},
+        )
+    ).mappings().first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "Import not found"},
+        )
+    return job
+
+
+@router.get("/members/import/{job_id}/rows", response_model=MemberImportRowsPage)
+async def list_member_import_rows(
+    job_id: UUID = Path(...),
+    row_status: Literal["created", "existing", "failed"] | None = Query(default=None, alias="status"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: int | None = Query(default=None, description="line of the last row of the previous page"),
+    ctx: tuple[UUID, UUID] = Depends(require_permission("members:read")),
+    session: AsyncSession = Depends(get_db_session),
+) -> dict:
+    tenant_id, _user_id = ctx
+    await set_db_app_context(session, tenant_id=tenant_id)
+    rows = (
+        await session.execute(
+            text(
+                """
+                SELECT line, email, status, error, user_id, membership_id
+                FROM member_import_rows
+                WHERE tenant_id = :tenant_id
+                  AND job_id = :job_id
+                  AND (CAST(:status AS text) IS NULL OR status = :status)
+                  AND line > COALESCE(CAST(:cursor AS integer), 0)
+                ORDER BY line
+                LIMIT :limit;
+                """
+            ),
+            {
+                "tenant_id": str(tenant_id),
+                "job_id": str(job_id),
+                "status": row_status,
+                "cursor": cursor,
+                "limit": limit,
+            },
+        )
+    ).mappings().all()
+    if not rows and not (
+        await session.execute(
+            text("SELECT 1 FROM member_import_jobs WHERE tenant_id = :tenant_id AND id = :job_id;"),
+            {"tenant_id": str(tenant_id), "job_id": str(job_id)},
+        )
+    ).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "Import not found"},
+        )
+    return {"items": rows, "next_cursor": rows[-1]["line"] if len(rows) == limit else None}
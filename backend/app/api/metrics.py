@@ -0,0 +1,58 @@
+from collections.abc import Iterator
+from functools import lru_cache
+
+import redis.asyncio as redis
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from app.api.health import require_internal_token
+from app.metrics import render_metrics
+from app.settings import settings
+from app.worker import celery_app
+
+
+router = APIRouter()
+
+
+@lru_cache(maxsize=1)
+def get_broker_client() -> redis.Redis:
+    """Shared by every scrape; the app's lifespan closes its connections."""
+    return redis.from_url(settings.redis_url, socket_connect_timeout=1, socket_timeout=1)
+
+
+async def celery_queue_depths() -> dict[str, int] | None:
+    """Messages waiting in each Celery queue (Redis lists named after the
+    queues); None when the broker is unreachable."""
+    queues = sorted({celery_app.conf.task_default_queue, *(q.name for q in celery_app.conf.task_queues or ())})
+    try:
+        async with get_broker_client().pipeline(transaction=False) as pipe:
+            for queue in queues:
+                pipe.llen(queue)
+            lengths = await pipe.execute()
+    except (redis.RedisError, OSError):
+        return None
+    return dict(zip(queues, lengths))
+
+
+class _BrokerCollector(Collector):
+    """Broker state read for one scrape; not stored, so not aggregated per worker."""
+
+    def __init__(self, depths: dict[str, int] | None) -> None:
+        self.depths = depths
+
+    def collect(self) -> Iterator[Metric]:
+        up = int(self.depths is not None)
+        yield GaugeMetricFamily("celery_broker_up", "Whether the Celery broker answered.", value=up)
+        queue_length = GaugeMetricFamily("celery_queue_length", "Tasks waiting in a Celery queue.", labels=("queue",))
+        for queue, depth in (self.depths or {}).items():
+            queue_length.add_metric((queue,), depth)
+        yield queue_length
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_internal_token)])
+async def metrics() -> Response:
+    broker = CollectorRegistry()
+    broker.register(_BrokerCollector(await celery_queue_depths()))
+    return Response(render_metrics(broker), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Opaque keyset cursor over ``(created_at DESC, id DESC)``."""
+    data = {"created_at": created_at.isoformat(timespec="microseconds"), "id": str(row_id)}
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID] | None:
+    """Inverse of ``encode_cursor``; a cursor it did not produce is a 400."""
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return datetime.fromisoformat(data["created_at"]), UUID(data["id"])
+    except (ValueError, KeyError, TypeError, AttributeError, binascii.Error) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "VALIDATION_ERROR", "message": "Invalid cursor"},
+        ) from exc
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -1,19 +1,31 @@
 from __future__ import annotations
 
-import json
+from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status
 from pydantic import BaseModel
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.db_json import fetch_json_response, sql_timestamp
+from app.api.etag import (
+    cache_headers,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    set_etag,
+    tenant_state_version,
+)
+from app.audit import sql_enqueue_audit
 from app.auth.deps import get_current_user_id, require_permission
+from app.auth.permissions import current_permission_catalog
 from app.db.context import set_db_app_context
-from app.db.session import get_db_session
+from app.db.session import DbSessionRoute, get_db_session
+from app.settings import settings
 
 
-router = APIRouter()
+router = APIRouter(route_class=DbSessionRoute)
 
 
 class CreateRoleRequest(BaseModel):
@@ -26,23 +38,71 @@ class UpdateRoleRequest(BaseModel):
     permission_codes: list[str] | None = None
 
 
-@router.get("/permissions")
-async def list_permissions(
-    session: AsyncSession = Depends(get_db_session),
-    user_id: UUID = Depends(get_current_user_id),
-) -> list[dict]:
-    await set_db_app_context(session, user_id=user_id)
-    rows = (await session.execute(text("SELECT code, description FROM permissions ORDER BY code ASC;"))).mappings().all()
-    return [dict(r) for r in rows]
+class PermissionOut(BaseModel):
+    code: str
+    description: str | None
+
+
+class RoleOut(BaseModel):
+    id: UUID
+    name: str
+    is_system: bool
+    created_at: datetime
+    permission_codes: list[str]
+
+
+@router.get("/permissions", response_model=list[PermissionOut])
+async def list_permissions(request: Request, _user_id: UUID = Depends(get_current_user_id)) -> Response:
+    # Served from the in-memory snapshot: no SQL beyond authentication.
+    catalog = await current_permission_catalog()
+    if is_not_modified(request, catalog.etag):
+        return not_modified_response(catalog.etag)
+    return Response(content=catalog.body, media_type="application/json", headers=cache_headers(catalog.etag))
 
 
-@router.get("/roles")
+@router.get("/roles", response_model=list[RoleOut])
 async def list_roles(
+    request: Request,
+    response: Response,
     ctx: tuple[UUID, UUID] = Depends(require_permission("roles:read")),
     session: AsyncSession = Depends(get_db_session),
-) -> list[dict]:
+) -> list[dict] | Response:
     tenant_id, _user_id = ctx
     await set_db_app_context(session, tenant_id=tenant_id)
+    etag = make_etag("roles", tenant_id, await tenant_state_version(session, tenant_id))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    if settings.db_render_json:
+        return await fetch_json_response(
+            session,
+            text(
+                f"""
+                SELECT COALESCE(
+                  json_agg(
+                    json_build_object(
+                      'id', r.id,
+                      'name', r.name,
+                      'is_system', r.is_system,
+                      'created_at', {sql_timestamp("r.created_at")},
+                      'permission_codes', COALESCE(
+                        (SELECT array_agg(rp.permission_code ORDER BY rp.permission_code)
+                         FROM role_permissions rp
+                         WHERE rp.role_id = r.id),
+                        ARRAY[]::text[]
+                      )
+                    )
+                    ORDER BY r.is_system DESC, r.name ASC
+                  ),
+                  '[]'::json
+                )::text
+                FROM roles r
+                WHERE r.tenant_id = :tenant_id;
+                """
+            ),
+            {"tenant_id": str(tenant_id)},
+            headers=cache_headers(etag),
+        )
+    set_etag(response, etag)
     rows = (
         await session.execute(
             text(
@@ -64,10 +124,50 @@ async def list_roles(
             {"tenant_id": str(tenant_id)},
         )
     ).mappings().all()
-    return [dict(r) for r in rows]
+    return rows
+
+
+_ROLE_CREATED_AUDIT = sql_enqueue_audit(
+    """
+    SELECT role.tenant_id, CAST(:actor_user_id AS uuid), 'role.created', 'role', role.id, NULL::json,
+           json_build_object('id', role.id, 'name', role.name, 'permission_codes', CAST(:permission_codes AS text[]))
+    FROM role
+    """
+)
+
+_CREATE_ROLE_SQL = text(
+    f"""
+    WITH role AS (
+      INSERT INTO roles (tenant_id, name, is_system)
+      VALUES (:tenant_id, :name, false)
+      RETURNING id, tenant_id, name, is_system, created_at
+    ),
+    codes AS (
+      SELECT DISTINCT code FROM unnest(CAST(:permission_codes AS text[])) AS c(code)
+    ),
+    granted AS (
+      INSERT INTO role_permissions (role_id, permission_code, tenant_id)
+      SELECT role.id, codes.code, role.tenant_id
+      FROM role, codes
+      ORDER BY codes.code
+      RETURNING permission_code
+    ),
+    audit AS (
+      {_ROLE_CREATED_AUDIT}
+    )
+    SELECT
+      role.id,
+      role.name,
+      role.is_system,
+      role.created_at,
+      COALESCE((SELECT array_agg(g.permission_code ORDER BY g.permission_code) FROM granted g), ARRAY[]::text[])
+        AS permission_codes
+    FROM role;
+    """
+)
 
 
-@router.post("/roles", status_code=201)
+@router.post("/roles", status_code=201, response_model=RoleOut)
 async def create_role(
     ctx: tuple[UUID, UUID] = Depends(require_permission("roles:write")),
     session: AsyncSession = Depends(get_db_session),
@@ -81,72 +181,106 @@ async def create_role(
     tenant_id, actor_user_id = ctx
     await set_db_app_context(session, tenant_id=tenant_id)
 
-    role = (
+    # Role, grants and audit entry in one round-trip.
+    return (
         await session.execute(
-            text(
-                """
-                INSERT INTO roles (tenant_id, name, is_system)
-                VALUES (:tenant_id, :name, false)
-                RETURNING id, tenant_id, name, is_system;
-                """
-            ),
-            {"tenant_id": str(tenant_id), "name": body.name},
+            _CREATE_ROLE_SQL,
+            {
+                "tenant_id": str(tenant_id),
+                "actor_user_id": str(actor_user_id),
+                "name": body.name,
+                "permission_codes": body.permission_codes,
+            },
         )
-    ).mappings().first()
+    ).mappings().one()
 
-    for code in body.permission_codes:
-        await session.execute(
-            text(
-                """
-                INSERT INTO role_permissions (role_id, permission_code, tenant_id)
-                VALUES (:role_id, :permission_code, :tenant_id)
-                ON CONFLICT (role_id, permission_code) DO NOTHING;
-                """
-            ),
-            {"role_id": str(role["id"]), "permission_code": code, "tenant_id": str(tenant_id)},
-        )
 
-    created = (
-        await session.execute(
-            text(
-                """
-                SELECT
-                  r.id,
-                  r.name,
-                  r.is_system,
-                  r.created_at,
-                  COALESCE(array_agg(rp.permission_code ORDER BY rp.permission_code)
-                           FILTER (WHERE rp.permission_code IS NOT NULL), ARRAY[]::text[]) AS permission_codes
-                FROM roles r
-                LEFT JOIN role_permissions rp ON rp.role_id = r.id
-                WHERE r.tenant_id = :tenant_id AND r.id = :role_id
-                GROUP BY r.id;
-                """
-            ),
-            {"tenant_id": str(tenant_id), "role_id": str(role["id"])},
-        )
-    ).mappings().first()
+_ROLE_UPDATED_AUDIT = sql_enqueue_audit(
+    f"""
+    SELECT CAST(:tenant_id AS uuid), CAST(:actor_user_id AS uuid), 'role.updated', 'role', a.id,
+           json_build_object(
+             'role', json_build_object('id', b.id, 'name', b.name, 'is_system', b.is_system),
+             'permission_codes', bc.codes
+           ),
+           json_build_object(
+             'role', json_build_object(
+               'id', a.id,
+               'name', a.name,
+               'is_system', a.is_system,
+               'created_at', {sql_timestamp("a.created_at")},
+               'permission_codes', a.permission_codes
+             ),
+             'permission_codes', a.permission_codes
+           )
+    FROM after a, before_role b, before_codes bc
+    """
+)
 
-    await session.execute(
-        text(
-            """
-            INSERT INTO audit_log (tenant_id, actor_user_id, action, entity_type, entity_id, before, after)
-            VALUES (:tenant_id, :actor_user_id, 'role.created', 'role', :entity_id, NULL, :after_json::jsonb);
-            """
-        ),
-        {
-            "tenant_id": str(tenant_id),
-            "actor_user_id": str(actor_user_id),
-            "entity_id": str(role["id"]),
-            "after_json": json.dumps(
-                {"id": str(role["id"]), "name": role["name"], "permission_codes": body.permission_codes}
-            ),
-        },
+# Every sub-statement of a data-modifying CTE sees the same snapshot, so the
+# resulting codes are derived from the request rather than re-read. Only the
+# codes that change are deleted or inserted.
+_UPDATE_ROLE_SQL = text(
+    f"""
+    WITH before_role AS (
+      SELECT r.id, r.name, r.is_system, r.created_at
+      FROM roles r
+      WHERE r.tenant_id = :tenant_id AND r.id = :role_id
+    ),
+    before_codes AS (
+      SELECT COALESCE(array_agg(rp.permission_code ORDER BY rp.permission_code), ARRAY[]::text[]) AS codes
+      FROM role_permissions rp
+      WHERE rp.tenant_id = :tenant_id AND rp.role_id = :role_id
+    ),
+    desired AS (
+      SELECT DISTINCT code FROM unnest(CAST(:permission_codes AS text[])) AS d(code)
+    ),
+    renamed AS (
+      UPDATE roles r
+      SET name = CAST(:name AS text), updated_at = now()
+      FROM before_role b
+      WHERE r.id = b.id AND CAST(:name AS text) IS NOT NULL
+      RETURNING r.id, r.name
+    ),
+    revoked AS (
+      DELETE FROM role_permissions rp
+      USING before_role b
+      WHERE rp.role_id = b.id
+        AND CAST(:permission_codes AS text[]) IS NOT NULL
+        AND rp.permission_code <> ALL (CAST(:permission_codes AS text[]))
+      RETURNING rp.permission_code
+    ),
+    granted AS (
+      INSERT INTO role_permissions (role_id, permission_code, tenant_id)
+      SELECT b.id, d.code, CAST(:tenant_id AS uuid)
+      FROM before_role b, desired d, before_codes bc
+      WHERE d.code <> ALL (bc.codes)
+      ORDER BY d.code
+      RETURNING permission_code
+    ),
+    after AS (
+      SELECT
+        b.id,
+        COALESCE(n.name, b.name) AS name,
+        b.is_system,
+        b.created_at,
+        CASE
+          WHEN CAST(:permission_codes AS text[]) IS NULL THEN bc.codes
+          ELSE COALESCE((SELECT array_agg(d.code ORDER BY d.code) FROM desired d), ARRAY[]::text[])
+        END AS permission_codes
+      FROM before_role b
+      CROSS JOIN before_codes bc
+      LEFT JOIN renamed n ON n.id = b.id
+    ),
+    audit AS (
+      {_ROLE_UPDATED_AUDIT}
     )
-    return dict(created) if created else dict(role)
+    SELECT a.id, a.name, a.is_system, a.created_at, a.permission_codes
+    FROM after a;
+    """
+)
 
 
-@router.patch("/roles/{role_id}")
+@router.patch("/roles/{role_id}", response_model=RoleOut)
 async def update_role(
     role_id: UUID = Path(...),
     ctx: tuple[UUID, UUID] = Depends(require_permission("roles:write")),
@@ -161,99 +295,33 @@ async def update_role(
 
     tenant_id, actor_user_id = ctx
     await set_db_app_context(session, tenant_id=tenant_id)
+    params = {"tenant_id": str(tenant_id), "role_id": str(role_id)}
 
-    before = (
+    # Serializes concurrent updates of the role. It has to be a statement of
+    # its own: the update below then runs with a snapshot taken after the
+    # lock was granted, so the permission diff starts from the latest state.
+    locked = (
         await session.execute(
-            text(
-                """
-                SELECT id, name, is_system
-                FROM roles
-                WHERE tenant_id = :tenant_id AND id = :role_id;
-                """
-            ),
-            {"tenant_id": str(tenant_id), "role_id": str(role_id)},
+            text("SELECT id FROM roles WHERE tenant_id = :tenant_id AND id = :role_id FOR NO KEY UPDATE;"),
+            params,
         )
-    ).mappings().first()
-    if not before:
+    ).first()
+    after = None
+    if locked:
+        after = (
+            await session.execute(
+                _UPDATE_ROLE_SQL,
+                {
+                    **params,
+                    "actor_user_id": str(actor_user_id),
+                    "name": body.name,
+                    "permission_codes": body.permission_codes,
+                },
+            )
+        ).mappings().first()
+    if not after:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "NOT_FOUND", "message": "Role not found"},
         )
-
-    before_codes = (
-        await session.execute(
-            text(
-                "SELECT permission_code FROM role_permissions WHERE tenant_id = :tenant_id AND role_id = :role_id ORDER BY permission_code ASC;"
-            ),
-            {"tenant_id": str(tenant_id), "role_id": str(role_id)},
-        )
-    ).scalars().all()
-
-    if body.name is not None:
-        await session.execute(
-            text(
-                """
-                UPDATE roles SET name = :name, updated_at = now()
-                WHERE tenant_id = :tenant_id AND id = :role_id;
-                """
-            ),
-            {"tenant_id": str(tenant_id), "role_id": str(role_id), "name": body.name},
-        )
-
-    if body.permission_codes is not None:
-        await session.execute(
-            text("DELETE FROM role_permissions WHERE tenant_id = :tenant_id AND role_id = :role_id;"),
-            {"tenant_id": str(tenant_id), "role_id": str(role_id)},
-        )
-        for code in body.permission_codes:
-            await session.execute(
-                text(
-                    """
-                    INSERT INTO role_permissions (role_id, permission_code, tenant_id)
-                    VALUES (:role_id, :permission_code, :tenant_id)
-                    ON CONFLICT (role_id, permission_code) DO NOTHING;
-                    """
-                ),
-                {"role_id": str(role_id), "permission_code": code, "tenant_id": str(tenant_id)},
-            )
-
-    after = (
-        await session.execute(
-            text(
-                """
-                SELECT
-                  r.id,
-                  r.name,
-                  r.is_system,
-                  r.created_at,
-                  COALESCE(array_agg(rp.permission_code ORDER BY rp.permission_code)
-                           FILTER (WHERE rp.permission_code IS NOT NULL), ARRAY[]::text[]) AS permission_codes
-                FROM roles r
-                LEFT JOIN role_permissions rp ON rp.role_id = r.id
-                WHERE r.tenant_id = :tenant_id AND r.id = :role_id
-                GROUP BY r.id;
-                """
-            ),
-            {"tenant_id": str(tenant_id), "role_id": str(role_id)},
-        )
-    ).mappings().first()
-    after_codes = after["permission_codes"] if after else []
-    after_role = dict(after) if after else {"id": str(role_id), "permission_codes": after_codes}
-
-    await session.execute(
-        text(
-            """
-            INSERT INTO audit_log (tenant_id, actor_user_id, action, entity_type, entity_id, before, after)
-            VALUES (:tenant_id, :actor_user_id, 'role.updated', 'role', :entity_id, :before_json::jsonb, :after_json::jsonb);
-            """
-        ),
-        {
-            "tenant_id": str(tenant_id),
-            "actor_user_id": str(actor_user_id),
-            "entity_id": str(role_id),
-            "before_json": json.dumps({"role": dict(before), "permission_codes": before_codes}),
-            "after_json": json.dumps({"role": after_role, "permission_codes": after_codes}),
-        },
-    )
-
-    return dict(after) if after else after_role
+    return after
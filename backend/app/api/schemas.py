@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class UserOut(BaseModel):
+    id: UUID
+    email: str
+
+
+class RoleRef(BaseModel):
+    id: UUID
+    name: str
+
+
+class TenantSummaryOut(BaseModel):
+    id: UUID
+    name: str
+    slug: str
+
+
+class TenantOut(TenantSummaryOut):
+    role: RoleRef
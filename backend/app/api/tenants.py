@@ -2,24 +2,32 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.etag import is_not_modified, make_etag, not_modified_response, set_etag, user_state_version
+from app.api.schemas import TenantOut
 from app.auth.deps import get_current_user_id
 from app.db.context import set_db_app_context
-from app.db.session import get_db_session
+from app.db.session import DbSessionRoute, get_db_session
 
 
-router = APIRouter()
+router = APIRouter(route_class=DbSessionRoute)
 
 
-@router.get("/tenants")
+@router.get("/tenants", response_model=list[TenantOut])
 async def list_tenants(
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_db_session),
     user_id: UUID = Depends(get_current_user_id),
-) -> list[dict]:
+) -> list[dict] | Response:
     await set_db_app_context(session, user_id=user_id)
+    etag = make_etag("tenants", user_id, await user_state_version(session, user_id))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
     rows = (
         await session.execute(
             text(
@@ -38,12 +46,7 @@ async def list_tenants(
         )
     ).mappings().all()
     return [
-        {
-            "id": UUID(str(r["id"])),
-            "name": r["name"],
-            "slug": r["slug"],
-            "role": {"id": UUID(str(r["role_id"])), "name": r["role_name"]},
-        }
+        {"id": r["id"], "name": r["name"], "slug": r["slug"], "role": {"id": r["role_id"], "name": r["role_name"]}}
         for r in rows
     ]
 
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+_OUTBOX_INSERT = "INSERT INTO audit_outbox (tenant_id, actor_user_id, action, entity_type, entity_id, before, after)"
+
+_ENQUEUE_SQL = text(
+    f"""
+    {_OUTBOX_INSERT}
+    VALUES (
+      :tenant_id, :actor_user_id, :action, :entity_type, :entity_id,
+      CAST(:before_json AS json), CAST(:after_json AS json)
+    );
+    """
+)
+
+
+def sql_enqueue_audit(select_sql: str) -> str:
+    """``enqueue_audit`` as SQL, for a data-modifying CTE of a larger statement.
+
+    ``select_sql`` must yield (tenant_id, actor_user_id, action, entity_type,
+    entity_id, before, after), the payloads as ``json``.
+    """
+    return f"{_OUTBOX_INSERT}\n{select_sql}"
+
+
+def _dump(payload: object) -> str | None:
+    return None if payload is None else json.dumps(payload, default=str)
+
+
+async def enqueue_audit(
+    session: AsyncSession,
+    *,
+    tenant_id: UUID,
+    actor_user_id: UUID,
+    action: str,
+    entity_type: str,
+    entity_id: UUID | None,
+    before: object = None,
+    after: object = None,
+) -> None:
+    """Record an audit entry in the request transaction.
+
+    The entry goes to ``audit_outbox`` and becomes visible in ``audit_log`` once
+    the worker drains it (``tasks.drain_audit_outbox``).
+    """
+    await session.execute(
+        _ENQUEUE_SQL,
+        {
+            "tenant_id": str(tenant_id),
+            "actor_user_id": str(actor_user_id),
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": str(entity_id) if entity_id is not None else None,
+            "before_json": _dump(before),
+            "after_json": _dump(after),
+        },
+    )
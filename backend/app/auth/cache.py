@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+from app.auth.permissions import permission_registry
+from app.settings import settings
+
+
+@dataclass(frozen=True, slots=True)
+class AuthContext:
+    user_id: UUID
+    tenant_id: UUID | None
+    is_active: bool
+    role_id: UUID | None
+    permission_mask: int
+
+    @property
+    def is_member(self) -> bool:
+        return self.role_id is not None
+
+    @property
+    def permission_codes(self) -> list[str]:
+        return permission_registry.codes(self.permission_mask)
+
+    def has_permissions(self, required_mask: int) -> bool:
+        return self.permission_mask & required_mask == required_mask
+
+    def has_permission(self, code: str) -> bool:
+        return self.has_permissions(permission_registry.bit(code))
+
+
+AUTH_CHANGED_CHANNEL = "app_auth_changed"
+
+_Key = tuple[UUID, UUID | None]
+
+
+class AuthContextCache:
+    """In-process TTL cache of resolved auth contexts keyed by (user_id, tenant_id).
+
+    Entries are only served while ``enabled`` is set, i.e. while something (the
+    NOTIFY listener) guarantees invalidation. ``generation`` guards against a
+    request storing a context it read before a concurrent invalidation.
+    """
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = False
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[_Key, tuple[float, AuthContext]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID, tenant_id: UUID | None) -> AuthContext | None:
+        if not self.enabled or self.ttl_seconds <= 0:
+            return None
+        key = (user_id, tenant_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, ctx: AuthContext, *, generation: int) -> None:
+        if not self.enabled or self.ttl_seconds <= 0:
+            return
+        key = (ctx.user_id, ctx.tenant_id)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, ctx)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *, user_id: UUID | None = None, tenant_id: UUID | None = None) -> None:
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            if user_id is None and tenant_id is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                key_user_id, key_tenant_id = key
+                if user_id is not None and tenant_id is not None:
+                    # A membership change only affects that user's view of that tenant.
+                    match = key_user_id == user_id and key_tenant_id in (tenant_id, None)
+                elif user_id is not None:
+                    match = key_user_id == user_id
+                else:
+                    match = key_tenant_id == tenant_id
+                if match:
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def stats(self) -> dict[str, int | float | bool]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+auth_context_cache = AuthContextCache(
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+    max_entries=settings.auth_cache_max_entries,
+)
+
+
+def _uuid_or_none(value: object) -> UUID | None:
+    return UUID(str(value)) if value else None
+
+
+def handle_auth_change_notification(payload: str) -> None:
+    try:
+        data = json.loads(payload)
+        user_id = _uuid_or_none(data.get("user_id"))
+        tenant_id = _uuid_or_none(data.get("tenant_id"))
+    except (ValueError, AttributeError):
+        auth_context_cache.clear()
+        return
+    if user_id is None and tenant_id is None:
+        auth_context_cache.clear()
+        return
+    auth_context_cache.invalidate(user_id=user_id, tenant_id=tenant_id)
+
+
+def handle_listener_reset(connected: bool) -> None:
+    # Notifications may have been missed while disconnected: start from scratch and
+    # only serve cached contexts while invalidations can actually be received.
+    auth_context_cache.enabled = connected
+    auth_context_cache.clear()
@@ -7,8 +7,10 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.cache import AuthContext, auth_context_cache
 from app.auth.jwt import decode_access_token
-from app.db.context import set_db_app_context
+from app.auth.permissions import permission_registry
+from app.db.context import mark_db_app_context_bound, set_db_app_context
 from app.db.session import get_db_session
 
 
@@ -26,36 +28,89 @@ async def get_bearer_token(
     return creds.credentials
 
 
-async def get_current_user_id(
-    session: AsyncSession = Depends(get_db_session),
-    token: str = Depends(get_bearer_token),
-) -> UUID:
+async def get_token_user_id(token: str = Depends(get_bearer_token)) -> UUID:
     try:
         payload = decode_access_token(token)
-        user_id = UUID(str(payload.get("sub")))
+        return UUID(str(payload.get("sub")))
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"code": "UNAUTHORIZED", "message": "Invalid token"},
         )
 
-    await set_db_app_context(session, user_id=user_id)
+
+_RESOLVE_USER_SQL = text(
+    """
+    SELECT app_bind_context(CAST(:user_id AS uuid), NULL) AS _ctx, c.*
+    FROM app_resolve_auth_context(CAST(:user_id AS uuid), NULL) c;
+    """
+)
+
+_RESOLVE_TENANT_SQL = text(
+    """
+    SELECT app_bind_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid)) AS _ctx, c.*
+    FROM app_resolve_auth_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid)) c;
+    """
+)
+
+
+async def resolve_auth_context(
+    session: AsyncSession,
+    *,
+    user_id: UUID,
+    tenant_id: UUID | None = None,
+) -> AuthContext | None:
+    """Return user status, membership and permissions, binding the DB context as a side effect.
+
+    A cache miss costs a single round-trip (context binding + resolution in one
+    statement); ``None`` means the user does not exist.
+    """
+    cached = auth_context_cache.get(user_id, tenant_id)
+    if cached is not None:
+        await set_db_app_context(session, user_id=user_id, tenant_id=tenant_id)
+        return cached
+
+    generation = auth_context_cache.generation
+    params = {"user_id": str(user_id)}
+    if tenant_id is not None:
+        params["tenant_id"] = str(tenant_id)
     row = (
-        await session.execute(
-            text("SELECT id, is_active FROM users WHERE id = :id;"),
-            {"id": str(user_id)},
-        )
-    ).first()
-    if not row:
+        await session.execute(_RESOLVE_TENANT_SQL if tenant_id is not None else _RESOLVE_USER_SQL, params)
+    ).mappings().one()
+    mark_db_app_context_bound(session, user_id=user_id, tenant_id=tenant_id)
+    if not row["user_exists"]:
+        return None
+
+    ctx = AuthContext(
+        user_id=user_id,
+        tenant_id=tenant_id,
+        is_active=bool(row["is_active"]),
+        role_id=UUID(str(row["role_id"])) if row["role_id"] is not None else None,
+        permission_mask=permission_registry.mask(row["permission_codes"] or ()),
+    )
+    auth_context_cache.put(ctx, generation=generation)
+    return ctx
+
+
+def _ensure_active_user(ctx: AuthContext | None) -> AuthContext:
+    if ctx is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"code": "UNAUTHORIZED", "message": "Unknown user"},
         )
-    if row.is_active is False:
+    if ctx.is_active is False:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail={"code": "FORBIDDEN", "message": "Inactive user"},
         )
+    return ctx
+
+
+async def get_current_user_id(
+    session: AsyncSession = Depends(get_db_session),
+    user_id: UUID = Depends(get_token_user_id),
+) -> UUID:
+    _ensure_active_user(await resolve_auth_context(session, user_id=user_id))
     return user_id
 
 
@@ -74,60 +129,41 @@ async def require_tenant_id(x_tenant_id: str | None = Header(default=None, alias
         )
 
 
-async def require_tenant_context(
+async def get_tenant_auth_context(
     tenant_id: UUID = Depends(require_tenant_id),
-    user_id: UUID = Depends(get_current_user_id),
+    user_id: UUID = Depends(get_token_user_id),
     session: AsyncSession = Depends(get_db_session),
-) -> tuple[UUID, UUID]:
-    await set_db_app_context(session, tenant_id=tenant_id)
-    row = (
-        await session.execute(
-            text(
-                """
-                SELECT 1 FROM memberships
-                WHERE tenant_id = :tenant_id AND user_id = :user_id
-                LIMIT 1;
-                """
-            ),
-            {"tenant_id": str(tenant_id), "user_id": str(user_id)},
-        )
-    ).first()
-    if not row:
+) -> AuthContext:
+    ctx = _ensure_active_user(await resolve_auth_context(session, user_id=user_id, tenant_id=tenant_id))
+    if not ctx.is_member:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail={"code": "FORBIDDEN", "message": "Not a member of this tenant"},
         )
-    return tenant_id, user_id
-
-
-def require_permission(permission_code: str):
-    async def _dep(
-        ctx: tuple[UUID, UUID] = Depends(require_tenant_context),
-        session: AsyncSession = Depends(get_db_session),
-    ) -> tuple[UUID, UUID]:
-        tenant_id, user_id = ctx
-        row = (
-            await session.execute(
-                text(
-                    """
-                    SELECT 1
-                    FROM memberships m
-                    JOIN role_permissions rp ON rp.role_id = m.role_id
-                    WHERE m.tenant_id = :tenant_id
-                      AND m.user_id = :user_id
-                      AND rp.permission_code = :code
-                    LIMIT 1;
-                    """
-                ),
-                {"tenant_id": str(tenant_id), "user_id": str(user_id), "code": permission_code},
-            )
-        ).first()
-        if not row:
+    return ctx
+
+
+async def require_tenant_context(
+    ctx: AuthContext = Depends(get_tenant_auth_context),
+) -> tuple[UUID, UUID]:
+    return ctx.tenant_id, ctx.user_id
+
+
+def require_permission(*permission_codes: str):
+    """Dependency checking that the caller holds every one of ``permission_codes``.
+
+    Codes are compiled to a bitmask once, so the check is a single AND against the
+    mask resolved with the auth context; no query is issued.
+    """
+    required_mask = permission_registry.mask(permission_codes)
+
+    async def _dep(ctx: AuthContext = Depends(get_tenant_auth_context)) -> tuple[UUID, UUID]:
+        if not ctx.has_permissions(required_mask):
+            missing = next(code for code in permission_codes if not ctx.has_permission(code))
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail={"code": "FORBIDDEN", "message": f"Missing permission: {permission_code}"},
+                detail={"code": "FORBIDDEN", "message": f"Missing permission: {missing}"},
             )
-        return tenant_id, user_id
+        return ctx.tenant_id, ctx.user_id
 
     return _dep
-
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
 from uuid import UUID
 
 import jwt
@@ -8,6 +14,93 @@ import jwt
 from app.settings import settings
 
 
+@lru_cache(maxsize=1)
+def get_signing_keys() -> tuple[str | None, dict[str | None, str]]:
+    """Resolve the (active kid, kid -> secret) key set once per process.
+
+    ``JWT_KEYS`` (``kid:secret,...``) allows several keys to be accepted at once so
+    a rotation only requires moving ``JWT_ACTIVE_KID`` and a rolling restart;
+    tokens signed with a kid stay valid while it is listed. Without it, the
+    single ``JWT_SECRET`` is used and tokens carry no ``kid`` header.
+    """
+    if not settings.jwt_keys:
+        return None, {None: settings.require_jwt_secret()}
+    keys: dict[str | None, str] = {}
+    for item in settings.jwt_keys.split(","):
+        kid, sep, secret = item.strip().partition(":")
+        if not sep or not kid or not secret:
+            raise RuntimeError("JWT_KEYS must be a comma-separated list of kid:secret pairs")
+        keys[kid] = secret
+    active_kid = settings.jwt_active_kid or next(iter(keys))
+    if active_kid not in keys:
+        raise RuntimeError(f"JWT_ACTIVE_KID {active_kid!r} is not listed in JWT_KEYS")
+    return active_kid, keys
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of sha256(token) -> verified claims, evicting entries at their ``exp``."""
+
+    def __init__(self, *, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._expiry: list[tuple[float, bytes]] = []
+        self._lock = threading.Lock()
+
+    def get(self, digest: bytes) -> dict | None:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, digest: bytes, claims: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        exp = float(claims["exp"])
+        with self._lock:
+            now = time.time()
+            while self._expiry and self._expiry[0][0] <= now:
+                expired_at, expired_digest = heapq.heappop(self._expiry)
+                entry = self._entries.get(expired_digest)
+                if entry is not None and entry[0] == expired_at:
+                    del self._entries[expired_digest]
+            self._entries[digest] = (exp, claims)
+            self._entries.move_to_end(digest)
+            heapq.heappush(self._expiry, (exp, digest))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if len(self._expiry) > 2 * self.max_entries:
+                self._expiry = [(e, d) for d, (e, _claims) in self._entries.items()]
+                heapq.heapify(self._expiry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._expiry.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+verified_token_cache = VerifiedTokenCache(max_entries=settings.jwt_cache_max_entries)
+
+
 def create_access_token(*, user_id: UUID) -> str:
     now = datetime.now(UTC)
     payload = {
@@ -15,14 +108,26 @@ def create_access_token(*, user_id: UUID) -> str:
         "iat": int(now.timestamp()),
         "exp": int((now + timedelta(seconds=settings.access_token_ttl_seconds)).timestamp()),
     }
-    return jwt.encode(payload, settings.require_jwt_secret(), algorithm=settings.jwt_alg)
+    active_kid, keys = get_signing_keys()
+    headers = {"kid": active_kid} if active_kid is not None else None
+    return jwt.encode(payload, keys[active_kid], algorithm=settings.jwt_alg, headers=headers)
 
 
 def decode_access_token(token: str) -> dict:
-    return jwt.decode(
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = verified_token_cache.get(digest)
+    if cached is not None:
+        return dict(cached)
+
+    active_kid, keys = get_signing_keys()
+    kid = jwt.get_unverified_header(token).get("kid", active_kid)
+    if kid not in keys:
+        raise jwt.InvalidTokenError("Unknown signing key")
+    claims = jwt.decode(
         token,
-        settings.require_jwt_secret(),
+        keys[kid],
         algorithms=[settings.jwt_alg],
         options={"require": ["exp", "sub"]},
     )
-
+    verified_token_cache.put(digest, claims)
+    return dict(claims)
@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable
+
 from passlib.context import CryptContext
 
+from app.settings import settings
+
 
 _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -13,3 +21,59 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, password_hash: str) -> bool:
     return _pwd_context.verify(password, password_hash)
 
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the hashing queue is full; mapped to 503 by the app."""
+
+
+class PasswordHasher:
+    """Runs bcrypt in a process pool so hashing never blocks the event loop.
+
+    At most ``max_pending`` operations may be running or queued at once; beyond
+    that callers get ``PasswordHasherBusy`` instead of waiting indefinitely.
+    ``max_workers=0`` runs bcrypt inline (only useful for comparison/benchmarks).
+    """
+
+    def __init__(self, *, max_workers: int | None, max_pending: int) -> None:
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Executor | None = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.max_workers == 0:
+            return fn(*args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._submit(verify_password, password, password_hash)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from app.db.engine import get_async_engine
+
+
+logger = logging.getLogger(__name__)
+
+PERMISSIONS_CHANGED_CHANNEL = "app_permissions_changed"
+
+
+class PermissionRegistry:
+    """Compiles permission codes into bit positions so grant sets are plain ints.
+
+    Positions are append-only for the life of the process: masks cached anywhere
+    stay valid when new codes appear (they are simply assigned the next bit).
+    """
+
+    def __init__(self) -> None:
+        self._positions: dict[str, int] = {}
+        self._codes: list[str] = []
+        self._lock = threading.Lock()
+
+    def load(self, codes: Iterable[str]) -> None:
+        for code in sorted(codes):
+            self.bit(code)
+
+    def bit(self, code: str) -> int:
+        position = self._positions.get(code)
+        if position is None:
+            with self._lock:
+                position = self._positions.get(code)
+                if position is None:
+                    position = len(self._codes)
+                    self._codes.append(code)
+                    self._positions[code] = position
+        return 1 << position
+
+    def mask(self, codes: Iterable[str]) -> int:
+        mask = 0
+        for code in codes:
+            mask |= self.bit(code)
+        return mask
+
+    def codes(self, mask: int) -> list[str]:
+        return sorted(code for position, code in enumerate(self._codes) if mask >> position & 1)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+
+permission_registry = PermissionRegistry()
+
+
+@dataclass(frozen=True, slots=True)
+class PermissionCatalog:
+    """Immutable snapshot of the ``permissions`` table, serialized once.
+
+    The ETag is derived from the body itself, so every worker holding the same
+    catalog hands out the same (strong) validator.
+    """
+
+    version: int
+    rows: tuple[tuple[str, str | None], ...]
+    body: bytes
+    etag: str
+
+    @classmethod
+    def build(cls, version: int, rows: Iterable[tuple[str, str | None]]) -> PermissionCatalog:
+        rows = tuple((code, description) for code, description in rows)
+        body = json.dumps(
+            [{"code": code, "description": description} for code, description in rows],
+            separators=(",", ":"),
+        ).encode()
+        return cls(version=version, rows=rows, body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+    @property
+    def codes(self) -> list[str]:
+        return [code for code, _description in self.rows]
+
+
+_catalog: PermissionCatalog | None = None
+_reload_tasks: set[asyncio.Task] = set()
+
+
+def get_permission_catalog() -> PermissionCatalog | None:
+    return _catalog
+
+
+def set_permission_catalog(catalog: PermissionCatalog) -> None:
+    global _catalog
+    # Concurrent reloads may finish out of order: never go back in time.
+    if _catalog is not None and _catalog.version > catalog.version:
+        return
+    _catalog = catalog
+    permission_registry.load(catalog.codes)
+
+
+async def load_permission_catalog(*, min_version: int | None = None) -> PermissionCatalog:
+    """(Re)load the catalog unless the one in memory is already at ``min_version``."""
+    if _catalog is not None and min_version is not None and _catalog.version >= min_version:
+        return _catalog
+    async with get_async_engine().connect() as conn:
+        version = (await conn.execute(text("SELECT app_permissions_version();"))).scalar_one()
+        rows = (await conn.execute(text("SELECT code, description FROM permissions ORDER BY code ASC;"))).all()
+    set_permission_catalog(PermissionCatalog.build(version, rows))
+    return _catalog
+
+
+async def current_permission_catalog() -> PermissionCatalog:
+    return _catalog if _catalog is not None else await load_permission_catalog()
+
+
+def _schedule_reload(min_version: int | None) -> None:
+    try:
+        task = asyncio.get_running_loop().create_task(_reload(min_version))
+    except RuntimeError:
+        # Not on the event loop: drop the snapshot so the next request reloads it.
+        clear_permission_catalog()
+        return
+    _reload_tasks.add(task)
+    task.add_done_callback(_reload_tasks.discard)
+
+
+async def _reload(min_version: int | None) -> None:
+    try:
+        await load_permission_catalog(min_version=min_version)
+    except Exception as exc:
+        logger.warning("Could not reload permission catalog: %s", exc)
+
+
+def clear_permission_catalog() -> None:
+    global _catalog
+    _catalog = None
+
+
+def handle_permissions_change_notification(payload: str) -> None:
+    try:
+        version: int | None = int(payload)
+    except ValueError:
+        version = None
+    if version is not None and _catalog is not None and _catalog.version >= version:
+        return
+    _schedule_reload(version)
+
+
+def handle_permissions_listener_reset(connected: bool) -> None:
+    # A migration may have run while we were not listening.
+    if connected:
+        _schedule_reload(None)
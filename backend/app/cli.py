@@ -0,0 +1,102 @@
+"""Operational commands, run against the configured database.
+
+    python -m app.cli backfill-audit-rollups [--tenant-id UUID]
+    python -m app.cli generate-synthetic-data --tenants N --users M --audit-entries K --until YYYY-MM-DD [--seed S] [--bulk]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.db.sync import get_sync_engine
+from app.settings import settings
+from app.synthetic import generate_synthetic_data
+
+
+def backfill_audit_rollups(tenant_id: UUID | None) -> int:
+    """Recompute ``audit_daily_counts`` from ``audit_log``; returns the number of rollup rows."""
+    with get_sync_engine().begin() as conn:
+        return conn.execute(
+            text("SELECT app_rebuild_audit_daily_counts(CAST(:tenant_id AS uuid));"),
+            {"tenant_id": str(tenant_id) if tenant_id else None},
+        ).scalar_one()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser(
+        "backfill-audit-rollups",
+        help="rebuild the daily audit activity rollup from audit_log (blocks audit inserts while running)",
+    )
+    backfill.add_argument("--tenant-id", type=UUID, default=None, help="only this tenant (default: all)")
+
+    synthetic = commands.add_parser(
+        "generate-synthetic-data",
+        help="create tenants, members and audit history for scale testing (deterministic for a given seed)",
+    )
+    synthetic.add_argument("--tenants", type=int, required=True)
+    synthetic.add_argument("--users", type=int, required=True, help="users in total, owners included")
+    synthetic.add_argument("--audit-entries", type=int, required=True, help="audit entries in total")
+    synthetic.add_argument("--seed", type=int, default=0, help="tenant slugs include it, so reruns need a new one")
+    synthetic.add_argument("--days", type=int, default=365, help="days of audit history (default: 365)")
+    synthetic.add_argument(
+        "--until", type=date.fromisoformat, required=True, help="end of the audit history, exclusive (YYYY-MM-DD)"
+    )
+    synthetic.add_argument("--password", default="passw0rd", help="password of every generated user")
+    synthetic.add_argument("--jobs", type=int, default=1, help="audit batches inserted in parallel (default: 1)")
+    synthetic.add_argument(
+        "--bulk",
+        action="store_true",
+        help="load the audit entries as DATABASE_OWNER_URL without the search index and per-entry triggers, "
+        "then rebuild them once (only on an otherwise idle database)",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "backfill-audit-rollups":
+        rows = backfill_audit_rollups(args.tenant_id)
+        print(f"audit_daily_counts: {rows} rows rebuilt")
+    elif args.command == "generate-synthetic-data":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        started = time.perf_counter()
+        try:
+            tenants = generate_synthetic_data(
+                tenants=args.tenants,
+                users=args.users,
+                audit_entries=args.audit_entries,
+                seed=args.seed,
+                password=args.password,
+                days=args.days,
+                until=args.until,
+                jobs=args.jobs,
+                owner_database_url=(settings.database_owner_url or settings.database_url) if args.bulk else None,
+            )
+        except ValueError as exc:
+            parser.error(str(exc))
+        except IntegrityError as exc:
+            if "uq_tenants_slug" not in str(exc.orig):
+                raise
+            print(f"seed {args.seed} was already generated in this database, use another --seed", file=sys.stderr)
+            return 1
+        elapsed = time.perf_counter() - started
+        entries = sum(tenant.audit_entries for tenant in tenants)
+        print(
+            f"{len(tenants)} tenants, {sum(tenant.members for tenant in tenants)} memberships, "
+            f"{entries} audit entries in {elapsed:.1f}s ({entries / elapsed:.0f} entries/s)"
+        )
+        for tenant in tenants[:5]:
+            print(f"  {tenant.slug} ({tenant.tenant_id}): owner {tenant.owner_email}, {tenant.members} members")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,89 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from uuid import UUID
 
-from sqlalchemy import text
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
 
 
-async def set_db_app_context(
+_INFO_KEY = "app_db_context"
+
+_BIND_SQL = text("SELECT app_bind_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid));")
+
+
+@dataclass(slots=True)
+class DbAppContext:
+    """Per-session record of the RLS context bound in the current transaction.
+
+    ``set_config(..., true)`` is transaction-local, so the bound values are
+    forgotten whenever a transaction (or savepoint) ends. ``statements`` counts
+    every statement executed through the session.
+    """
+
+    user_id: str | None = None
+    tenant_id: str | None = None
+    statements: int = 0
+
+    def reset_binding(self) -> None:
+        self.user_id = None
+        self.tenant_id = None
+
+
+def get_db_app_context(session: AsyncSession | Session) -> DbAppContext:
+    info = session.info
+    ctx = info.get(_INFO_KEY)
+    if ctx is None:
+        ctx = info[_INFO_KEY] = DbAppContext()
+    return ctx
+
+
+def mark_db_app_context_bound(
     session: AsyncSession,
     *,
     user_id: UUID | None = None,
     tenant_id: UUID | None = None,
 ) -> None:
+    """Record values bound as a side effect of another statement (e.g. auth resolution)."""
+    ctx = get_db_app_context(session)
     if user_id is not None:
-        await session.execute(
-            text("SELECT set_config('app.user_id', :user_id, true);"),
-            {"user_id": str(user_id)},
-        )
+        ctx.user_id = str(user_id)
     if tenant_id is not None:
-        await session.execute(
-            text("SELECT set_config('app.tenant_id', :tenant_id, true);"),
-            {"tenant_id": str(tenant_id)},
-        )
+        ctx.tenant_id = str(tenant_id)
+
+
+async def set_db_app_context(
+    session: AsyncSession,
+    *,
+    user_id: UUID | None = None,
+    tenant_id: UUID | None = None,
+) -> None:
+    """Bind the RLS context through ``app_bind_context()``.
+
+    Once both the user and the tenant are bound, membership is checked there
+    and the context is signed, so the policies trust it for the rest of the
+    transaction instead of looking the membership up again per query.
+    """
+    ctx = get_db_app_context(session)
+    params = {
+        "user_id": str(user_id) if user_id is not None and ctx.user_id != str(user_id) else None,
+        "tenant_id": str(tenant_id) if tenant_id is not None and ctx.tenant_id != str(tenant_id) else None,
+    }
+    if params["user_id"] is None and params["tenant_id"] is None:
+        return
+
+    await session.execute(_BIND_SQL, params)
+    mark_db_app_context_bound(session, user_id=user_id, tenant_id=tenant_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _count_statement(orm_execute_state: ORMExecuteState) -> None:
+    get_db_app_context(orm_execute_state.session).statements += 1
+
 
+@event.listens_for(Session, "after_transaction_end")
+def _forget_binding(session: Session, _transaction: SessionTransaction) -> None:
+    ctx = session.info.get(_INFO_KEY)
+    if ctx is not None:
+        ctx.reset_binding()
@@ -1,13 +1,50 @@
 from __future__ import annotations
 
 from functools import lru_cache
+from typing import Any
+from uuid import uuid4
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
+from app.db.pool import InstrumentedAsyncQueuePool, configure_pool, pool_options
 from app.settings import settings
 
 
+def _prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def connect_args() -> dict[str, Any]:
+    if not settings.db_pgbouncer:
+        return {}
+    # PgBouncer transaction pooling hands each transaction to any server
+    # connection, so nothing prepared may be cached across transactions (the
+    # RLS context is set_config(..., true), i.e. transaction-local, already).
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": _prepared_statement_name,
+    }
+
+
 @lru_cache(maxsize=1)
 def get_async_engine() -> AsyncEngine:
-    return create_async_engine(settings.database_url, pool_pre_ping=True)
+    engine = create_async_engine(
+        settings.database_url,
+        poolclass=InstrumentedAsyncQueuePool,
+        connect_args=connect_args(),
+        **pool_options(),
+    )
+    configure_pool(engine.sync_engine)
+    return engine
+
+
+def asyncpg_dsn(database_url: str | None = None) -> str:
+    """Return a plain libpq-style DSN for direct asyncpg connections (e.g. LISTEN).
 
+    Defaults to ``DATABASE_LISTEN_URL`` when set: LISTEN needs a session of
+    its own, which PgBouncer's transaction pooling does not provide.
+    """
+    url = make_url(database_url or settings.database_listen_url or settings.database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
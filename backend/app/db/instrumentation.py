@@ -0,0 +1,182 @@
+"""Per-request database statistics, collected from engine events.
+
+``SqlInstrumentationMiddleware`` reports them: a ``Server-Timing`` header in
+local/dev, and a warning for requests over the ``DB_REQUEST_*`` budgets or
+running one statement shape again and again (N+1 queries).
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Connection, Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """The statement with literals replaced by ``?`` and whitespace collapsed,
+    so executions differing only by inlined values compare equal. Cached: the
+    application's statements are a small, fixed set of texts."""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@dataclass(slots=True)
+class RequestDbStats:
+    """Statements executed while handling one request, and their time in the driver."""
+
+    statements: int = 0
+    seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: str = ""
+    shapes: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = shape
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Shapes run at least ``threshold`` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current: ContextVar[RequestDbStats | None] = ContextVar("request_db_stats", default=None)
+
+_STARTED_KEY = "app_statement_started"
+
+
+@contextmanager
+def collect_db_stats() -> Iterator[RequestDbStats]:
+    """Counts the statements run in this context (tasks and threads it starts
+    included), on any engine, until the block exits. Nested blocks share the
+    outermost block's stats."""
+    stats = _current.get()
+    if stats is not None:
+        yield stats
+        return
+    stats = RequestDbStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn: Connection, *_args: Any) -> None:
+    if _current.get() is not None:
+        conn.info[_STARTED_KEY] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn: Connection, _cursor: Any, statement: str, *_args: Any) -> None:
+    stats = _current.get()
+    started = conn.info.pop(_STARTED_KEY, None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route (``/members/{member_id}``), or
+    ``unmatched``; bounded, unlike the request path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+RequestObserver = Callable[[str, str, RequestDbStats], None]
+
+_observers: list[RequestObserver] = []
+
+
+@contextmanager
+def observe_requests(observer: RequestObserver) -> Iterator[None]:
+    """Calls ``observer(method, route, stats)`` for every request finished
+    while the block runs (e.g. statement budgets in tests)."""
+    _observers.append(observer)
+    try:
+        yield
+    finally:
+        _observers.remove(observer)
+
+
+def _server_timing(stats: RequestDbStats) -> str:
+    timing = f'db;dur={stats.seconds * 1e3:.1f};desc="{stats.statements} statements"'
+    if stats.statements:
+        timing += f", db-slowest;dur={stats.slowest_seconds * 1e3:.1f}"
+    return timing
+
+
+def _check_budgets(method: str, route: str, stats: RequestDbStats) -> None:
+    over_count = stats.statements > settings.db_request_statement_budget
+    over_time = stats.seconds > settings.db_request_time_budget_seconds
+    repeated = stats.repeated(settings.db_repeated_statement_threshold)
+    if not (over_count or over_time or repeated):
+        return
+    logger.warning(
+        "%s %s ran %d statements in %.1f ms (budget %d, %.1f ms); slowest %.1f ms: %s; repeated: %s",
+        method,
+        route,
+        stats.statements,
+        stats.seconds * 1e3,
+        settings.db_request_statement_budget,
+        settings.db_request_time_budget_seconds * 1e3,
+        stats.slowest_seconds * 1e3,
+        stats.slowest_statement,
+        "; ".join(f"{n}x {shape}" for shape, n in repeated) or "none",
+    )
+
+
+class SqlInstrumentationMiddleware:
+    """Collects each request's statements and reports them (see module doc)."""
+
+    def __init__(self, app: ASGIApp, *, server_timing: bool = False) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with collect_db_stats() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                # The request's session is released before the response
+                # starts (DbSessionRoute), so its statements are all counted.
+                if self.server_timing and message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("Server-Timing", _server_timing(stats))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                method, route = scope["method"], route_template(scope)
+                _check_budgets(method, route, stats)
+                for observer in list(_observers):
+                    observer(method, route, stats)
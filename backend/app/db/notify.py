@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+
+import asyncpg
+
+from app.db.engine import asyncpg_dsn
+
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationListener:
+    """Dedicated LISTEN connection dispatching Postgres NOTIFY payloads to callbacks.
+
+    ``on_reset`` callbacks run whenever the connection is (re)established or lost,
+    since notifications sent while disconnected are never delivered.
+    """
+
+    def __init__(self, dsn: str | None = None, *, reconnect_delay: float = 1.0, max_delay: float = 30.0) -> None:
+        self._dsn = dsn
+        self._reconnect_delay = reconnect_delay
+        self._max_delay = max_delay
+        self._handlers: dict[str, list[Callable[[str], None]]] = {}
+        self._reset_handlers: list[Callable[[bool], None]] = []
+        self._task: asyncio.Task | None = None
+        self.connected = False
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        self._handlers.setdefault(channel, []).append(callback)
+
+    def on_reset(self, callback: Callable[[bool], None]) -> None:
+        self._reset_handlers.append(callback)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="pg-notification-listener")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _set_connected(self, connected: bool) -> None:
+        self.connected = connected
+        for callback in self._reset_handlers:
+            try:
+                callback(connected)
+            except Exception:
+                logger.exception("Notification reset handler failed")
+
+    def _dispatch(self, _conn: object, _pid: int, channel: str, payload: str) -> None:
+        for callback in self._handlers.get(channel, []):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Notification handler failed for channel %s", channel)
+
+    async def _run(self) -> None:
+        delay = self._reconnect_delay
+        while True:
+            conn: asyncpg.Connection | None = None
+            try:
+                conn = await asyncpg.connect(self._dsn or asyncpg_dsn())
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: lost.set())
+                for channel in self._handlers:
+                    await conn.add_listener(channel, self._dispatch)
+                self._set_connected(True)
+                delay = self._reconnect_delay
+                await lost.wait()
+                logger.warning("Notification listener connection lost; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Notification listener unavailable (%s); retrying in %.1fs", exc, delay)
+            finally:
+                if self.connected:
+                    self._set_connected(False)
+                if conn is not None and not conn.is_closed():
+                    try:
+                        await conn.close(timeout=1)
+                    except Exception:
+                        conn.terminate()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_delay)
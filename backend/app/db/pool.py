@@ -0,0 +1,169 @@
+"""Connection pool configuration and statistics, shared by the API (asyncpg)
+and worker (psycopg) engines."""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Any
+
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.metrics import SECONDS_BUCKETS, db_pool_wait_seconds
+from app.settings import settings
+
+
+class Histogram:
+    """Cumulative histogram of durations over ``SECONDS_BUCKETS``; thread-safe."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(SECONDS_BUCKETS) + 1)
+        self._sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(SECONDS_BUCKETS, seconds)] += 1
+            self._sum += seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            cumulative = list(accumulate(self._counts))
+            return {
+                "buckets": {str(le): n for le, n in zip((*SECONDS_BUCKETS, "+Inf"), cumulative)},
+                "count": cumulative[-1],
+                "sum": self._sum,
+            }
+
+
+class PoolStats:
+    """Checkout counters and wait-time histogram of one engine's pool.
+
+    Carried over by ``pool.recreate()`` (``engine.dispose()``), so they count
+    for the process rather than for one pool instance.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.stale_pings = 0
+        self.wait_seconds = Histogram()
+
+    def wait_started(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def wait_finished(self, seconds: float, *, timed_out: bool) -> None:
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+        self.wait_seconds.observe(seconds)
+        db_pool_wait_seconds.observe(seconds)
+
+    def stale_ping(self) -> None:
+        with self._lock:
+            self.stale_pings += 1
+
+    def stats(self, pool: Pool) -> dict[str, Any]:
+        with self._lock:
+            counters = {
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "stale_pings": self.stale_pings,
+            }
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "idle": pool.checkedin(),
+            **counters,
+            "wait_seconds": self.wait_seconds.snapshot(),
+        }
+
+
+class _InstrumentedPoolMixin:
+    stats: PoolStats
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self) -> Pool:
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self) -> Any:
+        # Time spent here is the wait for a free slot (plus connecting, when a
+        # new connection is opened); a checkout from a non-empty pool does not
+        # yield, so ``waiting`` only counts callers actually queued.
+        self.stats.wait_started()
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.stats.wait_finished(time.perf_counter() - started, timed_out=timed_out)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options() -> dict[str, Any]:
+    """``create_engine()`` pool arguments from the ``DB_POOL_*`` settings."""
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping == "always",
+    }
+
+
+def install_idle_pre_ping(engine: Engine, idle_seconds: float) -> None:
+    """Ping a connection on checkout only when it sat in the pool for more
+    than ``idle_seconds``; recently used connections skip the round-trip.
+
+    A failed ping discards the connection and the pool checks out another one.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _checked_in(_dbapi_connection: Any, record: Any) -> None:
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checked_out(dbapi_connection: Any, record: Any, _proxy: Any) -> None:
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as err:
+            engine.pool.stats.stale_ping()
+            raise exc.DisconnectionError("Stale pooled connection") from err
+
+
+def configure_pool(engine: Engine) -> None:
+    if settings.db_pool_pre_ping == "idle":
+        install_idle_pre_ping(engine, settings.db_pool_pre_ping_idle_seconds)
+
+
+def pool_stats(engine: Engine) -> dict[str, Any]:
+    return engine.pool.stats.stats(engine.pool)
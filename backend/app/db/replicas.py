@@ -0,0 +1,192 @@
+"""Routing of read-only transactions to read replicas."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.db.engine import connect_args, get_async_engine
+from app.db.pool import InstrumentedAsyncQueuePool, configure_pool, pool_options
+from app.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+_READ_ONLY = {"postgresql_readonly": True}
+
+_REPLICA_POSITION_SQL = text("SELECT pg_is_in_recovery(), pg_last_wal_replay_lsn()::text;")
+
+
+def _lsn(value: str) -> int:
+    high, low = value.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+class ReplicaRouter:
+    """Picks the engine of a read-only transaction: a replica, or the primary.
+
+    Every ``check_interval`` seconds the primary's WAL position is recorded and
+    each replica's replay position read; a replica's lag is the age of the
+    newest recorded primary position it has replayed. Replicas lagging more
+    than ``max_lag`` seconds, or unreachable, are skipped until they catch up;
+    with none left, reads go to the primary. A server that is not in recovery
+    counts as up to date (e.g. a second URL of the primary in tests).
+
+    A client that wrote reads from the primary for ``max_lag + check_interval``
+    seconds, the longest a replica in use can be behind. Clients are known by
+    their ``Authorization`` header, or by address for anonymous writes (e.g.
+    bootstrap, so the new token's first reads see the new user). Like the auth
+    caches, this is per worker process.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        *,
+        max_lag: float,
+        check_interval: float,
+        max_sticky_clients: int = 10000,
+    ) -> None:
+        self.urls = urls
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.max_sticky_clients = max_sticky_clients
+        self._engines: list[AsyncEngine] = []
+        self._read_engines: list[AsyncEngine] = []
+        self._primary_read_engine: AsyncEngine | None = None
+        self._lags: list[float | None] = [None] * len(urls)
+        self._primary_positions: deque[tuple[float, int]] = deque()
+        self._sticky: dict[str, float] = {}
+        self._next = 0
+        self._task: asyncio.Task | None = None
+        self.replica_reads = [0] * len(urls)
+        self.primary_reads = 0
+
+    def _replica_engines(self) -> list[AsyncEngine]:
+        if not self._engines and self.urls:
+            for url in self.urls:
+                engine = create_async_engine(
+                    url, poolclass=InstrumentedAsyncQueuePool, connect_args=connect_args(), **pool_options()
+                )
+                configure_pool(engine.sync_engine)
+                self._engines.append(engine)
+                self._read_engines.append(engine.execution_options(**_READ_ONLY))
+        return self._engines
+
+    def _primary(self) -> AsyncEngine:
+        if self._primary_read_engine is None:
+            self._primary_read_engine = get_async_engine().execution_options(**_READ_ONLY)
+        return self._primary_read_engine
+
+    def mark_write(self, client_key: str | None) -> None:
+        if not self.urls or client_key is None:
+            return
+        now = time.monotonic()
+        if client_key not in self._sticky and len(self._sticky) >= self.max_sticky_clients:
+            self._sticky = {key: until for key, until in self._sticky.items() if until > now}
+            if len(self._sticky) >= self.max_sticky_clients:
+                del self._sticky[next(iter(self._sticky))]
+        self._sticky[client_key] = now + self.max_lag + self.check_interval
+
+    def read_engine(self, client_keys: tuple[str, ...] = ()) -> AsyncEngine:
+        """Engine of a read-only transaction for a client known by ``client_keys``."""
+        if self.urls:
+            now = time.monotonic()
+            sticky = False
+            for key in client_keys:
+                until = self._sticky.get(key)
+                if until is not None and until <= now:
+                    del self._sticky[key]
+                elif until is not None:
+                    sticky = True
+            fresh = [i for i, lag in enumerate(self._lags) if lag is not None and lag <= self.max_lag]
+            if not sticky and fresh:
+                index = fresh[self._next % len(fresh)]
+                self._next += 1
+                self.replica_reads[index] += 1
+                return self._read_engines[index]
+        self.primary_reads += 1
+        return self._primary()
+
+    async def refresh(self) -> None:
+        async with get_async_engine().connect() as conn:
+            primary = _lsn((await conn.execute(text("SELECT pg_current_wal_lsn()::text;"))).scalar_one())
+        now = time.monotonic()
+        self._primary_positions.append((now, primary))
+        horizon = now - self.max_lag - 2 * self.check_interval
+        while len(self._primary_positions) > 1 and self._primary_positions[1][0] <= horizon:
+            self._primary_positions.popleft()
+
+        for index, engine in enumerate(self._replica_engines()):
+            try:
+                async with engine.connect() as conn:
+                    in_recovery, replayed = (await conn.execute(_REPLICA_POSITION_SQL)).one()
+            except Exception as exc:
+                if self._lags[index] is not None:
+                    logger.warning("Replica %s unavailable (%s); reading from the primary", index, exc)
+                self._lags[index] = None
+                continue
+            if not in_recovery:
+                self._lags[index] = 0.0
+                continue
+            replayed_lsn = _lsn(replayed) if replayed else -1
+            caught_up = [at for at, position in self._primary_positions if position <= replayed_lsn]
+            lag = now - caught_up[-1] if caught_up else float("inf")
+            previous = self._lags[index]
+            if lag > self.max_lag and previous is not None and previous <= self.max_lag:
+                logger.warning("Replica %s lags %.1fs; reading from the primary", index, lag)
+            self._lags[index] = lag
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Replica lag check failed")
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        if self.urls and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="replica-lag-check")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for engine in self._engines:
+            await engine.dispose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "replicas": [
+                {
+                    "url": make_url(url).render_as_string(hide_password=True),
+                    "lag_seconds": lag if lag is not None and lag != float("inf") else None,
+                    "available": lag is not None and lag <= self.max_lag,
+                    "reads": reads,
+                }
+                for url, lag, reads in zip(self.urls, self._lags, self.replica_reads)
+            ],
+            "primary_reads": self.primary_reads,
+            "sticky_clients": len(self._sticky),
+        }
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()],
+    max_lag=settings.db_replica_max_lag_seconds,
+    check_interval=settings.db_replica_check_interval_seconds,
+)
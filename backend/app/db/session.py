@@ -1,17 +1,150 @@
 from __future__ import annotations
 
-from collections.abc import AsyncGenerator
+import functools
+import inspect
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any
 
+from fastapi import Request
+from fastapi.routing import APIRoute
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, SessionTransaction
 
 from app.db.engine import get_async_engine
+from app.db.pool import Histogram
+from app.db.replicas import replica_router
 
 
 _SessionMaker = async_sessionmaker(get_async_engine(), expire_on_commit=False, class_=AsyncSession)
 
+_READ_METHODS = frozenset({"GET", "HEAD"})
 
-async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
-    async with _SessionMaker() as session:
+_HELD_SINCE_KEY = "app_connection_held_since"
+_HOLD_SECONDS_KEY = "app_connection_hold_seconds"
+
+# Time each request held a connection, summed over its transactions.
+request_hold_seconds = Histogram()
+
+_request_session: ContextVar[AsyncSession | None] = ContextVar("request_db_session", default=None)
+
+
+@event.listens_for(Session, "after_begin")
+def _connection_acquired(session: Session, _transaction: SessionTransaction, _connection: Any) -> None:
+    session.info.setdefault(_HELD_SINCE_KEY, time.perf_counter())
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _connection_released(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is not None:
+        return
+    since = session.info.pop(_HELD_SINCE_KEY, None)
+    if since is not None:
+        session.info[_HOLD_SECONDS_KEY] = session.info.get(_HOLD_SECONDS_KEY, 0.0) + time.perf_counter() - since
+
+
+def connection_hold_seconds(session: AsyncSession | Session) -> float:
+    """Seconds the session held a connection, over all its ended transactions."""
+    return session.info.get(_HOLD_SECONDS_KEY, 0.0)
+
+
+@asynccontextmanager
+async def db_transaction(
+    *, read_only: bool = False, client_keys: tuple[str, ...] = ()
+) -> AsyncIterator[AsyncSession]:
+    """A session inside one transaction, for work that outlives the request
+    dependencies (e.g. a streamed response body).
+
+    ``read_only`` runs it as a READ ONLY transaction on a replica when one is
+    up to date (see ``ReplicaRouter``), on the primary otherwise.
+    """
+    options = {"bind": replica_router.read_engine(client_keys)} if read_only else {}
+    async with _SessionMaker(**options) as session:
         async with session.begin():
             yield session
 
+
+def request_client_keys(request: Request) -> tuple[str, ...]:
+    """The keys ``ReplicaRouter`` tracks a client's writes by: its
+    Authorization header, then its address."""
+    authorization = request.headers.get("Authorization")
+    address = request.client.host if request.client else None
+    return tuple(key for key in (authorization, address) if key)
+
+
+async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """The request's session: read-only (and replica-routed) for GET and HEAD,
+    read-write on the primary otherwise.
+
+    No connection is checked out until the first statement. The transaction
+    is committed, and the connection returned to the pool, as soon as the
+    endpoint returns (see ``DbSessionRoute``) rather than after the response
+    is serialized and sent; it is rolled back if the endpoint raises.
+    """
+    client_keys = request_client_keys(request)
+    client_key = None
+    if request.method in _READ_METHODS:
+        options = {"bind": replica_router.read_engine(client_keys)}
+    else:
+        # Marked on entry too, so reads racing this request avoid replicas.
+        client_key = client_keys[0] if client_keys else None
+        replica_router.mark_write(client_key)
+        options = {}
+
+    async with _SessionMaker(**options) as session:
+        _request_session.set(session)
+        try:
+            yield session
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+        finally:
+            _request_session.set(None)
+            hold = connection_hold_seconds(session)
+            request.state.db_hold_seconds = hold
+            if hold:
+                request_hold_seconds.observe(hold)
+    if client_key is not None:
+        replica_router.mark_write(client_key)
+
+
+async def release_db_session(session: AsyncSession) -> None:
+    """Commit now and return the connection to the pool, e.g. before slow work
+    that needs no database (password hashing).
+
+    The next statement checks out a connection again, in a new transaction:
+    the RLS context has to be bound again (``set_db_app_context``).
+    """
+    await session.commit()
+
+
+def _releasing_db_session(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        result = await endpoint(*args, **kwargs)
+        session = _request_session.get()
+        if session is not None:
+            await release_db_session(session)
+        return result
+
+    wrapper.releases_db_session = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+class DbSessionRoute(APIRoute):
+    """Route whose endpoint releases the request's session (``get_db_session``)
+    when it returns, before its result is serialized and sent.
+
+    FastAPI only runs the dependency's cleanup once the response is sent, so
+    without it the connection is held while a slow client reads the body.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        # include_router() builds the route again from the wrapped endpoint.
+        if inspect.iscoroutinefunction(endpoint) and not getattr(endpoint, "releases_db_session", False):
+            endpoint = _releasing_db_session(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.engine import make_url
+
+from app.db.pool import InstrumentedQueuePool, configure_pool, pool_options
+from app.settings import settings
+
+
+def sync_database_url(database_url: str | None = None) -> str:
+    """Same database as the API, through psycopg, for Celery tasks and CLI code."""
+    url = make_url(database_url or settings.database_url)
+    if url.drivername == "postgresql+asyncpg":
+        url = url.set(drivername="postgresql+psycopg")
+    return url.render_as_string(hide_password=False)
+
+
+@lru_cache(maxsize=1)
+def get_sync_engine() -> Engine:
+    # Behind PgBouncer, psycopg must not prepare statements server-side.
+    connect_args = {"prepare_threshold": None} if settings.db_pgbouncer else {}
+    engine = create_engine(
+        sync_database_url(), poolclass=InstrumentedQueuePool, connect_args=connect_args, **pool_options()
+    )
+    configure_pool(engine)
+    return engine
@@ -1,15 +1,63 @@
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import HTTPException, Request
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app.api.metrics import get_broker_client
 from app.api.router import router as api_router
+from app.auth.cache import AUTH_CHANGED_CHANNEL, handle_auth_change_notification, handle_listener_reset
+from app.auth.password import PasswordHasherBusy, password_hasher
+from app.auth.permissions import (
+    PERMISSIONS_CHANGED_CHANNEL,
+    handle_permissions_change_notification,
+    handle_permissions_listener_reset,
+    load_permission_catalog,
+)
+from app.db.engine import get_async_engine
+from app.db.instrumentation import SqlInstrumentationMiddleware
+from app.db.notify import NotificationListener
+from app.db.replicas import replica_router
+from app.metrics import MetricsMiddleware, mark_process_dead
 from app.settings import settings
 
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    try:
+        await load_permission_catalog()
+    except Exception as exc:
+        # Loaded on first GET /permissions instead, and codes are compiled on
+        # first use; only bit order differs.
+        logger.warning("Could not preload permission catalog: %s", exc)
+
+    listener = NotificationListener()
+    listener.subscribe(AUTH_CHANGED_CHANNEL, handle_auth_change_notification)
+    listener.on_reset(handle_listener_reset)
+    listener.subscribe(PERMISSIONS_CHANGED_CHANNEL, handle_permissions_change_notification)
+    listener.on_reset(handle_permissions_listener_reset)
+    listener.start()
+    replica_router.start()
+    try:
+        yield
+    finally:
+        await replica_router.stop()
+        await listener.stop()
+        password_hasher.shutdown()
+        await get_async_engine().dispose()
+        await get_broker_client().aclose()
+        mark_process_dead()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="IA-CRM v2 API")
+    app = FastAPI(title="IA-CRM v2 API", lifespan=lifespan)
     app.include_router(api_router)
 
     @app.exception_handler(HTTPException)
@@ -21,6 +69,14 @@ def create_app() -> FastAPI:
             error = {"code": "ERROR", "message": str(detail)}
         return JSONResponse(status_code=exc.status_code, content={"error": error})
 
+    @app.exception_handler(PasswordHasherBusy)
+    async def password_hasher_busy_handler(_request: Request, _exc: PasswordHasherBusy) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            content={"error": {"code": "SERVICE_UNAVAILABLE", "message": "Server busy, retry shortly"}},
+            headers={"Retry-After": "1"},
+        )
+
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(_request: Request, exc: RequestValidationError) -> JSONResponse:
         return JSONResponse(
@@ -45,6 +101,9 @@ def create_app() -> FastAPI:
             allow_methods=["*"],
             allow_headers=["*"],
         )
+    app.add_middleware(SqlInstrumentationMiddleware, server_timing=settings.environment in {"local", "dev"})
+    # Outermost, so the time and status include the other middleware's.
+    app.add_middleware(MetricsMiddleware)
 
     return app
 
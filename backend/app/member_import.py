@@ -0,0 +1,297 @@
+"""Bulk member import: input parsing for ``POST /members/import`` and the
+batch job the Celery worker runs for it."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel, EmailStr, ValidationError
+from sqlalchemy import Connection, text
+
+from app.audit import sql_enqueue_audit
+from app.auth.password import hash_password
+from app.db.sync import get_sync_engine
+from app.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+ImportFormat = Literal["ndjson", "csv"]
+
+_BIND = "SELECT app_bind_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid));"
+
+
+class MemberImportRow(BaseModel):
+    email: EmailStr
+    password: str
+    role_id: UUID
+
+
+def parse_member_import(body: bytes, import_format: ImportFormat) -> list[tuple[int, MemberImportRow]]:
+    """(line number, row) for every member of the upload.
+
+    Raises ``ValueError`` naming the first offending line; nothing is imported
+    from an upload that does not parse.
+    """
+    try:
+        content = body.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise ValueError("Upload must be UTF-8") from exc
+
+    rows: list[tuple[int, MemberImportRow]] = []
+    if import_format == "csv":
+        reader = csv.DictReader(io.StringIO(content, newline=""))
+        missing = set(MemberImportRow.model_fields) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+        records = ((reader.line_num, record) for record in reader)
+    else:
+        records = ((number, line) for number, line in enumerate(content.splitlines(), start=1) if line.strip())
+
+    for line, record in records:
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+            rows.append((line, MemberImportRow.model_validate(record)))
+        except (ValueError, ValidationError) as exc:
+            if isinstance(exc, ValidationError):
+                error = exc.errors()[0]
+                reason = f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}"
+            else:
+                reason = "invalid JSON"
+            raise ValueError(f"Line {line}: {reason}") from exc
+    return rows
+
+
+# One statement per batch: users are upserted through app_upsert_users(),
+# memberships inserted for the first valid line of each user, and every line
+# gets its result row and leaves member_import_pending. Existing members keep
+# their role.
+_IMPORT_BATCH_SQL = """
+    WITH consumed AS (
+      DELETE FROM member_import_pending p
+      USING member_import_staging s
+      WHERE p.job_id = :job_id AND p.line = s.line
+    ),
+    upserted AS (
+      SELECT u.email, u.user_id
+      FROM app_upsert_users(
+        ARRAY(SELECT s.email FROM member_import_staging s ORDER BY s.line),
+        ARRAY(SELECT s.password_hash FROM member_import_staging s ORDER BY s.line)
+      ) u
+    ),
+    resolved AS (
+      SELECT
+        s.line,
+        s.email,
+        s.role_id,
+        u.user_id,
+        r.id IS NOT NULL AS role_found,
+        row_number() OVER (PARTITION BY u.user_id, r.id IS NOT NULL ORDER BY s.line) = 1 AS first_for_user
+      FROM member_import_staging s
+      LEFT JOIN upserted u ON u.email = s.email
+      LEFT JOIN roles r ON r.tenant_id = :tenant_id AND r.id = s.role_id
+    ),
+    inserted AS (
+      INSERT INTO memberships (tenant_id, user_id, role_id)
+      SELECT CAST(:tenant_id AS uuid), r.user_id, r.role_id
+      FROM resolved r
+      WHERE r.user_id IS NOT NULL AND r.role_found AND r.first_for_user
+      ORDER BY r.user_id
+      ON CONFLICT (tenant_id, user_id) DO NOTHING
+      RETURNING id, user_id
+    ),
+    results AS (
+      INSERT INTO member_import_rows (job_id, line, tenant_id, email, status, error, user_id, membership_id)
+      SELECT
+        CAST(:job_id AS uuid),
+        r.line,
+        CAST(:tenant_id AS uuid),
+        r.email,
+        CASE
+          WHEN NOT r.role_found OR r.user_id IS NULL THEN 'failed'
+          WHEN i.id IS NOT NULL THEN 'created'
+          ELSE 'existing'
+        END,
+        CASE
+          WHEN NOT r.role_found THEN 'Unknown role'
+          WHEN r.user_id IS NULL THEN 'User was created concurrently, retry'
+        END,
+        r.user_id,
+        i.id
+      FROM resolved r
+      LEFT JOIN inserted i ON i.user_id = r.user_id AND r.role_found AND r.first_for_user
+      RETURNING status
+    )
+    UPDATE member_import_jobs j
+    SET
+      heartbeat_at = now(),
+      processed = j.processed + c.total,
+      created = j.created + c.created,
+      existing = j.existing + c.existing,
+      failed = j.failed + c.failed
+    FROM (
+      SELECT
+        count(*) AS total,
+        count(*) FILTER (WHERE status = 'created') AS created,
+        count(*) FILTER (WHERE status = 'existing') AS existing,
+        count(*) FILTER (WHERE status = 'failed') AS failed
+      FROM results
+    ) c
+    WHERE j.id = :job_id;
+"""
+
+_IMPORTED_AUDIT = sql_enqueue_audit(
+    """
+    SELECT job.tenant_id, job.actor_user_id, 'member.imported', 'member_import', job.id, NULL::json,
+           json_build_object(
+             'job_id', job.id,
+             'status', job.status,
+             'error', job.error,
+             'total', job.total,
+             'processed', job.processed,
+             'created', job.created,
+             'existing', job.existing,
+             'failed', job.failed
+           )
+    FROM job
+    """
+)
+
+# Claims a queued job, or a running one whose worker stopped heartbeating
+# (the periodic reclaim re-enqueues those); returns the attempt number.
+_CLAIM_SQL = """
+    UPDATE member_import_jobs
+    SET status = 'running', started_at = COALESCE(started_at, now()), heartbeat_at = now(), attempts = attempts + 1
+    WHERE id = :job_id
+      AND (status = 'queued' OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale_seconds)))
+    RETURNING attempts;
+"""
+
+# Taken first in every batch transaction: fails once another run reclaimed
+# the job, and serialises the batches of an old and a new run.
+_HOLD_SQL = """
+    SELECT id FROM member_import_jobs
+    WHERE id = :job_id AND status = 'running' AND attempts = :attempt
+    FOR UPDATE;
+"""
+
+_PENDING_SQL = """
+    SELECT line, email, password, role_id
+    FROM member_import_pending
+    WHERE job_id = :job_id
+    ORDER BY line
+    LIMIT :limit;
+"""
+
+# Final status, the job's single, summarised audit entry, and whatever was
+# left of the upload. Lines that were never processed went with the unlogged
+# pending table in a database crash: the job fails and says so.
+_FINISH_SQL = f"""
+    WITH job AS (
+      UPDATE member_import_jobs
+      SET
+        status = CASE WHEN :status = 'succeeded' AND processed < total THEN 'failed' ELSE :status END,
+        error = CASE
+          WHEN :status = 'succeeded' AND processed < total
+            THEN format('%s of %s lines were lost in a database restart, import them again', total - processed, total)
+          ELSE :error
+        END,
+        finished_at = now()
+      WHERE id = :job_id AND status = 'running' AND attempts = :attempt
+      RETURNING id, tenant_id, actor_user_id, status, error, total, processed, created, existing, failed
+    ),
+    purged AS (
+      DELETE FROM member_import_pending p USING job WHERE p.job_id = job.id
+    ),
+    audit AS (
+      {_IMPORTED_AUDIT}
+    )
+    SELECT status FROM job;
+"""
+
+
+def _import_batch(
+    conn: Connection, params: dict[str, str], rows: list[tuple[int, str, str, str]], password_hashes: list[str]
+) -> None:
+    conn.execute(
+        text(
+            """
+            CREATE TEMP TABLE member_import_staging (line integer, email citext, password_hash text, role_id uuid)
+            ON COMMIT DROP;
+            """
+        )
+    )
+    with conn.connection.driver_connection.cursor() as cursor:
+        with cursor.copy("COPY member_import_staging (line, email, password_hash, role_id) FROM STDIN") as copy:
+            for (line, email, _password, role_id), password_hash in zip(rows, password_hashes):
+                copy.write_row((line, email, password_hash, role_id))
+    conn.execute(text(_IMPORT_BATCH_SQL), params)
+
+
+def run_member_import(job_id: str, tenant_id: str, actor_user_id: str) -> str:
+    """Import the pending lines of a job; returns the final job status.
+
+    The upload waits in ``member_import_pending``; each batch is hashed, then
+    imported and removed from it in one transaction, so progress is visible
+    while the job runs and a reclaimed job resumes where the last run stopped.
+    A job that is neither queued nor stale (e.g. a redelivered task), or that
+    another run reclaimed meanwhile, is left alone.
+    """
+    engine = get_sync_engine()
+    params = {"job_id": job_id, "tenant_id": tenant_id}
+    bind = {"user_id": actor_user_id, "tenant_id": tenant_id}
+
+    with engine.begin() as conn:
+        conn.execute(text(_BIND), bind)
+        attempt = conn.execute(
+            text(_CLAIM_SQL), {**params, "stale_seconds": settings.member_import_stale_seconds}
+        ).scalar()
+    if attempt is None:
+        logger.warning("Member import %s is not queued, skipping", job_id)
+        return "skipped"
+
+    status, error = "succeeded", None
+    batch_size = settings.member_import_batch_size
+    if attempt > settings.member_import_max_attempts:
+        status, error = "failed", f"Import was interrupted {attempt - 1} times"
+    else:
+        try:
+            # bcrypt releases the GIL, so threads hash in parallel; a process
+            # pool is not available inside the worker's (daemonic) pool processes.
+            with ThreadPoolExecutor(max_workers=settings.password_hash_workers or os.cpu_count() or 1) as hashers:
+                while True:
+                    with engine.begin() as conn:
+                        conn.execute(text(_BIND), bind)
+                        batch = [
+                            (line, email, password, str(role_id))
+                            for line, email, password, role_id in conn.execute(
+                                text(_PENDING_SQL), {**params, "limit": batch_size}
+                            )
+                        ]
+                    if not batch:
+                        break
+                    password_hashes = list(hashers.map(hash_password, [password for _, _, password, _ in batch]))
+                    with engine.begin() as conn:
+                        conn.execute(text(_BIND), bind)
+                        if conn.execute(text(_HOLD_SQL), {**params, "attempt": attempt}).first() is None:
+                            logger.warning("Member import %s was reclaimed by another run", job_id)
+                            return "skipped"
+                        _import_batch(conn, params, batch, password_hashes)
+        except Exception as exc:
+            logger.exception("Member import %s failed", job_id)
+            status, error = "failed", str(exc)
+
+    with engine.begin() as conn:
+        conn.execute(text(_BIND), bind)
+        finished = conn.execute(
+            text(_FINISH_SQL), {**params, "attempt": attempt, "status": status, "error": error}
+        ).scalar()
+    return finished or "skipped"
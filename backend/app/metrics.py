@@ -0,0 +1,115 @@
+"""Prometheus metrics of the API process, exposed by ``GET /metrics``.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set (an empty directory, before the server
+starts), every worker process writes its samples to files there and
+``GET /metrics`` aggregates all of them, whichever worker serves it. Without
+it, only the serving process is reported.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.instrumentation import collect_db_stats, route_template
+
+
+# Upper bounds, in seconds, of the duration histograms.
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_BYTES_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+_STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_ROUTE_LABELS = ("method", "route")
+
+requests_total = Counter("http_requests_total", "Requests handled.", ("method", "route", "status"))
+request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "Time to handle a request.", _ROUTE_LABELS, buckets=SECONDS_BUCKETS
+)
+requests_in_progress = Gauge(
+    "http_requests_in_progress", "Requests being handled.", ("method",), multiprocess_mode="livesum"
+)
+response_size_bytes = Histogram(
+    "http_response_size_bytes", "Size of response bodies.", _ROUTE_LABELS, buckets=_BYTES_BUCKETS
+)
+request_db_statements = Histogram(
+    "http_request_db_statements", "Database statements run per request.", _ROUTE_LABELS, buckets=_STATEMENT_BUCKETS
+)
+request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time spent in database statements per request.", _ROUTE_LABELS, buckets=SECONDS_BUCKETS
+)
+request_db_hold_seconds = Histogram(
+    "http_request_db_connection_hold_seconds",
+    "Time a request held a pooled database connection.",
+    _ROUTE_LABELS,
+    buckets=SECONDS_BUCKETS,
+)
+db_pool_wait_seconds = Histogram(
+    "db_pool_wait_seconds", "Time waited for a pooled database connection.", buckets=SECONDS_BUCKETS
+)
+
+
+def metrics_registry() -> CollectorRegistry:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics(*extra: CollectorRegistry) -> bytes:
+    """Text exposition of the process (or all workers') metrics, then of ``extra``."""
+    return b"".join(generate_latest(registry) for registry in (metrics_registry(), *extra))
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges (in-progress requests) from the aggregate."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """Records the request metrics above. Requests are labelled by route
+    template (``/members/{member_id}``), so the label set stays bounded."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = requests_in_progress.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        with collect_db_stats() as db:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - started
+                in_progress.dec()
+                route = route_template(scope)
+                requests_total.labels(method, route, str(status)).inc()
+                request_duration_seconds.labels(method, route).observe(elapsed)
+                response_size_bytes.labels(method, route).observe(size)
+                request_db_statements.labels(method, route).observe(db.statements)
+                request_db_seconds.labels(method, route).observe(db.seconds)
+                hold = scope.get("state", {}).get("db_hold_seconds")
+                if hold is not None:
+                    request_db_hold_seconds.labels(method, route).observe(hold)
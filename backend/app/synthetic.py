@@ -0,0 +1,451 @@
+"""Synthetic tenants, members and audit history for scale testing
+(``python -m app.cli generate-synthetic-data``).
+
+Everything is drawn from ``random.Random`` seeded with ``seed``: the same
+arguments produce the same tenants, emails, role assignments and audit
+entries (ids aside, the database assigns them). Tenant sizes and activity
+follow a Zipf distribution, a few admins do most of the changes, and entries
+cluster on weekdays and office hours with activity growing over the window.
+
+Tenants and users go through ``app_bootstrap`` / ``app_upsert_users`` with a
+single precomputed password hash. Audit entries are generated a column at a
+time, COPied into a staging table as compact indexes and expanded by one
+INSERT per batch under the tenant owner's bound context, so RLS and the audit
+triggers (rollups included) apply exactly as for API writes.
+
+With an owner connection (``owner_database_url``) the load is a bulk load
+instead: the trigram search index is dropped and the per-entry audit triggers
+disabled for its duration, then the index is built in one pass and the
+rollups rebuilt once. Meant for an otherwise idle database: meanwhile other
+searches scan without the index and other audit writes miss the rollups.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import random
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import Connection, Engine, create_engine, text
+
+from app.auth.password import hash_password
+from app.db.sync import get_sync_engine, sync_database_url
+from app.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = 100_000
+
+# What a bulk load skips per entry and redoes once at the end. The inserted
+# rows already carry the actor's email.
+_SEARCH_INDEX = "ix_audit_tenant_search_trgm"
+_BULK_TRIGGERS = ("trg_audit_log_actor_email", "trg_audit_log_daily_counts")
+
+# Index = role number in the plan. Owner, Admin and Member are the system
+# roles every tenant is created with; the others are created per tenant.
+ROLES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("Owner", ()),
+    ("Admin", ()),
+    ("Member", ()),
+    ("Support", ("tenants:read", "members:read")),
+    ("Auditor", ("tenants:read", "members:read", "roles:read", "audit:read")),
+    ("Team lead", ("tenants:read", "members:read", "members:write", "roles:read")),
+)
+_ROLE_NAMES = [name for name, _ in ROLES]
+_CUSTOM_ROLES = 3
+# Roles of the members other than the owner, and how common each is.
+_MEMBER_ROLES = (1, 2, 3, 4, 5)
+_MEMBER_ROLE_WEIGHTS = (5, 75, 10, 4, 6)
+# Roles whose holders make changes, i.e. appear as audit actors.
+_WRITER_ROLES = frozenset({0, 1, 5})
+# Members of a tenant that also belong to an earlier one.
+_SHARED_MEMBER_RATIO = 0.02
+
+# Index = action number in the staging table, as the API records them.
+ACTIONS: tuple[tuple[str, str], ...] = (
+    ("member.created", "membership"),
+    ("role.updated", "role"),
+    ("role.created", "role"),
+    ("member.imported", "member_import"),
+    ("audit.retention_updated", "tenant"),
+)
+_ACTION_WEIGHTS = (55, 25, 8, 10, 2)
+
+_FIRST_NAMES = (
+    "alice bruno chloe david emma felix giulia hugo ines jonas karim lea marco nina oscar paula quentin rosa samir tara"
+).split()
+_LAST_NAMES = (
+    "martin bernard dubois garcia muller rossi silva novak jensen kowalski nguyen smith moreau fischer lopez bianchi"
+    " costa weber petit durand"
+).split()
+
+# Relative activity per UTC hour: office hours, a quieter evening, little at night.
+_HOUR_WEIGHTS = (1, 1, 1, 1, 1, 2, 4, 10, 25, 30, 30, 28, 20, 26, 30, 30, 26, 18, 10, 6, 4, 3, 2, 1)
+_WEEKEND_FACTOR = 0.2
+# Activity on the last day of the window relative to the first.
+_GROWTH = 3.0
+
+
+@dataclass(slots=True)
+class SyntheticTenant:
+    """One tenant of the plan. ``members`` are emails, the owner first;
+    ``roles`` the matching indexes into ``ROLES``."""
+
+    number: int
+    name: str
+    slug: str
+    members: list[str]
+    roles: list[int]
+    audit_entries: int
+
+
+@dataclass(slots=True)
+class SyntheticTenantResult:
+    slug: str
+    tenant_id: str
+    owner_id: str
+    owner_email: str
+    members: int
+    audit_entries: int
+
+
+def _apportion(total: int, weights: Sequence[float]) -> list[int]:
+    """``total`` split proportionally to ``weights`` (largest remainders)."""
+    scale = total / sum(weights)
+    shares = [w * scale for w in weights]
+    counts = [int(s) for s in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[: total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def plan_tenants(tenants: int, users: int, audit_entries: int, seed: int) -> list[SyntheticTenant]:
+    """Tenants, their members and how many audit entries each gets.
+
+    ``users`` includes the owners (one per tenant, so at least ``tenants``);
+    each user belongs to one tenant, plus a few to an earlier one as well.
+    """
+    if tenants < 1 or users < tenants or audit_entries < 0:
+        raise ValueError("need at least one tenant, one user per tenant and a non-negative number of audit entries")
+    rng = random.Random(seed)
+    zipf = [1 / rank for rank in range(1, tenants + 1)]
+    sizes = [1 + n for n in _apportion(users - tenants, zipf)]
+    entries = _apportion(audit_entries, sizes)
+
+    plan: list[SyntheticTenant] = []
+    earlier: list[str] = []
+    user_number = itertools.count()
+    for number, (size, tenant_entries) in enumerate(zip(sizes, entries)):
+        slug = f"synthetic-{seed}-{number}"
+        domain = f"{slug}.example.com"
+        members = [f"owner@{domain}"]
+        for n in itertools.islice(user_number, size - 1):
+            members.append(f"{rng.choice(_FIRST_NAMES)}.{rng.choice(_LAST_NAMES)}.{n}@{domain}")
+        roles = [0] + rng.choices(_MEMBER_ROLES, weights=_MEMBER_ROLE_WEIGHTS, k=size - 1)
+        shared = rng.sample(earlier, min(len(earlier), int(size * _SHARED_MEMBER_RATIO)))
+        earlier += members[1:]
+        members += shared
+        roles += rng.choices(_MEMBER_ROLES, weights=_MEMBER_ROLE_WEIGHTS, k=len(shared))
+        plan.append(SyntheticTenant(number, f"Synthetic {seed}-{number}", slug, members, roles, tenant_entries))
+    return plan
+
+
+def _audit_batch(rng: random.Random, tenant: SyntheticTenant, rows: int, until: date, days: int) -> str:
+    """COPY text of ``rows`` entries of the tenant: (actor member, action,
+    subject, epoch seconds). The subject picks the membership/role the entry
+    is about, modulo their number."""
+    writers = [n for n, role in enumerate(tenant.roles) if role in _WRITER_ROLES]
+    first_day = datetime(until.year, until.month, until.day, tzinfo=UTC) - timedelta(days=days)
+    day_starts = [(first_day + timedelta(days=d)).timestamp() for d in range(days)]
+    day_weights = [
+        (1 + (_GROWTH - 1) * d / max(days - 1, 1))
+        * (_WEEKEND_FACTOR if (first_day + timedelta(days=d)).weekday() >= 5 else 1)
+        for d in range(days)
+    ]
+
+    # A column at a time, formatted in one pass.
+    actors = rng.choices(writers, weights=[1 / rank for rank in range(1, len(writers) + 1)], k=rows)
+    actions = rng.choices(range(len(ACTIONS)), weights=_ACTION_WEIGHTS, k=rows)
+    bits = rng.getrandbits
+    subjects = [bits(31) for _ in range(rows)]
+    uniform = rng.random
+    at = [
+        day + hour + uniform() * 3600
+        for day, hour in zip(
+            rng.choices(day_starts, weights=day_weights, k=rows),
+            rng.choices(range(0, 24 * 3600, 3600), weights=_HOUR_WEIGHTS, k=rows),
+        )
+    ]
+    return "".join(map("{}\t{}\t{}\t{:.3f}\n".format, actors, actions, subjects, at))
+
+
+_BIND = "SELECT app_bind_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid));"
+
+_BOOTSTRAP_SQL = """
+    SELECT user_id, tenant_id
+    FROM app_bootstrap(:name, :slug, CAST(:email AS citext), :password_hash);
+"""
+
+_CUSTOM_ROLE_SQL = """
+    WITH role AS (
+      INSERT INTO roles (tenant_id, name, is_system)
+      VALUES (:tenant_id, :name, false)
+      RETURNING id, tenant_id
+    )
+    INSERT INTO role_permissions (role_id, permission_code, tenant_id)
+    SELECT role.id, code, role.tenant_id
+    FROM role, unnest(CAST(:permission_codes AS text[])) AS code;
+"""
+
+# The owner joined in app_bootstrap; everyone else is upserted (members of
+# earlier tenants already exist) and joins with their planned role.
+_MEMBERS_SQL = """
+    WITH input AS (
+      SELECT i.email, r.id AS role_id
+      FROM unnest(CAST(:emails AS citext[]), CAST(:roles AS integer[])) AS i(email, role)
+      JOIN roles r ON r.tenant_id = :tenant_id AND r.name = (CAST(:role_names AS text[]))[i.role + 1]
+    ),
+    users AS (
+      SELECT email, user_id
+      FROM app_upsert_users(CAST(:emails AS citext[]), array_fill(CAST(:password_hash AS text), ARRAY[:count]))
+    )
+    INSERT INTO memberships (tenant_id, user_id, role_id)
+    SELECT :tenant_id, u.user_id, input.role_id
+    FROM input
+    JOIN users u ON u.email = input.email;
+"""
+
+# Roles and members of the tenant by their index in the plan, for the
+# entries of one batch to refer to.
+_AUDIT_ROLES_SQL = """
+    CREATE TEMP TABLE synthetic_roles ON COMMIT DROP AS
+    SELECT
+      array_position(CAST(:role_names AS text[]), r.name) - 1 AS n,
+      r.id,
+      r.name,
+      r.is_system,
+      ARRAY(SELECT p.permission_code FROM role_permissions p WHERE p.role_id = r.id ORDER BY 1) AS permission_codes
+    FROM roles r
+    WHERE r.tenant_id = :tenant_id AND r.name = ANY(CAST(:role_names AS text[]));
+"""
+
+_AUDIT_MEMBERS_SQL = """
+    CREATE TEMP TABLE synthetic_members ON COMMIT DROP AS
+    SELECT i.n - 1 AS n, m.id AS membership_id, m.user_id, m.email, m.role_id
+    FROM unnest(CAST(:emails AS text[])) WITH ORDINALITY AS i(email, n)
+    JOIN memberships m ON m.tenant_id = :tenant_id AND m.email = i.email;
+"""
+
+_AUDIT_STAGING_SQL = """
+    CREATE TEMP TABLE synthetic_audit_staging (
+      actor integer, action integer, subject integer, at double precision
+    ) ON COMMIT DROP;
+"""
+
+# Payloads shaped like the API's own entries for these actions. In time
+# order, so each partition and the created_at index fill up in turn.
+_AUDIT_SQL = """
+    WITH counts AS (
+      SELECT (SELECT count(*) FROM synthetic_members) AS members, (SELECT count(*) FROM synthetic_roles) AS roles
+    ),
+    staged AS (
+      SELECT s.*, a.action_name, a.entity_type, s.subject % c.members AS member_n, s.subject % c.roles AS role_n
+      FROM synthetic_audit_staging s
+      CROSS JOIN counts c
+      JOIN unnest(CAST(:actions AS text[]), CAST(:entity_types AS text[])) WITH ORDINALITY
+        AS a(action_name, entity_type, n) ON a.n = s.action + 1
+    )
+    INSERT INTO audit_log
+      (tenant_id, actor_user_id, actor_email, action, entity_type, entity_id, before, after, created_at)
+    SELECT
+      CAST(:tenant_id AS uuid),
+      actor.user_id,
+      actor.email,
+      s.action_name,
+      s.entity_type,
+      CASE s.entity_type
+        WHEN 'membership' THEN m.membership_id
+        WHEN 'role' THEN r.id
+        WHEN 'tenant' THEN CAST(:tenant_id AS uuid)
+        ELSE gen_random_uuid()
+      END,
+      CASE s.action_name
+        WHEN 'role.updated' THEN json_build_object(
+          'role', json_build_object('id', r.id, 'name', r.name, 'is_system', r.is_system),
+          'permission_codes', r.permission_codes[1:cardinality(r.permission_codes) - 1]
+        )
+        WHEN 'audit.retention_updated' THEN json_build_object('days', 30 + s.subject % 12 * 30)
+      END,
+      CASE s.action_name
+        WHEN 'member.created' THEN json_build_object(
+          'membership_id', m.membership_id, 'user_id', m.user_id, 'email', m.email, 'role_id', m.role_id
+        )
+        WHEN 'role.created' THEN json_build_object('id', r.id, 'name', r.name, 'permission_codes', r.permission_codes)
+        WHEN 'role.updated' THEN json_build_object(
+          'role', json_build_object('id', r.id, 'name', r.name, 'is_system', r.is_system),
+          'permission_codes', r.permission_codes
+        )
+        WHEN 'member.imported' THEN json_build_object(
+          'status', 'succeeded', 'total', 1 + s.subject % 500, 'created', 1 + s.subject % 500, 'failed', 0
+        )
+        WHEN 'audit.retention_updated' THEN json_build_object('days', 30 + s.subject / 12 % 12 * 30)
+      END,
+      to_timestamp(s.at)
+    FROM staged s
+    JOIN synthetic_members actor ON actor.n = s.actor
+    LEFT JOIN synthetic_members m ON m.n = s.member_n
+    LEFT JOIN synthetic_roles r ON r.n = s.role_n
+    ORDER BY s.at;
+"""
+
+
+def _create_tenant(conn: Connection, tenant: SyntheticTenant, password_hash: str) -> SyntheticTenantResult:
+    owner_id, tenant_id = conn.execute(
+        text(_BOOTSTRAP_SQL),
+        {"name": tenant.name, "slug": tenant.slug, "email": tenant.members[0], "password_hash": password_hash},
+    ).one()
+    ids = {"tenant_id": str(tenant_id), "owner_id": str(owner_id)}
+    conn.execute(text(_BIND), {"user_id": ids["owner_id"], "tenant_id": ids["tenant_id"]})
+    for name, permission_codes in ROLES[-_CUSTOM_ROLES:]:
+        conn.execute(text(_CUSTOM_ROLE_SQL), {**ids, "name": name, "permission_codes": list(permission_codes)})
+    joined = conn.execute(
+        text(_MEMBERS_SQL),
+        {
+            **ids,
+            "emails": tenant.members[1:],
+            "roles": tenant.roles[1:],
+            "role_names": _ROLE_NAMES,
+            "count": len(tenant.members) - 1,
+            "password_hash": password_hash,
+        },
+    ).rowcount
+    return SyntheticTenantResult(
+        tenant.slug, ids["tenant_id"], ids["owner_id"], tenant.members[0], 1 + joined, tenant.audit_entries
+    )
+
+
+def _insert_audit_batch(
+    tenant: SyntheticTenant, created: SyntheticTenantResult, batch: int, rows: int, seed: int, until: date, days: int
+) -> int:
+    # Seeded per batch: the same entries whichever job runs it, and when.
+    text_rows = _audit_batch(random.Random(f"{seed}:{tenant.number}:{batch}"), tenant, rows, until, days)
+    with get_sync_engine().begin() as conn:
+        conn.execute(text(_BIND), {"user_id": created.owner_id, "tenant_id": created.tenant_id})
+        # Let the trigram index collect the batch in its pending list and
+        # merge it in bulk, rather than inserting every row's trigrams.
+        conn.execute(text("SET LOCAL gin_pending_list_limit = '64MB';"))
+        conn.execute(text("SET LOCAL work_mem = '64MB';"))
+        conn.execute(text(_AUDIT_ROLES_SQL), {"tenant_id": created.tenant_id, "role_names": _ROLE_NAMES})
+        conn.execute(text(_AUDIT_MEMBERS_SQL), {"tenant_id": created.tenant_id, "emails": tenant.members})
+        conn.execute(text(_AUDIT_STAGING_SQL))
+        with conn.connection.driver_connection.cursor() as cursor:
+            with cursor.copy("COPY synthetic_audit_staging (actor, action, subject, at) FROM STDIN") as copy:
+                copy.write(text_rows)
+        conn.execute(
+            text(_AUDIT_SQL),
+            {
+                "tenant_id": created.tenant_id,
+                "actions": [action for action, _ in ACTIONS],
+                "entity_types": [entity_type for _, entity_type in ACTIONS],
+            },
+        )
+    return rows
+
+
+@contextmanager
+def _bulk_audit_load(owner: Engine) -> Iterator[None]:
+    """The search index and per-entry triggers are off inside the block, and
+    back (index rebuilt, rollups recomputed) after it, even if it fails."""
+    with owner.begin() as conn:
+        index_sql = conn.execute(
+            text("SELECT pg_get_indexdef(CAST(:name AS regclass));"), {"name": _SEARCH_INDEX}
+        ).scalar_one()
+        conn.execute(text(f"ALTER TABLE audit_log {', '.join(f'DISABLE TRIGGER {t}' for t in _BULK_TRIGGERS)};"))
+        conn.execute(text(f"DROP INDEX {_SEARCH_INDEX};"))
+    try:
+        yield
+    finally:
+        started = datetime.now(UTC)
+        with owner.begin() as conn:
+            conn.execute(text("SET LOCAL maintenance_work_mem = '1GB';"))
+            # Defined on the partitioned table: ON ONLY would skip the partitions.
+            conn.execute(text(index_sql.replace(" ON ONLY ", " ON ", 1)))
+            conn.execute(text(f"ALTER TABLE audit_log {', '.join(f'ENABLE TRIGGER {t}' for t in _BULK_TRIGGERS)};"))
+            conn.execute(text("SELECT app_rebuild_audit_daily_counts(NULL);"))
+        logger.info("search index and rollups rebuilt in %.1fs", (datetime.now(UTC) - started).total_seconds())
+
+
+def generate_synthetic_data(
+    *,
+    tenants: int,
+    users: int,
+    audit_entries: int,
+    seed: int,
+    password: str,
+    until: date,
+    days: int = 365,
+    jobs: int = 1,
+    batch_size: int = AUDIT_BATCH_SIZE,
+    owner_database_url: str | None = None,
+) -> list[SyntheticTenantResult]:
+    """Creates the planned tenants (see ``plan_tenants``), then their audit
+    entries in batches of ``batch_size``, ``jobs`` batches at a time.
+
+    Entries fall in the ``days`` UTC days before ``until``; their monthly
+    partitions are created first. Every user's password is ``password``. Each
+    tenant and each batch commits on its own. ``owner_database_url``, a role
+    owning ``audit_log``, makes the audit entries a bulk load (see above).
+    """
+    if days < 1 or jobs < 1:
+        raise ValueError("days and jobs must be at least 1")
+    plan = plan_tenants(tenants, users, audit_entries, seed)
+    # bcrypt once: all synthetic users share the hash.
+    password_hash = hash_password(password)
+    engine = get_sync_engine()
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("SELECT app_ensure_audit_partitions(CAST(:since AS timestamptz), :months_ahead);"),
+            {"since": until - timedelta(days=days), "months_ahead": settings.audit_partition_months_ahead},
+        ).all()
+
+    results: list[SyntheticTenantResult] = []
+    # In order: shared members must exist before a later tenant adds them.
+    for tenant in plan:
+        with engine.begin() as conn:
+            results.append(_create_tenant(conn, tenant, password_hash))
+        logger.info("%s: %d members", tenant.slug, results[-1].members)
+
+    batches = [
+        (tenant, created, batch, min(batch_size, tenant.audit_entries - start))
+        for tenant, created in zip(plan, results)
+        for batch, start in enumerate(range(0, tenant.audit_entries, batch_size))
+    ]
+    inserted = 0
+    owner = create_engine(sync_database_url(owner_database_url)) if owner_database_url else None
+    try:
+        with _bulk_audit_load(owner) if owner else nullcontext():
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                pending = [
+                    pool.submit(_insert_audit_batch, tenant, created, batch, rows, seed, until, days)
+                    for tenant, created, batch, rows in batches
+                ]
+                for future in as_completed(pending):
+                    inserted += future.result()
+                    logger.info("audit entries: %d/%d", inserted, audit_entries)
+    finally:
+        if owner:
+            owner.dispose()
+
+    with engine.connect() as conn:
+        for table in ("users", "memberships", "audit_log", "audit_daily_counts"):
+            conn.execute(text(f"ANALYZE {table};"))
+        conn.commit()
+    return results
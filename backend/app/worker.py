@@ -1,15 +1,113 @@
+import logging
+from datetime import UTC, datetime
+
 from celery import Celery
+from sqlalchemy import text
 
+from app.db.sync import get_sync_engine
+from app.member_import import run_member_import
 from app.settings import settings
 
+
+logger = logging.getLogger(__name__)
+
 celery_app = Celery(
     "ia_crm_worker",
     broker=settings.redis_url,
     backend=settings.redis_url,
 )
+celery_app.conf.beat_schedule = {
+    "drain-audit-outbox": {
+        "task": "tasks.drain_audit_outbox",
+        "schedule": settings.audit_drain_interval_seconds,
+        "options": {"expires": settings.audit_drain_interval_seconds},
+    },
+    "reclaim-member-imports": {
+        "task": "tasks.reclaim_member_imports",
+        "schedule": settings.member_import_stale_seconds,
+        "options": {"expires": settings.member_import_stale_seconds},
+    },
+    "maintain-audit-partitions": {
+        "task": "tasks.maintain_audit_partitions",
+        "schedule": settings.audit_maintenance_interval_seconds,
+        "options": {"expires": settings.audit_maintenance_interval_seconds},
+    },
+}
 
 
 @celery_app.task(name="tasks.ping")
 def ping() -> str:
     return "pong"
 
+
+def audit_outbox_lag() -> tuple[int, float]:
+    """(pending entries, age in seconds of the oldest one)."""
+    with get_sync_engine().connect() as conn:
+        pending, oldest = conn.execute(text("SELECT pending, oldest_created_at FROM app_audit_outbox_lag();")).one()
+    return pending, (datetime.now(UTC) - oldest).total_seconds() if oldest else 0.0
+
+
+@celery_app.task(name="tasks.drain_audit_outbox", ignore_result=True)
+def drain_audit_outbox(max_batches: int = 50) -> int:
+    """Move pending audit entries into audit_log, one batch per transaction."""
+    moved = 0
+    engine = get_sync_engine()
+    for _ in range(max_batches):
+        with engine.begin() as conn:
+            batch = conn.execute(
+                text("SELECT app_drain_audit_outbox(:limit);"), {"limit": settings.audit_drain_batch_size}
+            ).scalar_one()
+        moved += batch
+        if batch < settings.audit_drain_batch_size:
+            break
+    if moved:
+        pending, lag = audit_outbox_lag()
+        logger.info("Drained %d audit entries (%d pending, lag %.1fs)", moved, pending, lag)
+    return moved
+
+
+@celery_app.task(name="tasks.maintain_audit_partitions", ignore_result=True)
+def maintain_audit_partitions() -> list[tuple[str, str]]:
+    """Create upcoming audit_log partitions, expire old ones (and their rollup
+    rows) and BRIN-index closed months."""
+    with get_sync_engine().begin() as conn:
+        changes = [
+            (action, partition)
+            for action, partition in conn.execute(
+                text("SELECT action, partition_name FROM app_maintain_audit_partitions(:ahead, :days, :detach);"),
+                {
+                    "ahead": settings.audit_partition_months_ahead,
+                    "days": settings.audit_retention_days,
+                    "detach": settings.audit_retention_detach,
+                },
+            )
+        ]
+        pruned = conn.execute(
+            text("SELECT app_prune_audit_daily_counts(:days);"), {"days": settings.audit_retention_days}
+        ).scalar_one()
+    for action, partition in changes:
+        logger.info("Audit partition %s: %s", partition, action)
+    if pruned:
+        logger.info("Pruned %d expired audit rollup rows", pruned)
+    return changes
+
+
+@celery_app.task(name="tasks.import_members", ignore_result=True)
+def import_members(job_id: str, tenant_id: str, actor_user_id: str) -> str:
+    """Run a POST /members/import job; its rows wait in member_import_pending."""
+    return run_member_import(job_id, tenant_id, actor_user_id)
+
+
+@celery_app.task(name="tasks.reclaim_member_imports", ignore_result=True)
+def reclaim_member_imports() -> int:
+    """Re-enqueue imports whose task was lost or whose worker stopped
+    heartbeating; the job picks up its remaining lines."""
+    with get_sync_engine().connect() as conn:
+        stale = conn.execute(
+            text("SELECT job_id, tenant_id, actor_user_id FROM app_stale_member_imports(:seconds);"),
+            {"seconds": settings.member_import_stale_seconds},
+        ).all()
+    for job_id, tenant_id, actor_user_id in stale:
+        logger.warning("Re-enqueueing stale member import %s", job_id)
+        import_members.delay(str(job_id), str(tenant_id), str(actor_user_id))
+    return len(stale)
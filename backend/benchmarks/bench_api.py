@@ -0,0 +1,323 @@
+"""Throughput and p50/p95/p99 latency of the main API endpoints, saved as JSON to compare commits.
+
+Seeds one tenant with BENCH_MEMBERS members (default 500, sharing one
+password hash) and BENCH_AUDIT_ENTRIES audit entries (default 50000, spread
+over the last 90 days), then runs every scenario at each concurrency of
+BENCH_CONCURRENCY (default "1,16"): BENCH_WARMUP requests (default 20), then
+BENCH_REQUESTS timed ones (default 200). BENCH_SCENARIOS (comma-separated
+names, as printed) runs a subset.
+
+The app runs in-process (httpx ASGITransport, lifespan included, sharing the
+benchmark's event loop), or set BENCH_BASE_URL to measure a running server
+(e.g. uvicorn with several workers); seeding always goes through DATABASE_URL.
+
+Results are written to BENCH_OUTPUT (default
+benchmarks/results/<UTC time>-<commit>.json). With BENCH_BASELINE set to an
+earlier results file, scenarios whose p95 grew, or throughput fell, by more
+than BENCH_TOLERANCE (default 0.2) are listed and the exit status is 1.
+
+Usage (needs a migrated database, same env as the test suite):
+
+    DATABASE_URL=... BOOTSTRAP_TOKEN=... python -m benchmarks.bench_api
+    BENCH_BASELINE=benchmarks/results/<earlier>.json ... python -m benchmarks.bench_api
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+import httpx
+from sqlalchemy import text
+
+from app.auth.password import hash_password
+from app.db.sync import get_sync_engine
+from app.main import create_app
+
+
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "200"))
+WARMUP = int(os.environ.get("BENCH_WARMUP", "20"))
+CONCURRENCY = [int(c) for c in os.environ.get("BENCH_CONCURRENCY", "1,16").split(",")]
+MEMBERS = int(os.environ.get("BENCH_MEMBERS", "500"))
+AUDIT_ENTRIES = int(os.environ.get("BENCH_AUDIT_ENTRIES", "50000"))
+SCENARIOS = [s.strip() for s in os.environ.get("BENCH_SCENARIOS", "").split(",") if s.strip()]
+BASE_URL = os.environ.get("BENCH_BASE_URL", "")
+OUTPUT = os.environ.get("BENCH_OUTPUT", "")
+BASELINE = os.environ.get("BENCH_BASELINE", "")
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", "0.2"))
+
+PASSWORD = "passw0rd"
+
+_BIND = "SELECT set_config('app.user_id', :user_id, true), set_config('app.tenant_id', :tenant_id, true);"
+
+_SEED_MEMBERS = """
+    WITH users AS (
+      SELECT user_id
+      FROM app_upsert_users(CAST(:emails AS citext[]), array_fill(CAST(:password_hash AS text), ARRAY[:n]))
+    )
+    INSERT INTO memberships (tenant_id, user_id, role_id)
+    SELECT :tenant_id, user_id, :role_id FROM users
+    ON CONFLICT DO NOTHING;
+"""
+
+# Realistic mix: mostly member and role changes, 20 actors (a few doing most
+# of it), emails of the members in the payloads for the ``q`` search.
+_SEED_AUDIT = """
+    WITH actors AS (
+      SELECT array_agg(user_id) AS ids
+      FROM (SELECT user_id FROM memberships WHERE tenant_id = CAST(:tenant_id AS uuid) LIMIT 20) m
+    )
+    INSERT INTO audit_log (tenant_id, actor_user_id, action, entity_type, entity_id, before, after, created_at)
+    SELECT
+      CAST(:tenant_id AS uuid),
+      a.ids[1 + (g * g) % cardinality(a.ids)],
+      (ARRAY['member.created', 'member.updated', 'role.updated', 'role.created', 'member.imported'])[1 + g % 5],
+      (ARRAY['membership', 'membership', 'role', 'role', 'member_import'])[1 + g % 5],
+      md5(g::text)::uuid,
+      CASE WHEN g % 5 IN (1, 2) THEN jsonb_build_object('name', 'Role ' || (g % 40)) END,
+      jsonb_build_object('email', 'bench-member-' || (g % :members) || '@example.com', 'name', 'Role ' || (g % 40)),
+      now() - (g % 90) * interval '1 day' - (g % 86400) * interval '1 second'
+    FROM generate_series(1, :entries) g, actors a;
+"""
+
+
+@dataclass(slots=True)
+class Fixture:
+    headers: dict[str, str]
+    member_role_id: str
+    patch_role_id: str
+    login_email: str
+    suffix: str
+
+
+# name -> builds (method, url, json body) for request number i.
+Scenario = Callable[[Fixture, int], tuple[str, str, dict[str, Any] | None]]
+
+_SCENARIOS: dict[str, Scenario] = {
+    "POST /auth/login": lambda f, i: ("POST", "/auth/login", {"email": f.login_email, "password": PASSWORD}),
+    "GET /auth/me": lambda f, i: ("GET", "/auth/me", None),
+    "GET /members": lambda f, i: ("GET", "/members", None),
+    "GET /roles": lambda f, i: ("GET", "/roles", None),
+    "GET /audit": lambda f, i: ("GET", "/audit", None),
+    "GET /audit?q=": lambda f, i: ("GET", f"/audit?q=bench-member-{i % 97}@", None),
+    "POST /roles": lambda f, i: (
+        "POST",
+        "/roles",
+        {"name": f"Bench {f.suffix} {i}", "permission_codes": ["roles:read", "members:read"]},
+    ),
+    "PATCH /roles/{role_id}": lambda f, i: (
+        "PATCH",
+        f"/roles/{f.patch_role_id}",
+        {"permission_codes": ["roles:read"] if i % 2 else ["roles:read", "members:read"]},
+    ),
+    "POST /members": lambda f, i: (
+        "POST",
+        "/members",
+        {"email": f"bench-new-{f.suffix}-{i}@example.com", "password": PASSWORD, "role_id": f.member_role_id},
+    ),
+}
+
+
+@asynccontextmanager
+async def _client() -> AsyncIterator[httpx.AsyncClient]:
+    if BASE_URL:
+        async with httpx.AsyncClient(base_url=BASE_URL, timeout=60) as client:
+            yield client
+        return
+    # Slow requests are what is being measured; their budget warnings
+    # (app.db.instrumentation) would drown the results.
+    logging.getLogger("app.db.instrumentation").setLevel(logging.ERROR)
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+
+def _seed(tenant_id: str, user_id: str, member_role_id: str, suffix: str) -> str:
+    ids = {"tenant_id": tenant_id, "user_id": user_id}
+    emails = [f"bench-{suffix}-member-{i}@example.com" for i in range(MEMBERS)]
+    started = time.perf_counter()
+    with get_sync_engine().begin() as conn:
+        conn.execute(text(_BIND), ids)
+        conn.execute(
+            text(_SEED_MEMBERS),
+            {
+                **ids,
+                "emails": emails,
+                "password_hash": hash_password(PASSWORD),
+                "n": len(emails),
+                "role_id": member_role_id,
+            },
+        )
+        conn.execute(text(_SEED_AUDIT), {**ids, "entries": AUDIT_ENTRIES, "members": max(MEMBERS, 1)})
+    with get_sync_engine().connect() as conn:
+        conn.execute(text("ANALYZE memberships;"))
+        conn.execute(text("ANALYZE audit_log;"))
+        conn.commit()
+    print(f"seeded {MEMBERS} members and {AUDIT_ENTRIES} audit entries in {time.perf_counter() - started:.1f}s")
+    return emails[0] if emails else f"bench-{suffix}@example.com"
+
+
+async def _setup(client: httpx.AsyncClient, bootstrap_token: str) -> Fixture:
+    suffix = uuid4().hex[:8]
+    resp = await client.post(
+        "/auth/bootstrap",
+        headers={"X-Bootstrap-Token": bootstrap_token},
+        json={
+            "tenant_name": "Bench API",
+            "tenant_slug": f"bench-api-{suffix}",
+            "email": f"bench-{suffix}@example.com",
+            "password": PASSWORD,
+        },
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    headers = {"Authorization": f"Bearer {data['token']}", "X-Tenant-ID": data["tenant"]["id"]}
+    roles = {r["name"]: r["id"] for r in (await client.get("/roles", headers=headers)).raise_for_status().json()}
+    login_email = await asyncio.to_thread(_seed, data["tenant"]["id"], data["user"]["id"], roles["Member"], suffix)
+    patch_role = await client.post(
+        "/roles", headers=headers, json={"name": f"Bench patched {suffix}", "permission_codes": ["roles:read"]}
+    )
+    patch_role.raise_for_status()
+    return Fixture(headers, roles["Member"], patch_role.json()["id"], login_email, suffix)
+
+
+async def _measure(
+    client: httpx.AsyncClient, fixture: Fixture, scenario: Scenario, concurrency: int, counter: itertools.count
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+
+    async def _worker(requests: int, record: bool) -> None:
+        nonlocal errors
+        for _ in range(requests):
+            method, url, body = scenario(fixture, next(counter))
+            started = time.perf_counter()
+            resp = await client.request(method, url, headers=fixture.headers, json=body)
+            elapsed = time.perf_counter() - started
+            if record:
+                latencies.append(elapsed * 1e3)
+                errors += resp.status_code >= 400
+
+    def _split(total: int) -> list[int]:
+        return [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+
+    await asyncio.gather(*(_worker(n, False) for n in _split(WARMUP)))
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker(n, True) for n in _split(REQUESTS)))
+    wall = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / wall,
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": percentiles[49],
+        "p95_ms": percentiles[94],
+        "p99_ms": percentiles[98],
+    }
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _regressions(results: list[dict[str, Any]], baseline: dict[str, Any]) -> list[str]:
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    found = []
+    for r in results:
+        b = before.get((r["scenario"], r["concurrency"]))
+        if b is None:
+            continue
+        if r["p95_ms"] > b["p95_ms"] * (1 + TOLERANCE):
+            found.append(f"{r['scenario']} c={r['concurrency']}: p95 {b['p95_ms']:.1f} -> {r['p95_ms']:.1f} ms")
+        if r["throughput"] < b["throughput"] * (1 - TOLERANCE):
+            found.append(
+                f"{r['scenario']} c={r['concurrency']}: throughput {b['throughput']:.1f} -> {r['throughput']:.1f}/s"
+            )
+    return found
+
+
+async def main() -> int:
+    bootstrap_token = os.environ.get("BOOTSTRAP_TOKEN", "")
+    if not os.environ.get("DATABASE_URL") or not bootstrap_token:
+        print("DATABASE_URL and BOOTSTRAP_TOKEN are required", file=sys.stderr)
+        return 2
+    unknown = set(SCENARIOS) - set(_SCENARIOS)
+    if unknown:
+        print(f"unknown scenarios: {', '.join(sorted(unknown))}; known: {', '.join(_SCENARIOS)}", file=sys.stderr)
+        return 2
+
+    results = []
+    async with _client() as client:
+        fixture = await _setup(client, bootstrap_token)
+        counter = itertools.count()
+        for name, scenario in _SCENARIOS.items():
+            if SCENARIOS and name not in SCENARIOS:
+                continue
+            for concurrency in CONCURRENCY:
+                results.append({"scenario": name, **await _measure(client, fixture, scenario, concurrency, counter)})
+
+    commit = _commit()
+    now = datetime.now(UTC)
+    report = {
+        "commit": commit,
+        "created_at": now.isoformat(),
+        "target": BASE_URL or "in-process",
+        "config": {
+            "requests": REQUESTS,
+            "warmup": WARMUP,
+            "concurrency": CONCURRENCY,
+            "members": MEMBERS,
+            "audit_entries": AUDIT_ENTRIES,
+        },
+        "results": results,
+    }
+    output = Path(OUTPUT or f"benchmarks/results/{now:%Y%m%dT%H%M%SZ}-{commit or 'unknown'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+
+    print(f"{REQUESTS} requests per scenario and concurrency, {report['target']}, commit {commit}")
+    print(f"{'scenario':<24} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for r in results:
+        print(
+            f"{r['scenario']:<24} {r['concurrency']:>5} {r['throughput']:>9.1f} {r['p50_ms']:>9.2f}"
+            f" {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}"
+        )
+    print(f"results written to {output}")
+
+    if BASELINE:
+        regressions = _regressions(results, json.loads(Path(BASELINE).read_text()))
+        if regressions:
+            print(f"regressions against {BASELINE} (tolerance {TOLERANCE:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"no regressions against {BASELINE} (tolerance {TOLERANCE:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
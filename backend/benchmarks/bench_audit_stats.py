@@ -0,0 +1,121 @@
+"""GET /audit/stats latency from the rollup vs the same aggregate computed over audit_log.
+
+Seeds BENCH_ENTRIES audit entries (default 200k) for a fresh tenant, spread
+over the last 90 days, 12 actions, 4 entity types and 25 actors, then times
+the endpoint against the GROUPING SETS query it would otherwise have to run
+on audit_log itself.
+
+Usage (needs a migrated database, same env as the test suite):
+
+    DATABASE_URL=... BOOTSTRAP_TOKEN=... python -m benchmarks.bench_audit_stats
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.sync import get_sync_engine
+from app.main import create_app
+
+
+ENTRIES = int(os.environ.get("BENCH_ENTRIES", "200000"))
+ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", "20"))
+
+_BIND = "SELECT set_config('app.user_id', :user_id, true), set_config('app.tenant_id', :tenant_id, true);"
+
+_RAW_AGGREGATE = """
+    SELECT sum(1)
+    FROM (
+      SELECT count(*)
+      FROM audit_log a
+      WHERE a.tenant_id = :tenant_id AND a.created_at >= now() - interval '30 days'
+      GROUP BY GROUPING SETS (
+        ((a.created_at AT TIME ZONE 'UTC')::date), (a.action), (a.entity_type), (a.actor_user_id), ()
+      )
+    ) s;
+"""
+
+
+def _timed(fn) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - started) / ITERATIONS * 1e3
+
+
+def main() -> int:
+    bootstrap_token = os.environ.get("BOOTSTRAP_TOKEN", "")
+    if not os.environ.get("DATABASE_URL") or not bootstrap_token:
+        print("DATABASE_URL and BOOTSTRAP_TOKEN are required", file=sys.stderr)
+        return 1
+
+    with TestClient(create_app()) as client:
+        suffix = uuid4().hex[:8]
+        resp = client.post(
+            "/auth/bootstrap",
+            headers={"X-Bootstrap-Token": bootstrap_token},
+            json={
+                "tenant_name": "Bench stats",
+                "tenant_slug": f"bench-stats-{suffix}",
+                "email": f"bench-stats-{suffix}@example.com",
+                "password": "passw0rd",
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        tenant_id, user_id = data["tenant"]["id"], data["user"]["id"]
+        headers = {"Authorization": f"Bearer {data['token']}", "X-Tenant-ID": tenant_id}
+        ids = {"tenant_id": tenant_id, "user_id": user_id}
+
+        started = time.perf_counter()
+        with get_sync_engine().begin() as conn:
+            conn.execute(text(_BIND), ids)
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO audit_log (tenant_id, actor_user_id, action, entity_type, created_at)
+                    SELECT :tenant_id,
+                           CASE WHEN g % 25 = 0 THEN CAST(:user_id AS uuid) ELSE md5((g % 25)::text)::uuid END,
+                           'action.' || (g % 12), 'entity' || (g % 4),
+                           now() - (g % 90) * interval '1 day' - (g % 86400) * interval '1 second'
+                    FROM generate_series(1, :entries) g;
+                    """
+                ),
+                {**ids, "entries": ENTRIES},
+            )
+        print(f"seeded {ENTRIES} entries in {time.perf_counter() - started:.1f}s")
+
+        def endpoint() -> None:
+            client.get("/audit/stats", headers=headers).raise_for_status()
+
+        with get_sync_engine().connect() as conn:
+            conn.execute(text("ANALYZE audit_log;"))
+            conn.execute(text("ANALYZE audit_daily_counts;"))
+            conn.commit()
+
+            def raw() -> None:
+                with conn.begin():
+                    conn.execute(text(_BIND), ids)
+                    conn.execute(text(_RAW_AGGREGATE), {"tenant_id": tenant_id}).scalar_one()
+
+            rows = [
+                ("GET /audit/stats (rollup)", _timed(endpoint)),
+                ("aggregate over audit_log", _timed(raw)),
+            ]
+
+    print(f"30-day facets + series, {ENTRIES} entries, x{ITERATIONS}")
+    print(f"{'mode':<28} {'ms/request':>12}")
+    for label, ms in rows:
+        print(f"{label:<28} {ms:>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""Throughput of a write endpoint (POST /roles) with audit entries written inline vs through the outbox.
+
+"inline" reproduces the previous behaviour (INSERT INTO audit_log in the
+request transaction, maintaining every audit_log index); "outbox" is the
+current statement, which enqueues the entry. The drain rate of the queued
+entries is reported too.
+
+Usage (needs a migrated database, same env as the test suite):
+
+    DATABASE_URL=... BOOTSTRAP_TOKEN=... python -m benchmarks.bench_audit_writes
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from uuid import uuid4
+
+import httpx
+from sqlalchemy import text
+
+from app.api import roles as roles_api
+from app.main import create_app
+from app.worker import drain_audit_outbox
+
+
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "400"))
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", "16"))
+
+
+async def _write_burst(client: httpx.AsyncClient, headers: dict[str, str], label: str) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def _create(i: int) -> None:
+        async with semaphore:
+            resp = await client.post(
+                "/roles", headers=headers, json={"name": f"{label} {i}", "permission_codes": ["roles:read"]}
+            )
+            resp.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_create(i) for i in range(REQUESTS)))
+    return REQUESTS / (time.perf_counter() - started)
+
+
+async def main() -> int:
+    bootstrap_token = os.environ.get("BOOTSTRAP_TOKEN", "")
+    if not os.environ.get("DATABASE_URL") or not bootstrap_token:
+        print("DATABASE_URL and BOOTSTRAP_TOKEN are required", file=sys.stderr)
+        return 2
+
+    suffix = uuid4().hex[:8]
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        resp = await client.post(
+            "/auth/bootstrap",
+            headers={"X-Bootstrap-Token": bootstrap_token},
+            json={
+                "tenant_name": "Audit writes",
+                "tenant_slug": f"audit-writes-{suffix}",
+                "email": f"audit-writes-{suffix}@example.com",
+                "password": "passw0rd",
+            },
+        )
+        resp.raise_for_status()
+        headers = {"Authorization": f"Bearer {resp.json()['token']}", "X-Tenant-ID": resp.json()["tenant"]["id"]}
+
+        outbox_sql = roles_api._CREATE_ROLE_SQL
+        inline_sql = text(outbox_sql.text.replace("INSERT INTO audit_outbox", "INSERT INTO audit_log"))
+        rows = []
+        for label, statement in (("inline", inline_sql), ("outbox", outbox_sql)):
+            roles_api._CREATE_ROLE_SQL = statement
+            rows.append((label, await _write_burst(client, headers, label)))
+        roles_api._CREATE_ROLE_SQL = outbox_sql
+
+    started = time.perf_counter()
+    drained = await asyncio.to_thread(drain_audit_outbox, 1000)
+    drain_rate = drained / (time.perf_counter() - started) if drained else 0.0
+
+    print(f"POST /roles x{REQUESTS} at concurrency {CONCURRENCY}")
+    print(f"{'audit write':<12} {'requests/s':>11}")
+    for label, throughput in rows:
+        print(f"{label:<12} {throughput:>11.1f}")
+    print(f"drained {drained} outbox entries at {drain_rate:.0f} entries/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
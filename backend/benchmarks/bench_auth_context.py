@@ -0,0 +1,85 @@
+"""Per-request DB statements for a tenant-scoped endpoint, with and without the auth context cache.
+
+Usage (needs a migrated database, same env as the test suite):
+
+    DATABASE_URL=... BOOTSTRAP_TOKEN=... python -m benchmarks.bench_auth_context
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.auth.cache import auth_context_cache
+from app.db.engine import get_async_engine
+from app.main import create_app
+
+
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "200"))
+
+
+def main() -> int:
+    bootstrap_token = os.environ.get("BOOTSTRAP_TOKEN", "")
+    if not os.environ.get("DATABASE_URL") or not bootstrap_token:
+        print("DATABASE_URL and BOOTSTRAP_TOKEN are required", file=sys.stderr)
+        return 2
+
+    statements = 0
+
+    def _count(*_args: object) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", _count)
+
+    with TestClient(create_app()) as client:
+        suffix = uuid4().hex[:8]
+        resp = client.post(
+            "/auth/bootstrap",
+            headers={"X-Bootstrap-Token": bootstrap_token},
+            json={
+                "tenant_name": "Bench",
+                "tenant_slug": f"bench-{suffix}",
+                "email": f"bench-{suffix}@example.com",
+                "password": "passw0rd",
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        headers = {"Authorization": f"Bearer {data['token']}", "X-Tenant-ID": data["tenant"]["id"]}
+
+        deadline = time.monotonic() + 5
+        while not auth_context_cache.enabled and time.monotonic() < deadline:
+            time.sleep(0.05)
+        listener_ready = auth_context_cache.enabled
+
+        results = []
+        for label, enabled in (("cache disabled", False), ("cache enabled", True)):
+            if enabled and not listener_ready:
+                print("NOTIFY listener did not connect; skipping cached run", file=sys.stderr)
+                continue
+            auth_context_cache.enabled = enabled
+            auth_context_cache.clear()
+            client.get("/roles", headers=headers).raise_for_status()  # warm-up (fills the cache)
+            statements = 0
+            started = time.perf_counter()
+            for _ in range(REQUESTS):
+                client.get("/roles", headers=headers).raise_for_status()
+            elapsed = time.perf_counter() - started
+            results.append((label, statements / REQUESTS, elapsed / REQUESTS * 1000))
+
+    print(f"GET /roles x{REQUESTS}")
+    print(f"{'mode':<16} {'statements/request':>20} {'ms/request':>12}")
+    for label, per_request, ms in results:
+        print(f"{label:<16} {per_request:>20.2f} {ms:>12.2f}")
+    print(f"cache stats: {auth_context_cache.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,62 @@
+"""Microbenchmark of token authentication (get_current_user_id) with and without the verified-JWT cache.
+
+The auth context cache is pre-filled and the session only records statements,
+so the numbers isolate token handling. No database is needed:
+
+    python -m benchmarks.bench_jwt_cache
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from uuid import uuid4
+
+from app.auth import jwt as jwt_module
+from app.auth.cache import AuthContext, auth_context_cache
+from app.auth.deps import get_current_user_id, get_token_user_id
+from app.auth.jwt import VerifiedTokenCache, create_access_token
+
+
+ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", "20000"))
+
+
+class _NullSession:
+    async def execute(self, *_args: object, **_kwargs: object) -> None:
+        return None
+
+
+async def _authenticate(session: _NullSession, token: str) -> None:
+    await get_current_user_id(session=session, user_id=await get_token_user_id(token))
+
+
+async def main() -> int:
+    user_id = uuid4()
+    token = create_access_token(user_id=user_id)
+    auth_context_cache.enabled = True
+    auth_context_cache.put(
+        AuthContext(user_id=user_id, tenant_id=None, is_active=True, role_id=None, permission_mask=0),
+        generation=auth_context_cache.generation,
+    )
+    session = _NullSession()
+
+    rows = []
+    for label, max_entries in (("no cache", 0), ("cached", 10000)):
+        jwt_module.verified_token_cache = VerifiedTokenCache(max_entries=max_entries)
+        await _authenticate(session, token)
+        started = time.perf_counter()
+        for _ in range(ITERATIONS):
+            await _authenticate(session, token)
+        elapsed = time.perf_counter() - started
+        rows.append((label, elapsed / ITERATIONS * 1e6, jwt_module.verified_token_cache.stats()))
+
+    print(f"get_current_user_id x{ITERATIONS} (same token)")
+    print(f"{'mode':<10} {'us/call':>10}  cache stats")
+    for label, per_call, stats in rows:
+        print(f"{label:<10} {per_call:>10.2f}  {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,107 @@
+"""Latency of an unrelated endpoint (GET /health) while a login storm runs on the same worker.
+
+Compares bcrypt run inline on the event loop against the process-pool hasher.
+
+Usage (needs a migrated database, same env as the test suite):
+
+    DATABASE_URL=... BOOTSTRAP_TOKEN=... python -m benchmarks.bench_login_storm
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+import httpx
+
+from app.auth.password import password_hasher
+from app.main import create_app
+
+
+LOGINS = int(os.environ.get("BENCH_LOGINS", "64"))
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", "8"))
+PROBE_INTERVAL = 0.01
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event, samples: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        (await client.get("/health")).raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL)
+
+
+async def _storm(client: httpx.AsyncClient, credentials: dict) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def _login() -> None:
+        async with semaphore:
+            (await client.post("/auth/login", json=credentials)).raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_login() for _ in range(LOGINS)))
+    return LOGINS / (time.perf_counter() - started)
+
+
+async def _run(client: httpx.AsyncClient, credentials: dict, *, storm: bool) -> tuple[list[float], float]:
+    stop = asyncio.Event()
+    samples: list[float] = []
+    probe = asyncio.create_task(_probe(client, stop, samples))
+    if storm:
+        throughput = await _storm(client, credentials)
+    else:
+        await asyncio.sleep(1)
+        throughput = 0.0
+    stop.set()
+    await probe
+    return samples, throughput
+
+
+async def main() -> int:
+    bootstrap_token = os.environ.get("BOOTSTRAP_TOKEN", "")
+    if not os.environ.get("DATABASE_URL") or not bootstrap_token:
+        print("DATABASE_URL and BOOTSTRAP_TOKEN are required", file=sys.stderr)
+        return 2
+
+    suffix = uuid4().hex[:8]
+    credentials = {"email": f"storm-{suffix}@example.com", "password": "passw0rd"}
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        (
+            await client.post(
+                "/auth/bootstrap",
+                headers={"X-Bootstrap-Token": bootstrap_token},
+                json={"tenant_name": "Storm", "tenant_slug": f"storm-{suffix}", **credentials},
+            )
+        ).raise_for_status()
+
+        pool_workers = password_hasher.max_workers or (os.cpu_count() or 1)
+        rows = []
+        for label, workers, storm in (
+            ("idle", pool_workers, False),
+            ("inline bcrypt", 0, True),
+            (f"process pool ({pool_workers})", pool_workers, True),
+        ):
+            password_hasher.max_workers = workers
+            samples, throughput = await _run(client, credentials, storm=storm)
+            rows.append((label, statistics.median(samples), _percentile(samples, 99), throughput))
+        password_hasher.shutdown()
+
+    print(f"{LOGINS} logins at concurrency {CONCURRENCY}; probe = GET /health every {PROBE_INTERVAL * 1000:.0f} ms")
+    print(f"{'mode':<22} {'probe p50 ms':>13} {'probe p99 ms':>13} {'logins/s':>10}")
+    for label, p50, p99, throughput in rows:
+        print(f"{label:<22} {p50:>13.2f} {p99:>13.2f} {throughput:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,131 @@
+"""RLS overhead of a full scan of a BENCH_ROWS-row table (default 1M), by policy.
+
+"per-row" is the policy shape of migration 0002 (``app_is_member()`` called
+for every candidate row); "snapshot" is the one of migration 0014
+(``app_has_tenant_access()`` evaluated once per query), with the context bound
+by ``app_bind_context()`` (signed, membership checked once per transaction) or
+by plain ``set_config()`` (unsigned, membership looked up once per query).
+The rows live in a temporary table owned by the benchmark's connection, all
+in one fresh tenant, so every row passes the policy.
+
+Usage (needs a migrated database, same env as the test suite):
+
+    DATABASE_URL=... BOOTSTRAP_TOKEN=... python -m benchmarks.bench_rls_overhead
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import Connection, text
+
+from app.db.sync import get_sync_engine
+from app.main import create_app
+
+
+ROWS = int(os.environ.get("BENCH_ROWS", "1000000"))
+ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", "3"))
+
+_SET_CONFIG = "SELECT set_config('app.user_id', :user_id, true), set_config('app.tenant_id', :tenant_id, true);"
+_BIND_CONTEXT = "SELECT app_bind_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid));"
+
+_PER_ROW = "tenant_id = app_current_tenant_id() AND app_is_member(tenant_id, app_current_user_id())"
+_SNAPSHOT = "tenant_id = (SELECT app_current_tenant_id()) AND (SELECT app_has_tenant_access())"
+
+# (label, policy, binding); no policy means RLS disabled.
+_VARIANTS = [
+    ("no RLS", None, _BIND_CONTEXT),
+    ("per-row (before)", _PER_ROW, _SET_CONFIG),
+    ("snapshot, unsigned", _SNAPSHOT, _SET_CONFIG),
+    ("snapshot, signed (after)", _SNAPSHOT, _BIND_CONTEXT),
+]
+
+_SCAN = "SELECT count(*), sum(length(payload)) FROM bench_rls_rows;"
+
+
+def _scan_ms(conn: Connection, binding: str, ids: dict[str, str]) -> float:
+    timings = []
+    for _ in range(ITERATIONS + 1):
+        with conn.begin():
+            conn.execute(text(binding), ids)
+            started = time.perf_counter()
+            count, _ = conn.execute(text(_SCAN)).one()
+            timings.append((time.perf_counter() - started) * 1e3)
+        assert count == ROWS, count
+    # The first scan warms the cache.
+    return statistics.median(timings[1:])
+
+
+def main() -> int:
+    bootstrap_token = os.environ.get("BOOTSTRAP_TOKEN", "")
+    if not os.environ.get("DATABASE_URL") or not bootstrap_token:
+        print("DATABASE_URL and BOOTSTRAP_TOKEN are required", file=sys.stderr)
+        return 1
+
+    with TestClient(create_app()) as client:
+        suffix = uuid4().hex[:8]
+        resp = client.post(
+            "/auth/bootstrap",
+            headers={"X-Bootstrap-Token": bootstrap_token},
+            json={
+                "tenant_name": "Bench RLS",
+                "tenant_slug": f"bench-rls-{suffix}",
+                "email": f"bench-rls-{suffix}@example.com",
+                "password": "passw0rd",
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    ids = {"tenant_id": data["tenant"]["id"], "user_id": data["user"]["id"]}
+
+    rows = []
+    with get_sync_engine().connect() as conn:
+        with conn.begin():
+            conn.execute(
+                text(
+                    """
+                    CREATE TEMP TABLE bench_rls_rows (id bigint PRIMARY KEY, tenant_id uuid NOT NULL, payload text);
+                    """
+                )
+            )
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO bench_rls_rows (id, tenant_id, payload)
+                    SELECT i, CAST(:tenant_id AS uuid), md5(i::text) FROM generate_series(1, :rows) AS i;
+                    """
+                ),
+                {"tenant_id": ids["tenant_id"], "rows": ROWS},
+            )
+            conn.execute(text("ANALYZE bench_rls_rows;"))
+            conn.execute(text(f"CREATE POLICY bench_rls_rows_access ON bench_rls_rows USING ({_SNAPSHOT});"))
+        try:
+            for label, policy, binding in _VARIANTS:
+                with conn.begin():
+                    if policy is None:
+                        conn.execute(text("ALTER TABLE bench_rls_rows NO FORCE ROW LEVEL SECURITY;"))
+                        conn.execute(text("ALTER TABLE bench_rls_rows DISABLE ROW LEVEL SECURITY;"))
+                    else:
+                        conn.execute(text("ALTER TABLE bench_rls_rows ENABLE ROW LEVEL SECURITY;"))
+                        conn.execute(text("ALTER TABLE bench_rls_rows FORCE ROW LEVEL SECURITY;"))
+                        conn.execute(text(f"ALTER POLICY bench_rls_rows_access ON bench_rls_rows USING ({policy});"))
+                rows.append((label, _scan_ms(conn, binding, ids)))
+        finally:
+            with conn.begin():
+                conn.execute(text("DROP TABLE bench_rls_rows;"))
+
+    baseline = rows[0][1]
+    print(f"Full scan of {ROWS} rows under RLS, median of {ITERATIONS}")
+    print(f"{'policy':<26} {'ms/scan':>9} {'overhead':>10}")
+    for label, ms in rows:
+        print(f"{label:<26} {ms:>9.1f} {(ms - baseline) / baseline:>10.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,196 @@
+"""Role updates with 50 permission codes: per-code statements vs the set-based path.
+
+"per-code" reproduces the previous update_role() (read role and codes, delete
+every grant, one INSERT per code, re-read, enqueue the audit entry); "set-based"
+is the current endpoint. Each update swaps BENCH_CHANGED codes of the role's 50
+in and out. BENCH_PERMISSIONS throwaway ``bench:perm-NN`` codes are added to
+the catalog for the run and removed afterwards.
+
+Usage (needs a migrated database, same env as the test suite):
+
+    DATABASE_URL=... BOOTSTRAP_TOKEN=... python -m benchmarks.bench_role_writes
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from uuid import UUID, uuid4
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import roles as roles_api
+from app.audit import enqueue_audit
+from app.db.context import get_db_app_context, set_db_app_context
+from app.db.session import db_transaction
+from app.main import create_app
+
+
+ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", "200"))
+PERMISSIONS = int(os.environ.get("BENCH_PERMISSIONS", "50"))
+CHANGED = int(os.environ.get("BENCH_CHANGED", "5"))
+
+_ROLE_SQL = """
+    SELECT
+      r.id,
+      r.name,
+      r.is_system,
+      r.created_at,
+      COALESCE(array_agg(rp.permission_code ORDER BY rp.permission_code)
+               FILTER (WHERE rp.permission_code IS NOT NULL), ARRAY[]::text[]) AS permission_codes
+    FROM roles r
+    LEFT JOIN role_permissions rp ON rp.role_id = r.id
+    WHERE r.tenant_id = :tenant_id AND r.id = :role_id
+    GROUP BY r.id;
+"""
+
+
+async def _per_code_update(
+    session: AsyncSession,
+    *,
+    tenant_id: UUID,
+    actor_user_id: UUID,
+    role_id: UUID,
+    body: roles_api.UpdateRoleRequest,
+) -> dict:
+    await set_db_app_context(session, tenant_id=tenant_id)
+    params = {"tenant_id": str(tenant_id), "role_id": str(role_id)}
+    before = (
+        await session.execute(
+            text("SELECT id, name, is_system FROM roles WHERE tenant_id = :tenant_id AND id = :role_id;"), params
+        )
+    ).mappings().one()
+    before_codes = (
+        await session.execute(
+            text(
+                "SELECT permission_code FROM role_permissions"
+                " WHERE tenant_id = :tenant_id AND role_id = :role_id ORDER BY permission_code ASC;"
+            ),
+            params,
+        )
+    ).scalars().all()
+    if body.name is not None:
+        await session.execute(
+            text("UPDATE roles SET name = :name, updated_at = now() WHERE tenant_id = :tenant_id AND id = :role_id;"),
+            {**params, "name": body.name},
+        )
+    if body.permission_codes is not None:
+        await session.execute(
+            text("DELETE FROM role_permissions WHERE tenant_id = :tenant_id AND role_id = :role_id;"), params
+        )
+        for code in body.permission_codes:
+            await session.execute(
+                text(
+                    """
+                    INSERT INTO role_permissions (role_id, permission_code, tenant_id)
+                    VALUES (:role_id, :permission_code, :tenant_id)
+                    ON CONFLICT (role_id, permission_code) DO NOTHING;
+                    """
+                ),
+                {**params, "permission_code": code},
+            )
+    after = (await session.execute(text(_ROLE_SQL), params)).mappings().one()
+    await enqueue_audit(
+        session,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        action="role.updated",
+        entity_type="role",
+        entity_id=role_id,
+        before={"role": dict(before), "permission_codes": before_codes},
+        after={"role": dict(after), "permission_codes": after["permission_codes"]},
+    )
+    return after
+
+
+async def _set_based_update(
+    session: AsyncSession,
+    *,
+    tenant_id: UUID,
+    actor_user_id: UUID,
+    role_id: UUID,
+    body: roles_api.UpdateRoleRequest,
+) -> dict:
+    return await roles_api.update_role(role_id=role_id, ctx=(tenant_id, actor_user_id), session=session, body=body)
+
+
+async def _run(update, ids: dict[str, UUID], codes: list[str]) -> tuple[float, float]:
+    base, spare = codes[:PERMISSIONS], codes[PERMISSIONS:]
+    variants = [base, base[CHANGED:] + spare]
+    statements = 0
+    started = time.perf_counter()
+    for i in range(ITERATIONS):
+        async with db_transaction() as session:
+            await set_db_app_context(session, user_id=ids["actor_user_id"])
+            body = roles_api.UpdateRoleRequest(permission_codes=variants[i % 2])
+            after = await update(session, body=body, **ids)
+            assert after["permission_codes"] == sorted(variants[i % 2])
+            statements += get_db_app_context(session).statements
+    elapsed = time.perf_counter() - started
+    # The user binding is the caller's (auth) statement, not the update's.
+    return statements / ITERATIONS - 1, elapsed / ITERATIONS * 1e3
+
+
+async def main() -> int:
+    bootstrap_token = os.environ.get("BOOTSTRAP_TOKEN", "")
+    if not os.environ.get("DATABASE_URL") or not bootstrap_token:
+        print("DATABASE_URL and BOOTSTRAP_TOKEN are required", file=sys.stderr)
+        return 2
+
+    suffix = uuid4().hex[:8]
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        resp = await client.post(
+            "/auth/bootstrap",
+            headers={"X-Bootstrap-Token": bootstrap_token},
+            json={
+                "tenant_name": "Role writes",
+                "tenant_slug": f"role-writes-{suffix}",
+                "email": f"role-writes-{suffix}@example.com",
+                "password": "passw0rd",
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        tenant_id, actor_user_id = UUID(data["tenant"]["id"]), UUID(data["user"]["id"])
+        headers = {"Authorization": f"Bearer {data['token']}", "X-Tenant-ID": str(tenant_id)}
+
+        codes = [f"bench:perm-{i:02d}" for i in range(PERMISSIONS + CHANGED)]
+        async with db_transaction() as session:
+            await session.execute(
+                text("INSERT INTO permissions (code, description) SELECT unnest(CAST(:codes AS text[])), 'benchmark';"),
+                {"codes": codes},
+            )
+        try:
+            rows = []
+            for label, update in (("per-code", _per_code_update), ("set-based", _set_based_update)):
+                resp = await client.post(
+                    "/roles", headers=headers, json={"name": label, "permission_codes": codes[:PERMISSIONS]}
+                )
+                resp.raise_for_status()
+                ids = {"tenant_id": tenant_id, "actor_user_id": actor_user_id, "role_id": UUID(resp.json()["id"])}
+                rows.append((label, *await _run(update, ids, codes)))
+        finally:
+            async with db_transaction() as session:
+                await set_db_app_context(session, user_id=actor_user_id, tenant_id=tenant_id)
+                await session.execute(
+                    text("DELETE FROM role_permissions WHERE permission_code = ANY(CAST(:codes AS text[]));"),
+                    {"codes": codes},
+                )
+                await session.execute(
+                    text("DELETE FROM permissions WHERE code = ANY(CAST(:codes AS text[]));"), {"codes": codes}
+                )
+
+    print(f"PATCH /roles/{{id}}, {PERMISSIONS} codes with {CHANGED} swapped per update, x{ITERATIONS}")
+    print(f"{'path':<10} {'statements':>11} {'ms/update':>10}")
+    for label, statements, ms in rows:
+        print(f"{label:<10} {statements:>11.1f} {ms:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
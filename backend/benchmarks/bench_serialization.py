@@ -0,0 +1,99 @@
+"""Serialization cost of a full 200-row GET /audit page, before and after typed response models.
+
+"jsonable_encoder" is what an untyped ``-> dict`` handler pays: FastAPI walks
+the payload through ``jsonable_encoder`` and ``JSONResponse`` then runs the
+stdlib encoder. "response model" is the path taken for routes declaring
+``AuditPage``: validation followed by Pydantic's native ``dump_json``. orjson is
+shown for reference when installed. No database is needed:
+
+    python -m benchmarks.bench_serialization
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api.audit import AuditPage
+
+
+ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", "500"))
+PAGE_SIZE = 200
+
+
+def _audit_page() -> dict:
+    parent_role_id = uuid4()
+    actor_user_id = uuid4()
+    now = datetime.now(UTC)
+    items = []
+    for i in range(PAGE_SIZE):
+        entity_id = uuid4()
+        codes = [f"perm:{j}" for j in range(i % 8)]
+        items.append(
+            {
+                "id": uuid4(),
+                "created_at": now - timedelta(seconds=i),
+                "actor_user_id": actor_user_id,
+                "actor_email": "owner@example.com",
+                "action": "role.updated",
+                "entity_type": "role",
+                "entity_id": entity_id,
+                "before": {
+                    "role": {"id": str(entity_id), "name": f"Role {i}", "is_system": False},
+                    "permission_codes": codes,
+                },
+                "after": {
+                    "role": {"id": str(entity_id), "name": f"Role {i} (renamed)", "is_system": False},
+                    "permission_codes": codes + ["roles:read"],
+                    "parent_role_id": str(parent_role_id),
+                },
+            }
+        )
+    return {"items": items, "next_cursor": "eyJjcmVhdGVkX2F0IjogIjIwMjYtMTAtMTgifQ=="}
+
+
+def _legacy(payload: dict) -> bytes:
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def main() -> int:
+    payload = _audit_page()
+    adapter = TypeAdapter(AuditPage)
+
+    def _response_model(data: dict) -> bytes:
+        return adapter.dump_json(adapter.validate_python(data))
+
+    modes: list[tuple[str, Callable[[dict], bytes]]] = [
+        ("jsonable_encoder", _legacy),
+        ("response model", _response_model),
+    ]
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        modes.append(("orjson (ref)", orjson.dumps))
+
+    print(f"GET /audit page, {PAGE_SIZE} rows x{ITERATIONS}")
+    print(f"{'mode':<18} {'ms/page':>10} {'bytes':>10}")
+    for label, serialize in modes:
+        body = serialize(payload)
+        started = time.perf_counter()
+        for _ in range(ITERATIONS):
+            serialize(payload)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<18} {elapsed / ITERATIONS * 1e3:>10.3f} {len(body):>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
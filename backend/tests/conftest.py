@@ -0,0 +1,73 @@
+import os
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.instrumentation import RequestDbStats, observe_requests
+
+
+@pytest.fixture
+def database_url() -> str:
+    """``DATABASE_URL``; tests that need a database are skipped without it."""
+    url = os.environ.get("DATABASE_URL", "")
+    if not url:
+        pytest.skip("DATABASE_URL is required for database tests")
+    return url
+
+
+@pytest.fixture
+def bootstrap_tenant(database_url: str) -> Callable[..., dict]:
+    """``bootstrap_tenant(client, "Name")`` creates a tenant with a unique slug
+    and its owner (``<slug>@example.com`` unless ``email`` is given, password
+    ``passw0rd``) through ``POST /auth/bootstrap``; returns the response body
+    plus the owner's ``headers``."""
+    bootstrap_token = os.environ.get("BOOTSTRAP_TOKEN", "")
+    if not bootstrap_token:
+        pytest.skip("BOOTSTRAP_TOKEN must be set to create a tenant")
+
+    def _bootstrap(client: TestClient, name: str = "Test", *, email: str | None = None) -> dict:
+        slug = f"{name.lower().replace(' ', '-')}-{uuid4().hex[:8]}"
+        resp = client.post(
+            "/auth/bootstrap",
+            headers={"X-Bootstrap-Token": bootstrap_token},
+            json={
+                "tenant_name": name,
+                "tenant_slug": slug,
+                "email": email or f"{slug}@example.com",
+                "password": "passw0rd",
+            },
+        )
+        assert resp.status_code == 200, resp.text
+        data = resp.json()
+        return {**data, "headers": {"Authorization": f"Bearer {data['token']}", "X-Tenant-ID": data["tenant"]["id"]}}
+
+    return _bootstrap
+
+
+@pytest.fixture
+def max_statements() -> Callable[[str, int], AbstractContextManager[None]]:
+    """``with max_statements("GET /roles", 3): ...`` fails unless the block
+    made at least one such request (route template) and none of them ran more
+    than 3 statements."""
+
+    @contextmanager
+    def _check(route: str, limit: int) -> Iterator[None]:
+        seen: list[RequestDbStats] = []
+
+        def _observe(method: str, template: str, stats: RequestDbStats) -> None:
+            if f"{method} {template}" == route:
+                seen.append(stats)
+
+        with observe_requests(_observe):
+            yield
+        assert seen, f"no {route} request was made"
+        counts = [stats.statements for stats in seen]
+        assert max(counts) <= limit, (
+            f"{route} ran {counts} statements (limit {limit}); by shape: "
+            + "; ".join(f"{n}x {shape}" for stats in seen for shape, n in stats.shapes.most_common())
+        )
+
+    return _check
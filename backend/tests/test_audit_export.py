@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.replicas import replica_router
+from app.db.sync import get_sync_engine
+from app.main import create_app
+from app.settings import settings
+from app.worker import drain_audit_outbox
+
+
+def _parse_timestamps(items: list[dict]) -> list[dict]:
+    # Same instant, rendered as "+00:00" by Postgres and "Z" by the response model.
+    return [{**item, "created_at": datetime.fromisoformat(item["created_at"])} for item in items]
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def test_export_matches_listing_in_both_formats(bootstrap_tenant, monkeypatch: pytest.MonkeyPatch) -> None:
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Export")["headers"]
+        for name in ["Ledger A", "Ledger B", "Other, \"quoted\""]:
+            created = client.post("/roles", headers=headers, json={"name": name, "permission_codes": []})
+            assert created.status_code == 201, created.text
+        drain_audit_outbox()
+
+        listed = client.get("/audit", headers=headers, params={"limit": 200}).json()["items"]
+        assert len(listed) == 3
+
+        resp = client.get("/audit/export", headers=headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        assert resp.headers["content-disposition"] == 'attachment; filename="audit-export.ndjson"'
+        assert _parse_timestamps([json.loads(line) for line in resp.text.splitlines()]) == _parse_timestamps(listed)
+
+        resp = client.get("/audit/export", headers=headers, params={"format": "csv"})
+        assert resp.status_code == 200, resp.text
+        assert resp.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+        assert [row["id"] for row in rows] == [item["id"] for item in listed]
+        assert [json.loads(row["after"]) for row in rows] == [item["after"] for item in listed]
+        assert rows[0]["entity_id"] == listed[0]["entity_id"]
+
+        searched = client.get("/audit/export", headers=headers, params={"q": "ledger"}).text.splitlines()
+        assert [json.loads(line)["after"]["name"] for line in searched] == ["Ledger B", "Ledger A"]
+        assert client.get("/audit/export", headers=headers, params={"entity_type": "member"}).text == ""
+        assert client.get("/audit/export", headers=headers, params={"format": "xml"}).status_code == 422
+
+        # The export's own transaction is routed with the caller's keys, so
+        # replicas lagging behind the caller's writes are skipped.
+        routed: list[tuple[str, ...]] = []
+        read_engine = replica_router.read_engine
+        monkeypatch.setattr(replica_router, "read_engine", lambda keys=(): routed.append(keys) or read_engine(keys))
+        client.get("/audit/export", headers=headers)
+        assert routed and all(keys[0] == headers["Authorization"] for keys in routed)
+
+
+def test_export_streams_with_bounded_memory(bootstrap_tenant) -> None:
+    """Set AUDIT_EXPORT_TEST_ROWS=1000000 for the full-size run (slow to seed)."""
+    if not os.path.exists("/proc/self/statm"):
+        pytest.skip("RSS is read from /proc")
+    total = int(os.environ.get("AUDIT_EXPORT_TEST_ROWS", "20000"))
+
+    with TestClient(create_app()) as client:
+        data = bootstrap_tenant(client, "Export")
+        tenant_id, user_id = data["tenant"]["id"], data["user"]["id"]
+        with get_sync_engine().begin() as conn:
+            conn.execute(
+                text("SELECT set_config('app.user_id', :user_id, true), set_config('app.tenant_id', :tenant_id, true);"),
+                {"user_id": user_id, "tenant_id": tenant_id},
+            )
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO audit_log (tenant_id, actor_user_id, action, entity_type, entity_id, after, created_at)
+                    SELECT :tenant_id, :user_id, 'role.created', 'role', gen_random_uuid(),
+                           json_build_object('name', 'Role ' || g), now() - g * interval '1 millisecond'
+                    FROM generate_series(1, :total) g;
+                    """
+                ),
+                {"tenant_id": tenant_id, "user_id": user_id, "total": total},
+            )
+
+        # Drive the ASGI app directly: TestClient buffers whole bodies.
+        app = client.app
+        headers = [
+            (b"authorization", f"Bearer {data['token']}".encode()),
+            (b"x-tenant-id", tenant_id.encode()),
+        ]
+        stats = {"status": None, "chunks": 0, "lines": 0, "peak": 0}
+
+        async def export() -> None:
+            async def receive() -> dict:
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message: dict) -> None:
+                if message["type"] == "http.response.start":
+                    stats["status"] = message["status"]
+                elif message.get("body"):
+                    stats["chunks"] += 1
+                    stats["lines"] += message["body"].count(b"\n")
+                    stats["peak"] = max(stats["peak"], _rss_bytes() - baseline)
+
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0", "spec_version": "2.4"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": "/audit/export",
+                "raw_path": b"/audit/export",
+                "query_string": b"",
+                "root_path": "",
+                "headers": headers,
+                "client": ("testclient", 50000),
+                "server": ("testserver", 80),
+            }
+            baseline = _rss_bytes()
+            await app(scope, receive, send)
+
+        client.portal.call(export)
+
+    assert stats["status"] == 200
+    assert stats["lines"] == total
+    assert stats["chunks"] >= total // settings.audit_export_batch_size
+    assert stats["peak"] < 64 * 1024 * 1024
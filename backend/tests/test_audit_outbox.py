@@ -0,0 +1,38 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.sync import get_sync_engine
+from app.main import create_app
+from app.settings import settings
+from app.worker import drain_audit_outbox
+
+
+def test_audit_entries_are_drained_once_and_in_order(bootstrap_tenant, monkeypatch: pytest.MonkeyPatch) -> None:
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Outbox")["headers"]
+        for i in range(5):
+            created = client.post("/roles", headers=headers, json={"name": f"Outbox {i}", "permission_codes": []})
+            assert created.status_code == 201, created.text
+
+        # Written in the request transaction, not visible until drained.
+        assert client.get("/audit", headers=headers).json()["items"] == []
+        assert client.get("/health/audit").json()["pending"] >= 5
+
+        monkeypatch.setattr(settings, "audit_drain_batch_size", 2)
+        assert drain_audit_outbox() >= 5
+        assert drain_audit_outbox() == 0
+
+        items = client.get("/audit", headers=headers).json()["items"]
+        assert [item["after"]["name"] for item in items] == [f"Outbox {i}" for i in reversed(range(5))]
+        assert all(item["actor_email"] for item in items)
+
+
+def test_concurrent_drains_do_not_interleave(database_url) -> None:
+    with get_sync_engine().connect() as holder:
+        holder.execute(text("SELECT pg_advisory_lock(hashtext('app_drain_audit_outbox'));"))
+        try:
+            with get_sync_engine().begin() as conn:
+                assert conn.execute(text("SELECT app_drain_audit_outbox(100);")).scalar_one() == 0
+        finally:
+            holder.execute(text("SELECT pg_advisory_unlock(hashtext('app_drain_audit_outbox'));"))
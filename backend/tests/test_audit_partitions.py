@@ -0,0 +1,129 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.sync import get_sync_engine
+from app.main import create_app
+from app.worker import drain_audit_outbox
+
+
+def _partition_name(conn, months_ago: int) -> str:
+    return conn.execute(
+        text("SELECT 'audit_log_p' || to_char(now() AT TIME ZONE 'UTC' - make_interval(months => :m), 'YYYYMM');"),
+        {"m": months_ago},
+    ).scalar_one()
+
+
+def _bind(conn, user_id: str, tenant_id: str) -> None:
+    conn.execute(
+        text("SELECT set_config('app.user_id', :user_id, true), set_config('app.tenant_id', :tenant_id, true);"),
+        {"user_id": user_id, "tenant_id": tenant_id},
+    )
+
+
+def test_keyset_page_and_retention_prune_partitions(bootstrap_tenant) -> None:
+    with TestClient(create_app()) as client:
+        data = bootstrap_tenant(client, "Partitions")
+        headers, user_id, tenant_id = data["headers"], data["user"]["id"], data["tenant"]["id"]
+        assert client.put("/audit/retention", headers=headers, json={"days": 45}).status_code == 200
+
+    with get_sync_engine().begin() as conn:
+        conn.execute(text("SELECT app_ensure_audit_partitions(now() - interval '3 months', 3);"))
+        _bind(conn, user_id, tenant_id)
+        # Same predicates as GET /audit with a cursor just before the
+        # current month.
+        plan = "\n".join(
+            conn.execute(
+                text(
+                    """
+                    EXPLAIN (COSTS OFF)
+                    SELECT a.*
+                    FROM audit_log a
+                    WHERE a.tenant_id = :tenant_id
+                      AND a.created_at >= app_audit_retention_cutoff(CAST(:tenant_id AS uuid), CAST(:days AS integer))
+                      AND a.created_at <= :cursor_created_at
+                      AND (a.created_at, a.id) < (:cursor_created_at, CAST(:cursor_id AS uuid))
+                    ORDER BY a.created_at DESC, a.id DESC
+                    LIMIT 50;
+                    """
+                ),
+                {
+                    "tenant_id": tenant_id,
+                    "days": None,
+                    "cursor_created_at": conn.execute(
+                        text("SELECT date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' - interval '1 second';")
+                    ).scalar_one(),
+                    "cursor_id": str(uuid4()),
+                },
+            ).scalars()
+        )
+        assert _partition_name(conn, 1) in plan
+        # Newer than the cursor.
+        assert _partition_name(conn, 0) not in plan
+        assert _partition_name(conn, -1) not in plan
+        # Older than the tenant's 45-day retention.
+        assert _partition_name(conn, 3) not in plan
+
+
+def test_retention_hides_expired_entries(bootstrap_tenant) -> None:
+    with TestClient(create_app()) as client:
+        data = bootstrap_tenant(client, "Partitions")
+        headers, user_id, tenant_id = data["headers"], data["user"]["id"], data["tenant"]["id"]
+        with get_sync_engine().begin() as conn:
+            _bind(conn, user_id, tenant_id)
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO audit_log (tenant_id, actor_user_id, action, entity_type, created_at)
+                    VALUES (:tenant_id, :user_id, 'old.entry', 'test', now() - interval '20 days'),
+                           (:tenant_id, :user_id, 'new.entry', 'test', now());
+                    """
+                ),
+                {"tenant_id": tenant_id, "user_id": user_id},
+            )
+
+        def actions() -> list[str]:
+            resp = client.get("/audit", headers=headers, params={"entity_type": "test"})
+            assert resp.status_code == 200, resp.text
+            return [item["action"] for item in resp.json()["items"]]
+
+        assert actions() == ["new.entry", "old.entry"]
+
+        resp = client.put("/audit/retention", headers=headers, json={"days": 10})
+        assert resp.status_code == 200, resp.text
+        assert resp.json() == {"days": 10}
+        assert actions() == ["new.entry"]
+        assert [item["action"] for item in client.get("/audit", headers=headers, params={"q": "entry"}).json()["items"]] == [
+            "new.entry"
+        ]
+
+        assert client.put("/audit/retention", headers=headers, json={"days": None}).json() == {"days": None}
+        assert actions() == ["new.entry", "old.entry"]
+        assert client.put("/audit/retention", headers=headers, json={"days": 0}).status_code == 422
+
+        drain_audit_outbox()
+        changes = client.get("/audit", headers=headers, params={"entity_type": "tenant"}).json()["items"]
+        assert [(c["before"], c["after"]) for c in changes] == [
+            ({"days": 10}, {"days": None}),
+            ({"days": None}, {"days": 10}),
+        ]
+
+
+def test_maintenance_drops_expired_months_and_indexes_closed_ones(database_url) -> None:
+    with get_sync_engine().begin() as conn:
+        conn.execute(text("SELECT app_ensure_audit_partitions(now() - interval '30 months', 0);"))
+        expired, closed = _partition_name(conn, 30), _partition_name(conn, 1)
+        changes = conn.execute(
+            text("SELECT action, partition_name FROM app_maintain_audit_partitions(2, 365, false);")
+        ).all()
+        assert ("dropped", expired) in changes
+        assert conn.execute(
+            text("SELECT to_regclass(:name) IS NOT NULL;"), {"name": _partition_name(conn, -2)}
+        ).scalar_one()
+        assert conn.execute(text("SELECT to_regclass(:name);"), {"name": expired}).scalar_one() is None
+        assert conn.execute(
+            text("SELECT to_regclass(:name) IS NOT NULL;"), {"name": f"{closed}_created_at_brin"}
+        ).scalar_one()
+        # The current month is still written to.
+        assert ("brin", _partition_name(conn, 0)) not in changes
@@ -0,0 +1,41 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.worker import drain_audit_outbox
+
+
+def test_audit_search_covers_payloads_and_actor_and_keeps_keyset_paging(bootstrap_tenant) -> None:
+    with TestClient(create_app()) as client:
+        email = f"Searcher-{uuid4().hex[:8]}@example.com"
+        headers = bootstrap_tenant(client, "Search", email=email)["headers"]
+
+        for name in ["Zebra 1", "Zebra 2", "Zebra 3", "Walrus 100%"]:
+            created = client.post("/roles", headers=headers, json={"name": name, "permission_codes": []})
+            assert created.status_code == 201, created.text
+
+        drain_audit_outbox()
+
+        def search(**params: object) -> dict:
+            result = client.get("/audit", headers=headers, params=params)
+            assert result.status_code == 200, result.text
+            return result.json()
+
+        # Payload search, case-insensitive.
+        page = search(q="zebra", limit=2)
+        assert [item["after"]["name"] for item in page["items"]] == ["Zebra 3", "Zebra 2"]
+        assert page["next_cursor"]
+        rest = search(q="zebra", limit=2, cursor=page["next_cursor"])
+        assert [item["after"]["name"] for item in rest["items"]] == ["Zebra 1"]
+        assert rest["next_cursor"] is None
+
+        # Denormalized actor email.
+        by_actor = search(q=email.lower(), limit=50)
+        assert len(by_actor["items"]) == 4
+        assert {item["actor_email"] for item in by_actor["items"]} == {email}
+
+        # LIKE wildcards in the term are literal.
+        assert [item["after"]["name"] for item in search(q="100%")["items"]] == ["Walrus 100%"]
+        assert search(q="0_%")["items"] == []
+        assert search(q="zebra", entity_type="membership")["items"] == []
@@ -0,0 +1,80 @@
+from datetime import UTC, datetime, timedelta
+from uuid import UUID, uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.cli import backfill_audit_rollups
+from app.db.sync import get_sync_engine
+from app.main import create_app
+from app.worker import drain_audit_outbox
+
+
+def test_stats_are_served_from_the_rollup(bootstrap_tenant) -> None:
+    with TestClient(create_app()) as client:
+        data = bootstrap_tenant(client, "Stats")
+        tenant_id, user_id, email = data["tenant"]["id"], data["user"]["id"], data["user"]["email"]
+        headers = data["headers"]
+
+        for i in range(3):
+            created = client.post("/roles", headers=headers, json={"name": f"Stats {i}", "permission_codes": []})
+            assert created.status_code == 201, created.text
+        drain_audit_outbox()
+        # Older activity, inserted directly in a single statement.
+        with get_sync_engine().begin() as conn:
+            conn.execute(
+                text("SELECT set_config('app.user_id', :user_id, true), set_config('app.tenant_id', :tenant_id, true);"),
+                {"user_id": user_id, "tenant_id": tenant_id},
+            )
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO audit_log (tenant_id, actor_user_id, action, entity_type, created_at)
+                    SELECT :tenant_id, :user_id, 'member.created', 'membership', now() - interval '3 days'
+                    FROM generate_series(1, 2);
+                    """
+                ),
+                {"tenant_id": tenant_id, "user_id": user_id},
+            )
+
+        today = datetime.now(UTC).date()
+        stats = client.get("/audit/stats", headers=headers)
+        assert stats.status_code == 200, stats.text
+        body = stats.json()
+        assert body["until"] == today.isoformat()
+        assert body["since"] == (today - timedelta(days=29)).isoformat()
+        assert body["total"] == 5
+        assert body["actions"] == [{"value": "role.created", "count": 3}, {"value": "member.created", "count": 2}]
+        assert body["entity_types"] == [{"value": "role", "count": 3}, {"value": "membership", "count": 2}]
+        assert body["actors"] == [{"actor_user_id": user_id, "actor_email": email, "count": 5}]
+        assert body["series"] == [
+            {"day": (datetime.now(UTC) - timedelta(days=3)).date().isoformat(), "key": None, "count": 2},
+            {"day": today.isoformat(), "key": None, "count": 3},
+        ]
+
+        by_action = client.get("/audit/stats", headers=headers, params={"breakdown": "action"}).json()
+        assert [(p["key"], p["count"]) for p in by_action["series"]] == [("member.created", 2), ("role.created", 3)]
+        by_actor = client.get("/audit/stats", headers=headers, params={"breakdown": "actor"}).json()
+        assert {p["key"] for p in by_actor["series"]} == {user_id}
+
+        top = client.get("/audit/stats", headers=headers, params={"breakdown": "action", "facet_limit": 1}).json()
+        assert top["actions"] == [{"value": "role.created", "count": 3}]
+        assert top["entity_types"] == [{"value": "role", "count": 3}]
+        assert len(top["series"]) == 2 and top["total"] == 5
+
+        filtered = client.get("/audit/stats", headers=headers, params={"entity_type": "role", "since": today.isoformat()})
+        assert filtered.json()["total"] == 3
+        assert filtered.json()["series"] == [{"day": today.isoformat(), "key": None, "count": 3}]
+
+        empty = client.get("/audit/stats", headers=headers, params={"actor_user_id": str(uuid4())}).json()
+        assert (empty["total"], empty["series"], empty["actors"]) == (0, [], [])
+
+        bad = client.get(
+            "/audit/stats", headers=headers, params={"since": today.isoformat(), "until": "2000-01-01"}
+        )
+        assert bad.status_code == 400
+        assert bad.json()["error"]["code"] == "VALIDATION_ERROR"
+
+        # The backfill recomputes exactly what the trigger maintained.
+        assert backfill_audit_rollups(UUID(tenant_id)) == 2
+        assert client.get("/audit/stats", headers=headers).json() == body
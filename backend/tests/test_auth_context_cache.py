@@ -0,0 +1,107 @@
+import json
+import time
+from uuid import uuid4
+
+from app.auth.cache import AuthContext, AuthContextCache
+from app.auth.permissions import permission_registry
+
+
+def _ctx(user_id=None, tenant_id=None, permissions=("roles:read",)) -> AuthContext:
+    return AuthContext(
+        user_id=user_id or uuid4(),
+        tenant_id=tenant_id,
+        is_active=True,
+        role_id=uuid4() if tenant_id else None,
+        permission_mask=permission_registry.mask(permissions),
+    )
+
+
+def _cache(**kwargs) -> AuthContextCache:
+    cache = AuthContextCache(ttl_seconds=kwargs.get("ttl_seconds", 60), max_entries=kwargs.get("max_entries", 100))
+    cache.enabled = True
+    return cache
+
+
+def test_hit_and_miss_counters() -> None:
+    cache = _cache()
+    ctx = _ctx(tenant_id=uuid4())
+    assert cache.get(ctx.user_id, ctx.tenant_id) is None
+    cache.put(ctx, generation=cache.generation)
+    assert cache.get(ctx.user_id, ctx.tenant_id) is ctx
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_disabled_cache_never_serves() -> None:
+    cache = _cache()
+    ctx = _ctx()
+    cache.put(ctx, generation=cache.generation)
+    cache.enabled = False
+    assert cache.get(ctx.user_id, None) is None
+
+
+def test_entries_expire_after_ttl() -> None:
+    cache = _cache(ttl_seconds=0.01)
+    ctx = _ctx()
+    cache.put(ctx, generation=cache.generation)
+    time.sleep(0.02)
+    assert cache.get(ctx.user_id, None) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_put_is_dropped_after_concurrent_invalidation() -> None:
+    cache = _cache()
+    ctx = _ctx()
+    generation = cache.generation
+    cache.invalidate(user_id=uuid4())
+    cache.put(ctx, generation=generation)
+    assert cache.get(ctx.user_id, None) is None
+
+
+def test_tenant_invalidation_only_evicts_that_tenant() -> None:
+    cache = _cache()
+    tenant_a, tenant_b = uuid4(), uuid4()
+    a = _ctx(tenant_id=tenant_a)
+    b = _ctx(user_id=a.user_id, tenant_id=tenant_b)
+    for ctx in (a, b):
+        cache.put(ctx, generation=cache.generation)
+    cache.invalidate(tenant_id=tenant_a)
+    assert cache.get(a.user_id, tenant_a) is None
+    assert cache.get(a.user_id, tenant_b) is b
+
+
+def test_user_invalidation_evicts_all_tenants_of_user() -> None:
+    cache = _cache()
+    a = _ctx(tenant_id=uuid4())
+    b = _ctx(user_id=a.user_id, tenant_id=uuid4())
+    other = _ctx(tenant_id=a.tenant_id)
+    for ctx in (a, b, other):
+        cache.put(ctx, generation=cache.generation)
+    cache.invalidate(user_id=a.user_id)
+    assert cache.get(a.user_id, a.tenant_id) is None
+    assert cache.get(b.user_id, b.tenant_id) is None
+    assert cache.get(other.user_id, other.tenant_id) is other
+
+
+def test_bounded_size_evicts_least_recently_used() -> None:
+    cache = _cache(max_entries=2)
+    first, second, third = _ctx(), _ctx(), _ctx()
+    cache.put(first, generation=cache.generation)
+    cache.put(second, generation=cache.generation)
+    cache.get(first.user_id, None)
+    cache.put(third, generation=cache.generation)
+    assert cache.get(second.user_id, None) is None
+    assert cache.get(first.user_id, None) is first
+
+
+def test_notification_payload_invalidates_membership(monkeypatch) -> None:
+    from app.auth import cache as cache_module
+
+    cache = _cache()
+    monkeypatch.setattr(cache_module, "auth_context_cache", cache)
+    ctx = _ctx(tenant_id=uuid4())
+    cache.put(ctx, generation=cache.generation)
+    cache_module.handle_auth_change_notification(
+        json.dumps({"table": "memberships", "tenant_id": str(ctx.tenant_id), "user_id": str(ctx.user_id)})
+    )
+    assert cache.get(ctx.user_id, ctx.tenant_id) is None
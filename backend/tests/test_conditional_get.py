@@ -0,0 +1,64 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.sync import get_sync_engine
+from app.main import create_app
+
+
+def test_tenant_read_endpoints_revalidate_against_tenant_version(bootstrap_tenant) -> None:
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Etag")["headers"]
+
+        for path in ["/roles", "/members", "/auth/me", "/tenants", "/permissions"]:
+            first = client.get(path, headers=headers)
+            assert first.status_code == 200, path
+            etag = first.headers["ETag"]
+            again = client.get(path, headers={**headers, "If-None-Match": etag})
+            assert again.status_code == 304, path
+            assert again.content == b""
+
+        roles_etag = client.get("/roles", headers=headers).headers["ETag"]
+        me_etag = client.get("/auth/me", headers=headers).headers["ETag"]
+        created = client.post("/roles", headers=headers, json={"name": "Support", "permission_codes": ["roles:read"]})
+        assert created.status_code == 201, created.text
+
+        refreshed = client.get("/roles", headers={**headers, "If-None-Match": roles_etag})
+        assert refreshed.status_code == 200
+        assert refreshed.headers["ETag"] != roles_etag
+        assert any(r["name"] == "Support" for r in refreshed.json())
+        # /auth/me embeds tenant data, so any tenant change revalidates it too.
+        assert client.get("/auth/me", headers={**headers, "If-None-Match": me_etag}).status_code == 200
+
+
+def test_concurrent_writers_of_a_tenant_do_not_queue_on_its_version(bootstrap_tenant) -> None:
+    with TestClient(create_app()) as client:
+        data = bootstrap_tenant(client, "Etag")
+        headers = data["headers"]
+        before = client.get("/roles", headers=headers).headers["ETag"]
+        bind = {"user_id": data["user"]["id"], "tenant_id": data["tenant"]["id"]}
+
+        engine = get_sync_engine()
+        conns = [engine.connect()]
+        try:
+            pid = conns[0].execute(text("SELECT pg_backend_pid();")).scalar()
+            # Writers on backends that fall into different version slots.
+            while True:
+                conns.append(engine.connect())
+                if conns[-1].execute(text("SELECT pg_backend_pid();")).scalar() % 16 != pid % 16:
+                    break
+            first, second = conns[0], conns[-1]
+            for conn, name in [(first, "Owner"), (second, "Member")]:
+                conn.execute(text("SET lock_timeout = '2s';"))
+                conn.execute(text("SELECT app_bind_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid));"), bind)
+                conn.execute(
+                    text("UPDATE roles SET name = name WHERE tenant_id = :tenant_id AND name = :name;"),
+                    {**bind, "name": name},
+                )
+            # The second update did not wait for the first transaction.
+            second.commit()
+            first.commit()
+        finally:
+            for conn in conns:
+                conn.close()
+
+        assert client.get("/roles", headers={**headers, "If-None-Match": before}).status_code == 200
@@ -0,0 +1,149 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.context import get_db_app_context, set_db_app_context
+from app.db.session import get_db_session
+from app.db.sync import get_sync_engine
+from app.main import create_app
+from app.worker import drain_audit_outbox
+
+
+_BIND = "SELECT set_config('app.user_id', :user_id, true), set_config('app.tenant_id', :tenant_id, true);"
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_context_is_bound_once_per_transaction(database_url) -> None:
+    engine = create_async_engine(database_url)
+    SessionMaker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    user_id, tenant_id = uuid4(), uuid4()
+    try:
+        async with SessionMaker() as session:
+            ctx = get_db_app_context(session)
+            async with session.begin():
+                await set_db_app_context(session, user_id=user_id, tenant_id=tenant_id)
+                await set_db_app_context(session, user_id=user_id, tenant_id=tenant_id)
+                await set_db_app_context(session, tenant_id=tenant_id)
+                assert ctx.statements == 1
+                bound = (
+                    await session.execute(
+                        text("SELECT current_setting('app.user_id', true), current_setting('app.tenant_id', true);")
+                    )
+                ).one()
+                assert tuple(bound) == (str(user_id), str(tenant_id))
+
+            # set_config(..., true) does not survive the transaction, so it is re-bound.
+            async with session.begin():
+                await set_db_app_context(session, tenant_id=tenant_id)
+                assert ctx.statements == 3
+    finally:
+        await engine.dispose()
+
+
+def test_tenant_scoped_endpoint_statement_budget(bootstrap_tenant) -> None:
+    statements: list[int] = []
+
+    async def _counting_session(request: Request):
+        async for session in get_db_session(request):
+            yield session
+            statements.append(get_db_app_context(session).statements)
+
+    app = create_app()
+    with TestClient(app) as client:
+        headers = bootstrap_tenant(client, "Budget")["headers"]
+
+        app.dependency_overrides[get_db_session] = _counting_session
+        for _ in range(2):
+            resp = client.get("/roles", headers=headers)
+            assert resp.status_code == 200
+        resp = client.get("/roles", headers={**headers, "If-None-Match": resp.headers["ETag"]})
+        assert resp.status_code == 304
+
+    # Auth (resolution or cached-context binding) + tenant version + the roles
+    # query; a revalidation stops after the version lookup.
+    assert statements == [3, 3, 2]
+
+
+def test_role_writes_are_set_based(bootstrap_tenant) -> None:
+    statements: list[int] = []
+
+    async def _counting_session(request: Request):
+        async for session in get_db_session(request):
+            yield session
+            statements.append(get_db_app_context(session).statements)
+
+    app = create_app()
+    with TestClient(app) as client:
+        data = bootstrap_tenant(client, "Role writes")
+        tenant_id, user_id = data["tenant"]["id"], data["user"]["id"]
+        headers = data["headers"]
+        ids = {"user_id": user_id, "tenant_id": tenant_id}
+
+        app.dependency_overrides[get_db_session] = _counting_session
+        created = client.post(
+            "/roles",
+            headers=headers,
+            json={"name": "Support", "permission_codes": ["roles:read", "members:read", "roles:read"]},
+        )
+        assert created.status_code == 201, created.text
+        role = created.json()
+        assert role["permission_codes"] == ["members:read", "roles:read"]
+
+        def _row_versions() -> dict[str, str]:
+            with get_sync_engine().begin() as conn:
+                conn.execute(text(_BIND), ids)
+                rows = conn.execute(
+                    text("SELECT permission_code, xmin::text FROM role_permissions WHERE role_id = :role_id;"),
+                    {"role_id": role["id"]},
+                )
+                return dict(rows.all())
+
+        kept = _row_versions()["roles:read"]
+        updated = client.patch(
+            f"/roles/{role['id']}",
+            headers=headers,
+            json={"name": "Support L2", "permission_codes": ["roles:read", "audit:read"]},
+        )
+        assert updated.status_code == 200, updated.text
+        assert (updated.json()["name"], updated.json()["permission_codes"]) == ("Support L2", ["audit:read", "roles:read"])
+        # Only the changed codes are written; the unchanged grant is untouched.
+        versions = _row_versions()
+        assert sorted(versions) == ["audit:read", "roles:read"]
+        assert versions["roles:read"] == kept
+
+        renamed = client.patch(f"/roles/{role['id']}", headers=headers, json={"name": "Support L3"})
+        assert renamed.json()["permission_codes"] == ["audit:read", "roles:read"]
+        missing = client.patch(f"/roles/{uuid4()}", headers=headers, json={"name": "Nope"})
+        assert missing.status_code == 404
+
+    # Auth + the role statement; an update takes the row lock first. The
+    # 404 raises inside the session and is not counted.
+    assert statements == [2, 3, 3]
+
+    drain_audit_outbox()
+    with TestClient(create_app()) as client:
+        items = client.get("/audit", headers=headers, params={"entity_type": "role"}).json()["items"]
+    by_action = {}
+    for item in items:
+        by_action.setdefault(item["action"], []).append(item)
+    assert by_action["role.created"][0]["after"] == {
+        "id": role["id"],
+        "name": "Support",
+        "permission_codes": ["roles:read", "members:read", "roles:read"],
+    }
+    first_update = by_action["role.updated"][-1]
+    assert first_update["before"] == {
+        "role": {"id": role["id"], "name": "Support", "is_system": False},
+        "permission_codes": ["members:read", "roles:read"],
+    }
+    assert first_update["after"]["role"]["name"] == "Support L2"
+    assert first_update["after"]["permission_codes"] == ["audit:read", "roles:read"]
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.db.pool import InstrumentedQueuePool, install_idle_pre_ping, pool_stats
+from app.db.sync import sync_database_url
+
+
+def _engine(**kwargs):
+    return create_engine(sync_database_url(), poolclass=InstrumentedQueuePool, **kwargs)
+
+
+def test_pool_stats_count_checkouts_waits_and_timeouts(database_url) -> None:
+    engine = _engine(pool_size=1, max_overflow=0, pool_timeout=0.05)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1;"))
+            stats = pool_stats(engine)
+            assert (stats["size"], stats["checked_out"], stats["idle"]) == (1, 1, 0)
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+        stats = pool_stats(engine)
+        assert (stats["checked_out"], stats["idle"], stats["waiting"]) == (0, 1, 0)
+        assert (stats["checkouts"], stats["timeouts"]) == (1, 1)
+        wait = stats["wait_seconds"]
+        assert wait["count"] == 2 and wait["buckets"]["+Inf"] == 2
+        assert wait["buckets"]["0.001"] <= wait["buckets"]["0.1"] <= wait["count"]
+        assert wait["sum"] >= 0.05
+
+        # Counters survive engine.dispose(), which replaces the pool.
+        engine.dispose()
+        assert pool_stats(engine)["checkouts"] == 1
+    finally:
+        engine.dispose()
+
+
+def test_idle_pre_ping_replaces_dead_connections_only_after_idling(database_url) -> None:
+    engine = _engine(pool_size=1, max_overflow=0)
+    install_idle_pre_ping(engine, idle_seconds=0)
+    try:
+        with engine.connect() as conn:
+            pid = conn.execute(text("SELECT pg_backend_pid();")).scalar_one()
+        with create_engine(sync_database_url()).connect() as other:
+            other.execute(text("SELECT pg_terminate_backend(:pid);"), {"pid": pid})
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT pg_backend_pid();")).scalar_one() != pid
+        assert pool_stats(engine)["stale_pings"] == 1
+    finally:
+        engine.dispose()
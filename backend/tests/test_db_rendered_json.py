@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.settings import settings
+from app.worker import drain_audit_outbox
+
+
+def _normalize(value: object) -> object:
+    # Timestamps are rendered "+00:00" by Postgres and "Z" by Pydantic.
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str) and len(value) >= 20 and value[10:11] == "T":
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def test_db_rendered_bodies_match_model_rendered_bodies(bootstrap_tenant, monkeypatch: pytest.MonkeyPatch) -> None:
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Rendered")["headers"]
+        for i in range(3):
+            created = client.post("/roles", headers=headers, json={"name": f"Role {i}", "permission_codes": ["roles:read"]})
+            assert created.status_code == 201, created.text
+
+        drain_audit_outbox()
+
+        paths = [
+            "/roles",
+            "/members",
+            "/members?limit=1",
+            "/members?email_prefix=Rendered",
+            "/audit?limit=2",
+            "/audit?limit=50",
+        ]
+        by_model = {path: client.get(path, headers=headers) for path in paths}
+        monkeypatch.setattr(settings, "db_render_json", True)
+        by_db = {path: client.get(path, headers=headers) for path in paths}
+
+        for path in paths:
+            assert by_db[path].status_code == 200, path
+            assert by_db[path].headers.get("ETag") == by_model[path].headers.get("ETag"), path
+            assert _normalize(by_db[path].json()) == _normalize(by_model[path].json()), path
+
+        # The SQL-built cursor pages exactly like the Python one.
+        page = by_db["/audit?limit=2"].json()
+        assert page["next_cursor"] is not None
+        following = client.get("/audit", headers=headers, params={"limit": 2, "cursor": page["next_cursor"]})
+        assert following.status_code == 200
+        assert following.json()["items"][0]["id"] == by_model["/audit?limit=50"].json()["items"][2]["id"]
+        assert by_db["/audit?limit=50"].json()["next_cursor"] is None
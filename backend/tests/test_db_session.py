@@ -0,0 +1,94 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import APIRouter, Depends
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_serializer
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.password import password_hasher
+from app.db.session import DbSessionRoute, get_db_session, release_db_session, request_hold_seconds
+from app.db.sync import get_sync_engine
+from app.main import create_app
+
+
+def test_connection_is_released_before_the_response_is_serialized(database_url) -> None:
+    seen: dict[str, object] = {}
+
+    class ProbeOut(BaseModel):
+        value: int
+
+        @field_serializer("value")
+        def _record_transaction(self, value: int) -> int:
+            seen["in_transaction_when_serialized"] = seen["session"].in_transaction()
+            return value
+
+    router = APIRouter(route_class=DbSessionRoute)
+
+    @router.post("/_test/db-session", response_model=ProbeOut)
+    async def probe(session: AsyncSession = Depends(get_db_session)) -> dict:
+        seen["session"] = session
+        assert not session.in_transaction()  # nothing checked out yet
+        await session.execute(text("SELECT 1;"))
+        await release_db_session(session)
+        assert not session.in_transaction()
+        # A later statement checks a connection out again.
+        value = (await session.execute(text("SELECT 2;"))).scalar_one()
+        return {"value": value}
+
+    app = create_app()
+    app.include_router(router)
+    before = request_hold_seconds.snapshot()["count"]
+    with TestClient(app) as client:
+        resp = client.post("/_test/db-session")
+        assert resp.status_code == 200, resp.text
+        assert resp.json() == {"value": 2}
+        assert seen["in_transaction_when_serialized"] is False
+
+        hold = client.get("/health/pool").json()["request_hold_seconds"]
+        assert hold["count"] == before + 1
+        assert hold["sum"] > 0
+
+
+def test_permission_is_checked_again_after_the_connection_is_released(
+    bootstrap_tenant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    with TestClient(create_app()) as client:
+        owner = bootstrap_tenant(client, "Release")
+        roles = {r["name"]: r["id"] for r in client.get("/roles", headers=owner["headers"]).json()}
+        admin_email = f"admin-{uuid4().hex[:8]}@example.com"
+        resp = client.post(
+            "/members",
+            headers=owner["headers"],
+            json={"email": admin_email, "password": "passw0rd", "role_id": roles["Admin"]},
+        )
+        assert resp.status_code == 201, resp.text
+        login = client.post("/auth/login", json={"email": admin_email, "password": "passw0rd"}).json()
+        admin = {"Authorization": f"Bearer {login['token']}", "X-Tenant-ID": owner["tenant"]["id"]}
+
+        hash_password = password_hasher.hash
+
+        async def demote_while_hashing(password: str) -> str:
+            with get_sync_engine().begin() as conn:
+                conn.execute(
+                    text("SELECT app_bind_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid));"),
+                    {"user_id": owner["user"]["id"], "tenant_id": owner["tenant"]["id"]},
+                )
+                conn.execute(
+                    text(
+                        "UPDATE memberships SET role_id = :role_id WHERE tenant_id = :tenant_id AND user_id = :user_id;"
+                    ),
+                    {"role_id": roles["Member"], "tenant_id": owner["tenant"]["id"], "user_id": login["user"]["id"]},
+                )
+            return await hash_password(password)
+
+        monkeypatch.setattr(password_hasher, "hash", demote_while_hashing)
+        email = f"late-{uuid4().hex[:8]}@example.com"
+        resp = client.post(
+            "/members", headers=admin, json={"email": email, "password": "passw0rd", "role_id": roles["Member"]}
+        )
+        assert resp.status_code == 403, resp.text
+        assert resp.json()["error"]["message"] == "Missing permission: members:write"
+        members = client.get("/members", headers=owner["headers"]).json()["items"]
+        assert email not in {m["email"] for m in members}
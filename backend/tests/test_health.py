@@ -1,6 +1,8 @@
+import pytest
 from fastapi.testclient import TestClient
 
 from app.main import create_app
+from app.settings import settings
 
 
 def test_health_returns_ok() -> None:
@@ -9,3 +11,38 @@ def test_health_returns_ok() -> None:
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
+
+def test_internal_health_requires_token_outside_local(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = TestClient(create_app())
+    monkeypatch.setattr(settings, "environment", "prod")
+    for path in ("/health/caches", "/health/pool", "/health/replicas", "/health/audit", "/metrics"):
+        assert client.get(path).status_code == 404, path
+    assert client.get("/health").status_code == 200
+
+    monkeypatch.setattr(settings, "internal_token", "s3cret")
+    assert client.get("/health/caches", headers={"X-Internal-Token": "wrong"}).status_code == 404
+    assert client.get("/health/caches", headers={"X-Internal-Token": "s3cret"}).status_code == 200
+    assert client.get("/metrics", headers={"X-Internal-Token": "s3cret"}).status_code == 200
+
+
+def test_health_caches_reports_cache_stats() -> None:
+    client = TestClient(create_app())
+    response = client.get("/health/caches")
+    assert response.status_code == 200
+    assert set(response.json()) == {"auth_context", "verified_jwt"}
+    assert "hit_rate" in response.json()["verified_jwt"]
+
+
+def test_health_pool_reports_pool_stats() -> None:
+    client = TestClient(create_app())
+    response = client.get("/health/pool")
+    assert response.status_code == 200
+    assert {"size", "checked_out", "waiting", "timeouts", "wait_seconds"} <= set(response.json())
+    assert "+Inf" in response.json()["wait_seconds"]["buckets"]
+
+
+def test_health_replicas_reports_routing_stats() -> None:
+    client = TestClient(create_app())
+    response = client.get("/health/replicas")
+    assert response.status_code == 200
+    assert {"replicas", "primary_reads", "sticky_clients"} <= set(response.json())
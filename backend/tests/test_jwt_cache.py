@@ -0,0 +1,78 @@
+import time
+from uuid import uuid4
+
+import jwt
+import pytest
+
+from app.auth import jwt as jwt_module
+from app.auth.jwt import VerifiedTokenCache, create_access_token, decode_access_token
+from app.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def _fresh_keys_and_cache(monkeypatch):
+    monkeypatch.setattr(jwt_module, "verified_token_cache", VerifiedTokenCache(max_entries=16))
+    jwt_module.get_signing_keys.cache_clear()
+    yield
+    jwt_module.get_signing_keys.cache_clear()
+
+
+def test_repeated_decode_is_served_from_cache() -> None:
+    user_id = uuid4()
+    token = create_access_token(user_id=user_id)
+    assert decode_access_token(token)["sub"] == str(user_id)
+    assert decode_access_token(token)["sub"] == str(user_id)
+    stats = jwt_module.verified_token_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_cached_entry_is_evicted_at_exp() -> None:
+    cache = VerifiedTokenCache(max_entries=16)
+    cache.put(b"digest", {"sub": "x", "exp": time.time() + 0.01})
+    assert cache.get(b"digest") is not None
+    time.sleep(0.02)
+    assert cache.get(b"digest") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_expired_entries_are_purged_on_insert() -> None:
+    cache = VerifiedTokenCache(max_entries=16)
+    cache.put(b"old", {"sub": "x", "exp": time.time() - 1})
+    cache.put(b"new", {"sub": "y", "exp": time.time() + 60})
+    assert cache.stats()["size"] == 1
+
+
+def test_tampered_token_is_rejected() -> None:
+    token = create_access_token(user_id=uuid4())
+    decode_access_token(token)
+    header, payload, signature = token.split(".")
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_access_token(f"{header}.{payload}.{signature[:-2]}AA")
+
+
+def _restart() -> None:
+    # Keys are read from the environment once per process.
+    jwt_module.get_signing_keys.cache_clear()
+    jwt_module.verified_token_cache.clear()
+
+
+def test_rotation_keeps_tokens_signed_with_previous_kid(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "jwt_keys", "k1:" + "a" * 32 + ",k2:" + "b" * 32)
+    monkeypatch.setattr(settings, "jwt_active_kid", "k1")
+    _restart()
+    old_token = create_access_token(user_id=uuid4())
+    assert jwt.get_unverified_header(old_token)["kid"] == "k1"
+    decode_access_token(old_token)
+
+    monkeypatch.setattr(settings, "jwt_active_kid", "k2")
+    _restart()
+    new_token = create_access_token(user_id=uuid4())
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    decode_access_token(old_token)
+    decode_access_token(new_token)
+
+    monkeypatch.setattr(settings, "jwt_keys", "k2:" + "b" * 32)
+    _restart()
+    decode_access_token(new_token)
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_access_token(old_token)
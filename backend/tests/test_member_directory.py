@@ -0,0 +1,91 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.sync import get_sync_engine
+from app.main import create_app
+
+
+def test_members_are_keyset_paginated_and_filtered(bootstrap_tenant) -> None:
+    with TestClient(create_app()) as client:
+        suffix = uuid4().hex[:8]
+        data = bootstrap_tenant(client, "Directory", email=f"owner-{suffix}@example.com")
+        tenant_id, user_id = data["tenant"]["id"], data["user"]["id"]
+        headers = data["headers"]
+        roles = {r["name"]: r["id"] for r in client.get("/roles", headers=headers).json()}
+
+        # 12 "alice" members with the Member role and 8 "bob" admins, inserted
+        # directly (no bcrypt), all with the same created_at to exercise the
+        # id tie-breaker of the cursor.
+        emails = [f"alice-{suffix}-{i:02d}@example.com" for i in range(12)]
+        emails += [f"Bob_{suffix}-{i:02d}@example.com" for i in range(8)]
+        with get_sync_engine().begin() as conn:
+            conn.execute(
+                text("SELECT set_config('app.user_id', :user_id, true), set_config('app.tenant_id', :tenant_id, true);"),
+                {"user_id": user_id, "tenant_id": tenant_id},
+            )
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO memberships (tenant_id, user_id, role_id)
+                    SELECT :tenant_id, u.user_id,
+                           CASE WHEN lower(u.email) LIKE 'alice%' THEN CAST(:member AS uuid) ELSE CAST(:admin AS uuid) END
+                    FROM app_upsert_users(CAST(:emails AS citext[]), array_fill('x'::text, ARRAY[:n])) u;
+                    """
+                ),
+                {
+                    "tenant_id": tenant_id,
+                    "member": roles["Member"],
+                    "admin": roles["Admin"],
+                    "emails": emails,
+                    "n": len(emails),
+                },
+            )
+
+        seen: list[dict] = []
+        cursor = None
+        while True:
+            params = {"limit": 6, **({"cursor": cursor} if cursor else {})}
+            page = client.get("/members", headers=headers, params=params).json()
+            assert page["total_estimate"] >= len(page["items"])
+            seen.extend(page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == 21
+        assert len({m["id"] for m in seen}) == 21
+        keys = [(m["created_at"], m["id"]) for m in seen]
+        assert keys == sorted(keys, reverse=True)
+        assert {m["email"] for m in seen} == {*emails, f"owner-{suffix}@example.com"}
+
+        # A first page that is not full reports the exact total.
+        everyone = client.get("/members", headers=headers, params={"limit": 50}).json()
+        assert (len(everyone["items"]), everyone["next_cursor"], everyone["total_estimate"]) == (21, None, 21)
+
+        # Case-insensitive prefix; LIKE wildcards in the prefix are literals.
+        alices = client.get("/members", headers=headers, params={"email_prefix": f"ALICE-{suffix}", "limit": 5}).json()
+        assert len(alices["items"]) == 5 and alices["next_cursor"]
+        rest = client.get(
+            "/members",
+            headers=headers,
+            params={"email_prefix": f"alice-{suffix}", "limit": 50, "cursor": alices["next_cursor"]},
+        ).json()
+        assert {m["email"] for m in alices["items"] + rest["items"]} == set(emails[:12])
+        assert client.get("/members", headers=headers, params={"email_prefix": "alice_"}).json()["items"] == []
+        bobs = client.get("/members", headers=headers, params={"email_prefix": f"bob_{suffix}"}).json()
+        assert {m["email"] for m in bobs["items"]} == set(emails[12:])
+
+        admins = client.get("/members", headers=headers, params={"role_id": roles["Admin"]}).json()
+        assert {m["email"] for m in admins["items"]} == set(emails[12:])
+        assert admins["total_estimate"] == 8
+        filtered = client.get(
+            "/members", headers=headers, params={"role_id": roles["Admin"], "email_prefix": f"alice-{suffix}"}
+        ).json()
+        assert filtered == {"items": [], "next_cursor": None, "total_estimate": 0}
+
+        for garbage in ["garbage", "e30=", "W10="]:
+            for path in ["/members", "/audit"]:
+                bad = client.get(path, headers=headers, params={"cursor": garbage})
+                assert bad.status_code == 400, (path, garbage, bad.text)
+                assert bad.json()["error"]["code"] == "VALIDATION_ERROR"
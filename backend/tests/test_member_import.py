@@ -0,0 +1,166 @@
+import json
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.sync import get_sync_engine
+from app.main import create_app
+from app.settings import settings
+from app.worker import celery_app, drain_audit_outbox, import_members, reclaim_member_imports
+
+
+def test_import_upserts_members_in_batches(bootstrap_tenant, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(settings, "member_import_batch_size", 2)
+
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Import")["headers"]
+        roles = {r["name"]: r["id"] for r in client.get("/roles", headers=headers).json()}
+        suffix = uuid4().hex[:8]
+        existing = f"already-{suffix}@example.com"
+        resp = client.post(
+            "/members", headers=headers, json={"email": existing, "password": "passw0rd", "role_id": roles["Member"]}
+        )
+        assert resp.status_code == 201, resp.text
+
+        upload = "\n".join(
+            [
+                "email,password,role_id",
+                f"ann-{suffix}@example.com,s3cret-ann,{roles['Member']}",
+                f"bob-{suffix}@example.com,s3cret-bob,{roles['Admin']}",
+                f"{existing},other,{roles['Admin']}",
+                f"ANN-{suffix}@example.com,again,{roles['Member']}",
+                f"eve-{suffix}@example.com,s3cret-eve,{uuid4()}",
+            ]
+        )
+        resp = client.post(
+            "/members/import", headers={**headers, "Content-Type": "text/csv"}, params={"format": "csv"}, content=upload
+        )
+        assert resp.status_code == 202, resp.text
+        job = resp.json()
+        assert (job["status"], job["total"], job["processed"]) == ("queued", 5, 0)
+
+        status = client.get(f"/members/import/{job['id']}", headers=headers).json()
+        assert status["status"] == "succeeded", status
+        assert {k: status[k] for k in ("processed", "created", "existing", "failed")} == {
+            "processed": 5,
+            "created": 2,
+            "existing": 2,
+            "failed": 1,
+        }
+
+        rows = client.get(f"/members/import/{job['id']}/rows", headers=headers, params={"limit": 3}).json()
+        assert [(r["line"], r["status"]) for r in rows["items"]] == [(2, "created"), (3, "created"), (4, "existing")]
+        rest = client.get(
+            f"/members/import/{job['id']}/rows", headers=headers, params={"cursor": rows["next_cursor"]}
+        ).json()
+        assert [(r["line"], r["status"], r["error"]) for r in rest["items"]] == [
+            (5, "existing", None),
+            (6, "failed", "Unknown role"),
+        ]
+        assert rest["next_cursor"] is None
+
+        members = {m["email"]: m["role_name"] for m in client.get("/members", headers=headers).json()["items"]}
+        assert members[f"ann-{suffix}@example.com"] == "Member"
+        assert members[f"bob-{suffix}@example.com"] == "Admin"
+        assert members[existing] == "Member"
+        assert f"eve-{suffix}@example.com" not in members
+
+        # Imported passwords are usable; an existing user keeps theirs.
+        login = client.post("/auth/login", json={"email": f"bob-{suffix}@example.com", "password": "s3cret-bob"})
+        assert login.status_code == 200, login.text
+        assert client.post("/auth/login", json={"email": existing, "password": "other"}).status_code == 401
+
+        drain_audit_outbox()
+        entries = client.get("/audit", headers=headers, params={"entity_type": "member_import"}).json()["items"]
+        assert len(entries) == 1
+        assert entries[0]["action"] == "member.imported"
+        assert entries[0]["after"]["created"] == 2 and entries[0]["after"]["failed"] == 1
+
+
+def test_invalid_upload_is_rejected(bootstrap_tenant, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Import")["headers"]
+        role_id = client.get("/roles", headers=headers).json()[0]["id"]
+        upload = "\n".join(
+            [
+                json.dumps({"email": "ok@example.com", "password": "x", "role_id": role_id}),
+                json.dumps({"email": "not-an-email", "password": "x", "role_id": role_id}),
+            ]
+        )
+        resp = client.post("/members/import", headers=headers, content=upload)
+        assert resp.status_code == 400
+        assert resp.json()["error"]["code"] == "VALIDATION_ERROR"
+        assert resp.json()["error"]["message"].startswith("Line 2: email:")
+
+        missing = client.post("/members/import", headers=headers, params={"format": "csv"}, content="email,password\n")
+        assert missing.json()["error"]["message"] == "Missing CSV columns: role_id"
+
+        assert client.get(f"/members/import/{uuid4()}", headers=headers).status_code == 404
+        assert client.get(f"/members/import/{uuid4()}/rows", headers=headers).status_code == 404
+
+
+def test_lost_import_is_reclaimed(bootstrap_tenant, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    enqueued: list[tuple] = []
+    monkeypatch.setattr(import_members, "delay", lambda *args: enqueued.append(args))
+
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Import")["headers"]
+        role_id = client.get("/roles", headers=headers).json()[0]["id"]
+        email = f"late-{uuid4().hex[:8]}@example.com"
+        upload = json.dumps({"email": email, "password": "s3cret-late", "role_id": role_id})
+        job = client.post("/members/import", headers=headers, content=upload).json()
+        # Only ids go through the broker.
+        assert enqueued == [(job["id"], headers["X-Tenant-ID"], enqueued[0][2])]
+
+        # The task never ran; once stale, the reclaim runs the job again.
+        monkeypatch.undo()
+        monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+        monkeypatch.setattr(settings, "member_import_stale_seconds", 0)
+        assert reclaim_member_imports() >= 1
+        status = client.get(f"/members/import/{job['id']}", headers=headers).json()
+        assert (status["status"], status["created"]) == ("succeeded", 1)
+        assert client.post("/auth/login", json={"email": email, "password": "s3cret-late"}).status_code == 200
+        # A redelivered task finds nothing to do.
+        assert import_members(job["id"], headers["X-Tenant-ID"], enqueued[0][2]) == "skipped"
+
+
+def test_import_fails_for_lines_lost_with_the_pending_table(bootstrap_tenant, monkeypatch: pytest.MonkeyPatch) -> None:
+    enqueued: list[tuple] = []
+    monkeypatch.setattr(import_members, "delay", lambda *args: enqueued.append(args))
+
+    with get_sync_engine().connect() as conn:
+        # Plaintext passwords stay out of the WAL.
+        assert conn.execute(
+            text("SELECT relpersistence FROM pg_class WHERE oid = 'member_import_pending'::regclass;")
+        ).scalar() == "u"
+
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Import")["headers"]
+        role_id = client.get("/roles", headers=headers).json()[0]["id"]
+        upload = "\n".join(
+            json.dumps({"email": f"{name}-{uuid4().hex[:8]}@example.com", "password": "x", "role_id": role_id})
+            for name in ("kept", "lost")
+        )
+        job = client.post("/members/import", headers=headers, content=upload).json()
+        job_id, tenant_id, actor_user_id = enqueued[0]
+
+        # What a crash does to an unlogged table, for the second line only.
+        with get_sync_engine().begin() as conn:
+            conn.execute(
+                text("SELECT app_bind_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid));"),
+                {"user_id": actor_user_id, "tenant_id": tenant_id},
+            )
+            conn.execute(
+                text("DELETE FROM member_import_pending WHERE job_id = :job_id AND line = 2;"), {"job_id": job_id}
+            )
+
+        assert import_members(job_id, tenant_id, actor_user_id) == "failed"
+        status = client.get(f"/members/import/{job['id']}", headers=headers).json()
+        assert (status["processed"], status["created"]) == (1, 1)
+        assert status["error"] == "1 of 2 lines were lost in a database restart, import them again"
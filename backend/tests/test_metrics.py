@@ -0,0 +1,60 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.main import create_app
+
+
+def _samples(client: TestClient) -> dict[tuple[str, frozenset], float]:
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    return {
+        (sample.name, frozenset(sample.labels.items())): sample.value
+        for family in text_string_to_metric_families(resp.text)
+        for sample in family.samples
+    }
+
+
+def _value(samples: dict, name: str, **labels: str) -> float:
+    return samples.get((name, frozenset(labels.items())), 0.0)
+
+
+def _delta(before: dict, after: dict, name: str, **labels: str) -> float:
+    return _value(after, name, **labels) - _value(before, name, **labels)
+
+
+def test_metrics_count_requests_by_route_template() -> None:
+    client = TestClient(create_app())
+    before = _samples(client)
+    client.get("/health")
+    client.get("/health")
+    client.get(f"/no-such-page/{uuid4()}")
+    after = _samples(client)
+
+    route = {"method": "GET", "route": "/health"}
+    assert _delta(before, after, "http_requests_total", status="200", **route) == 2
+    assert _delta(before, after, "http_request_duration_seconds_count", **route) == 2
+    assert _delta(before, after, "http_response_size_bytes_sum", **route) > 0
+    # Unknown paths share one label value.
+    assert _value(after, "http_requests_total", method="GET", route="unmatched", status="404") >= 1
+    # The scrape itself is in progress.
+    assert _value(after, "http_requests_in_progress", method="GET") >= 1
+    assert ("celery_broker_up", frozenset()) in after
+
+
+def test_metrics_record_db_work_per_request(bootstrap_tenant) -> None:
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Metrics")["headers"]
+
+        before = _samples(client)
+        assert client.get("/roles", headers=headers).status_code == 200
+        after = _samples(client)
+
+        route = {"method": "GET", "route": "/roles"}
+        db_histograms = ("http_request_db_statements", "http_request_db_seconds", "http_request_db_connection_hold_seconds")
+        for name in db_histograms:
+            assert _delta(before, after, f"{name}_count", **route) == 1, name
+            assert _delta(before, after, f"{name}_sum", **route) > 0, name
+        assert _delta(before, after, "db_pool_wait_seconds_count") > 0
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from app.auth.password import PasswordHasher, PasswordHasherBusy
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_process_pool_hash_round_trip() -> None:
+    hasher = PasswordHasher(max_workers=1, max_pending=4)
+    try:
+        password_hash = await hasher.hash("passw0rd")
+        assert await hasher.verify("passw0rd", password_hash)
+        assert not await hasher.verify("wrong", password_hash)
+        assert hasher.pending == 0
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_saturated_queue_rejects_instead_of_waiting() -> None:
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    try:
+        first = asyncio.ensure_future(hasher.hash("one"))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash("two")
+        assert hasher.rejected == 1
+        await first
+    finally:
+        hasher.shutdown()
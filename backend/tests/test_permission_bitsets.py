@@ -0,0 +1,41 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth.cache import AuthContext
+from app.auth.deps import require_permission
+from app.auth.permissions import PermissionRegistry, permission_registry
+
+
+def _ctx(*codes: str) -> AuthContext:
+    return AuthContext(
+        user_id=uuid4(),
+        tenant_id=uuid4(),
+        is_active=True,
+        role_id=uuid4(),
+        permission_mask=permission_registry.mask(codes),
+    )
+
+
+def test_registry_positions_are_stable_and_append_only() -> None:
+    registry = PermissionRegistry()
+    registry.load(["roles:read", "audit:read"])
+    assert registry.bit("audit:read") == 1
+    assert registry.bit("roles:read") == 2
+    assert registry.bit("new:code") == 4
+    registry.load(["aaa:first", "audit:read"])
+    assert registry.bit("audit:read") == 1
+    assert registry.codes(registry.mask(["roles:read", "aaa:first"])) == ["aaa:first", "roles:read"]
+
+
+@pytest.mark.anyio
+async def test_multi_permission_dependency_requires_all_codes() -> None:
+    dep = require_permission("roles:read", "members:read")
+    ctx = _ctx("roles:read", "members:read", "audit:read")
+    assert await dep(ctx=ctx) == (ctx.tenant_id, ctx.user_id)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await dep(ctx=_ctx("roles:read"))
+    assert excinfo.value.status_code == 403
+    assert excinfo.value.detail["message"] == "Missing permission: members:read"
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from app.auth import permissions
+from app.auth.permissions import (
+    PermissionCatalog,
+    get_permission_catalog,
+    handle_permissions_change_notification,
+    set_permission_catalog,
+)
+from app.db.context import get_db_app_context
+from app.db.session import get_db_session
+from app.main import create_app
+
+
+def test_catalog_is_serialized_once_with_a_content_etag() -> None:
+    catalog = PermissionCatalog.build(3, [("audit:read", "Read audit log"), ("roles:read", None)])
+    assert json.loads(catalog.body) == [
+        {"code": "audit:read", "description": "Read audit log"},
+        {"code": "roles:read", "description": None},
+    ]
+    assert catalog.codes == ["audit:read", "roles:read"]
+    # Same content, same validator, whatever the version it was loaded at.
+    assert PermissionCatalog.build(9, catalog.rows).etag == catalog.etag
+    assert not catalog.etag.startswith("W/")
+
+
+def test_catalog_never_moves_backwards(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(permissions, "_catalog", None)
+    newer = PermissionCatalog.build(5, [("roles:read", None)])
+    set_permission_catalog(newer)
+    set_permission_catalog(PermissionCatalog.build(4, []))
+    assert get_permission_catalog() is newer
+
+
+def test_notifications_at_or_below_the_loaded_version_are_ignored(monkeypatch: pytest.MonkeyPatch) -> None:
+    scheduled: list[int | None] = []
+    monkeypatch.setattr(permissions, "_catalog", PermissionCatalog.build(5, []))
+    monkeypatch.setattr(permissions, "_schedule_reload", scheduled.append)
+
+    handle_permissions_change_notification("4")
+    handle_permissions_change_notification("5")
+    handle_permissions_change_notification("6")
+    handle_permissions_change_notification("garbage")
+    assert scheduled == [6, None]
+
+
+def test_permissions_endpoint_runs_no_sql_beyond_auth(bootstrap_tenant) -> None:
+    statements: list[int] = []
+
+    async def _counting_session(request: Request):
+        async for session in get_db_session(request):
+            yield session
+            statements.append(get_db_app_context(session).statements)
+
+    app = create_app()
+    with TestClient(app) as client:
+        data = bootstrap_tenant(client, "Catalog")
+        headers = {"Authorization": f"Bearer {data['token']}"}
+
+        app.dependency_overrides[get_db_session] = _counting_session
+        first = client.get("/permissions", headers=headers)
+        assert first.status_code == 200
+        assert first.content == get_permission_catalog().body
+        assert any(p["code"] == "roles:read" for p in first.json())
+        again = client.get("/permissions", headers={**headers, "If-None-Match": first.headers["ETag"]})
+        assert again.status_code == 304
+
+    assert statements == [1, 1]
@@ -5,8 +5,10 @@ from uuid import uuid4
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.db.sync import get_sync_engine
 from app.main import create_app
 
 
@@ -108,3 +110,79 @@ async def test_rls_prevents_cross_tenant_read_write_even_with_crafted_context()
                         )
     finally:
         await engine.dispose()
+
+
+def test_signed_context_cannot_be_forged_or_replayed() -> None:
+    _require_database_url()
+    suffix = uuid4().hex[:8]
+    with TestClient(create_app()) as client:
+        a = _bootstrap(
+            client,
+            tenant_name="Tenant A",
+            tenant_slug=f"signed-a-{suffix}",
+            email=f"signed-a-{suffix}@test",
+            password="passw0rd",
+        )
+        b = _bootstrap(
+            client,
+            tenant_name="Tenant B",
+            tenant_slug=f"signed-b-{suffix}",
+            email=f"signed-b-{suffix}@test",
+            password="passw0rd",
+        )
+    user_a, tenant_a, tenant_b = a["user"]["id"], a["tenant"]["id"], b["tenant"]["id"]
+    bind = text("SELECT app_bind_context(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid));")
+    visible = text(
+        """
+        SELECT app_context_verified(), (SELECT count(*) FROM roles WHERE tenant_id = :tenant_id)
+        """
+    )
+    engine = get_sync_engine()
+
+    with engine.begin() as conn:
+        assert conn.execute(bind, {"user_id": user_a, "tenant_id": tenant_a}).scalar_one() is True
+        verified, roles = conn.execute(visible, {"tenant_id": tenant_a}).one()
+        assert verified and roles > 0
+        signature = conn.execute(text("SELECT current_setting('app.context_signature');")).scalar_one()
+        assert signature
+
+        # The signature covers the tenant: switching it by hand is not trusted.
+        conn.execute(text("SELECT set_config('app.tenant_id', :tenant_id, true);"), {"tenant_id": tenant_b})
+        assert conn.execute(visible, {"tenant_id": tenant_b}).one() == (False, 0)
+
+    # ... nor does it outlive its transaction.
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                SELECT set_config('app.user_id', :user_id, true), set_config('app.tenant_id', :tenant_id, true),
+                       set_config('app.context_signature', :signature, true);
+                """
+            ),
+            {"user_id": user_a, "tenant_id": tenant_b, "signature": signature},
+        )
+        assert conn.execute(visible, {"tenant_id": tenant_b}).one() == (False, 0)
+
+    # Binding a tenant the user is not a member of signs nothing.
+    with engine.begin() as conn:
+        assert conn.execute(bind, {"user_id": user_a, "tenant_id": tenant_b}).scalar_one() is False
+        assert conn.execute(visible, {"tenant_id": tenant_b}).one() == (False, 0)
+        with pytest.raises(DBAPIError):
+            with conn.begin_nested():
+                conn.execute(
+                    text(
+                        """
+                        INSERT INTO roles (tenant_id, name, is_system)
+                        VALUES (:tenant_id, 'intruder', false);
+                        """
+                    ),
+                    {"tenant_id": tenant_b},
+                )
+
+    # The signing function itself is not available to the app role.
+    with engine.begin() as conn:
+        with pytest.raises(DBAPIError):
+            conn.execute(
+                text("SELECT app_context_signature(CAST(:user_id AS uuid), CAST(:tenant_id AS uuid));"),
+                {"user_id": user_a, "tenant_id": tenant_b},
+            )
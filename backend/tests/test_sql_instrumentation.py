@@ -0,0 +1,69 @@
+import logging
+
+import pytest
+from fastapi import APIRouter, Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.instrumentation import RequestDbStats, statement_shape
+from app.db.session import DbSessionRoute, get_db_session
+from app.main import create_app
+from app.settings import settings
+
+
+def test_statement_shape_ignores_literals_and_layout() -> None:
+    shape = statement_shape("SELECT * FROM t\n  WHERE id = 42 AND name = 'it''s'")
+    assert shape == "SELECT * FROM t WHERE id = ? AND name = ?"
+    assert statement_shape("SELECT $1, 1.5") == statement_shape("SELECT $2,  7")
+    assert statement_shape("SELECT uuid4 FROM t2") == "SELECT uuid4 FROM t2"
+
+    stats = RequestDbStats()
+    for i in range(3):
+        stats.record(f"SELECT name FROM roles WHERE id = {i}", 0.001 * i)
+    stats.record("SELECT 'other'", 0.0)
+    assert (stats.statements, stats.slowest_statement) == (4, "SELECT name FROM roles WHERE id = ?")
+    assert stats.repeated(3) == [("SELECT name FROM roles WHERE id = ?", 3)]
+    assert stats.repeated(4) == []
+
+
+def test_requests_report_their_statements(
+    bootstrap_tenant, max_statements, caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    with TestClient(create_app()) as client:
+        headers = bootstrap_tenant(client, "Instrumented")["headers"]
+
+        # Auth + tenant version + the roles query.
+        with max_statements("GET /roles", 3):
+            resp = client.get("/roles", headers=headers)
+        assert resp.status_code == 200
+        assert resp.headers["Server-Timing"].startswith("db;dur=")
+        assert 'desc="3 statements"' in resp.headers["Server-Timing"]
+
+        with pytest.raises(AssertionError, match="GET /roles ran"):
+            with max_statements("GET /roles", 1):
+                client.get("/roles", headers=headers)
+        with pytest.raises(AssertionError, match="no GET /members request"):
+            with max_statements("GET /members", 10):
+                client.get("/roles", headers=headers)
+
+        monkeypatch.setattr(settings, "db_request_statement_budget", 2)
+        with caplog.at_level(logging.WARNING, logger="app.db.instrumentation"):
+            client.get("/roles", headers=headers)
+        assert "GET /roles ran 3 statements" in caplog.text
+
+
+def test_repeated_statement_shapes_are_reported(database_url, caplog: pytest.LogCaptureFixture) -> None:
+    router = APIRouter(route_class=DbSessionRoute)
+
+    @router.get("/_test/n-plus-one")
+    async def n_plus_one(session: AsyncSession = Depends(get_db_session)) -> dict:
+        for i in range(settings.db_repeated_statement_threshold):
+            await session.execute(text(f"SELECT {i} AS n;"))
+        return {}
+
+    app = create_app()
+    app.include_router(router)
+    with TestClient(app) as client, caplog.at_level(logging.WARNING, logger="app.db.instrumentation"):
+        assert client.get("/_test/n-plus-one").status_code == 200
+    assert f"repeated: {settings.db_repeated_statement_threshold}x SELECT ? AS n;" in caplog.text
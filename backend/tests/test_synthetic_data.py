@@ -0,0 +1,96 @@
+import random
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cli import main
+from app.main import create_app
+from app.settings import settings
+from app.synthetic import ACTIONS, _audit_batch, plan_tenants
+from app.worker import drain_audit_outbox
+
+
+def test_plan_is_deterministic_and_skewed() -> None:
+    plan = plan_tenants(4, 400, 10_000, seed=7)
+    assert plan == plan_tenants(4, 400, 10_000, seed=7)
+    assert [t.members for t in plan] != [t.members for t in plan_tenants(4, 400, 10_000, seed=8)]
+
+    assert sum(t.audit_entries for t in plan) == 10_000
+    assert len({email for t in plan for email in t.members}) == 400
+    # Zipf: the first tenant is the largest and the busiest.
+    assert len(plan[0].members) > len(plan[-1].members) and plan[0].audit_entries > plan[-1].audit_entries
+    assert all(t.members[0] == f"owner@{t.slug}.example.com" and t.roles[0] == 0 for t in plan)
+    # Later tenants share a few members of earlier ones.
+    assert set(plan[1].members) & set(plan[0].members)
+
+    until = datetime(2026, 10, 1, tzinfo=UTC).date()
+    batch = _audit_batch(random.Random("7:0:0"), plan[0], 1000, until, 30)
+    assert batch == _audit_batch(random.Random("7:0:0"), plan[0], 1000, until, 30)
+    rows = [line.split("\t") for line in batch.splitlines()]
+    assert len(rows) == 1000
+    first_day = datetime(2026, 9, 1, tzinfo=UTC).timestamp()
+    assert all(first_day <= float(at) < first_day + 30 * 86400 for *_, at in rows)
+    # Actors are owners, admins and team leads.
+    assert {plan[0].roles[int(actor)] for actor, *_ in rows} <= {0, 1, 5}
+
+    with pytest.raises(ValueError):
+        plan_tenants(3, 2, 0, seed=1)
+
+
+def _owner_headers(client: TestClient, email: str) -> dict[str, str]:
+    resp = client.post("/auth/login", json={"email": email, "password": "passw0rd"})
+    assert resp.status_code == 200, resp.text
+    return {"Authorization": f"Bearer {resp.json()['token']}", "X-Tenant-ID": resp.json()["tenants"][0]["id"]}
+
+
+def _audit_window(until) -> dict[str, str]:
+    return {"since": (until - timedelta(days=20)).isoformat(), "until": until.isoformat()}
+
+
+def test_generated_tenants_are_usable_through_the_api(database_url) -> None:
+    seed = uuid4().int % 10**9
+    until = datetime.now(UTC).date()
+    args = ["generate-synthetic-data", "--seed", str(seed), "--days", "20", "--until", until.isoformat(), "--jobs", "2"]
+    assert main([*args, "--tenants", "2", "--users", "30", "--audit-entries", "600"]) == 0
+    # Same slugs again.
+    assert main([*args, "--tenants", "1", "--users", "1", "--audit-entries", "0"]) == 1
+    plan = plan_tenants(2, 30, 600, seed)
+
+    with TestClient(create_app()) as client:
+        headers = _owner_headers(client, plan[0].members[0])
+
+        members = client.get("/members", headers=headers, params={"limit": 200}).json()
+        assert sorted(m["email"] for m in members["items"]) == sorted(plan[0].members)
+        roles = {r["name"] for r in client.get("/roles", headers=headers).json()}
+        assert roles == {"Owner", "Admin", "Member", "Support", "Auditor", "Team lead"}
+
+        stats = client.get("/audit/stats", headers=headers, params=_audit_window(until)).json()
+        assert stats["total"] == plan[0].audit_entries
+        assert {a["value"] for a in stats["actions"]} <= {action for action, _ in ACTIONS}
+        entries = client.get("/audit", headers=headers).json()
+        assert entries["items"] and all(e["actor_email"] for e in entries["items"])
+
+
+def test_bulk_load_rebuilds_the_search_index_and_rollups(database_url) -> None:
+    if not settings.database_owner_url:
+        pytest.skip("DATABASE_OWNER_URL not set")
+    seed = uuid4().int % 10**9
+    until = datetime.now(UTC).date()
+    args = ["--seed", str(seed), "--days", "20", "--until", until.isoformat(), "--bulk"]
+    assert main(["generate-synthetic-data", *args, "--tenants", "2", "--users", "20", "--audit-entries", "400"]) == 0
+    plan = plan_tenants(2, 20, 400, seed)
+
+    with TestClient(create_app()) as client:
+        headers = _owner_headers(client, plan[0].members[0])
+        stats = client.get("/audit/stats", headers=headers, params=_audit_window(until)).json()
+        assert stats["total"] == plan[0].audit_entries
+        entries = client.get("/audit", headers=headers, params={"q": plan[0].slug}).json()
+        assert entries["items"] and all(e["actor_email"] for e in entries["items"])
+
+        # The triggers are back: an API write shows up in the rollup right away.
+        assert client.post("/roles", headers=headers, json={"name": "Bulk"}).status_code == 201
+        drain_audit_outbox()
+        window = {**_audit_window(until), "until": (until + timedelta(days=1)).isoformat()}
+        assert client.get("/audit/stats", headers=headers, params=window).json()["total"] == plan[0].audit_entries + 1
@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useState } from "react";
 import { Button } from "../components/ui/Button";
 import { apiFetch } from "../lib/api";
 import { useAuth } from "../lib/auth";
@@ -13,13 +13,17 @@ type MemberRow = {
   created_at: string;
 };
 
+type MembersResp = { items: MemberRow[]; next_cursor: string | null; total_estimate: number };
+
 export function MembersPage() {
   const auth = useAuth();
   const [members, setMembers] = useState<MemberRow[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [totalEstimate, setTotalEstimate] = useState(0);
   const [roles, setRoles] = useState<Role[]>([]);
   const [q, setQ] = useState("");
-  const [page, setPage] = useState(1);
-  const pageSize = 25;
+  const [roleFilter, setRoleFilter] = useState("");
+  const limit = 50;
 
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
@@ -31,16 +35,27 @@ export function MembersPage() {
   const [createError, setCreateError] = useState<string | null>(null);
   const [isCreating, setIsCreating] = useState(false);
 
+  const buildQuery = (cursor?: string | null) => {
+    const params = new URLSearchParams();
+    if (q.trim()) params.set("email_prefix", q.trim());
+    if (roleFilter) params.set("role_id", roleFilter);
+    params.set("limit", String(limit));
+    if (cursor) params.set("cursor", cursor);
+    return `?${params.toString()}`;
+  };
+
   const refresh = async () => {
     if (!auth.token || !auth.tenantId) return;
     setError(null);
     setIsLoading(true);
     try {
-      const [memberRows, roleRows] = await Promise.all([
-        apiFetch<MemberRow[]>("/members", { token: auth.token, tenantId: auth.tenantId }),
+      const [resp, roleRows] = await Promise.all([
+        apiFetch<MembersResp>(`/members${buildQuery(null)}`, { token: auth.token, tenantId: auth.tenantId }),
         apiFetch<Role[]>("/roles", { token: auth.token, tenantId: auth.tenantId }),
       ]);
-      setMembers(memberRows);
+      setMembers(resp.items);
+      setNextCursor(resp.next_cursor);
+      setTotalEstimate(resp.total_estimate);
       setRoles(roleRows);
       if (!createRoleId && roleRows.length > 0) setCreateRoleId(roleRows[0].id);
     } catch (e: unknown) {
@@ -50,26 +65,28 @@ export function MembersPage() {
     }
   };
 
-  useEffect(() => {
-    refresh();
-    // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [auth.token, auth.tenantId]);
-
-  const filtered = useMemo(() => {
-    const query = q.trim().toLowerCase();
-    if (!query) return members;
-    return members.filter((m) => m.email.toLowerCase().includes(query));
-  }, [members, q]);
-
-  const totalPages = Math.max(1, Math.ceil(filtered.length / pageSize));
-  const paged = useMemo(() => {
-    const start = (page - 1) * pageSize;
-    return filtered.slice(start, start + pageSize);
-  }, [filtered, page]);
+  const loadMore = async () => {
+    if (!auth.token || !auth.tenantId || !nextCursor) return;
+    setError(null);
+    try {
+      const resp = await apiFetch<MembersResp>(`/members${buildQuery(nextCursor)}`, {
+        token: auth.token,
+        tenantId: auth.tenantId,
+      });
+      setMembers((prev) => prev.concat(resp.items));
+      setNextCursor(resp.next_cursor);
+      setTotalEstimate(resp.total_estimate);
+    } catch (e: unknown) {
+      setError(e instanceof Error ? e.message : "Failed to load more");
+    }
+  };
 
+  // Filtering is server-side; wait for typing to pause before asking.
   useEffect(() => {
-    setPage(1);
-  }, [q]);
+    const timer = setTimeout(refresh, 250);
+    return () => clearTimeout(timer);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [auth.token, auth.tenantId, q, roleFilter]);
 
   return (
     <div className="space-y-6">
@@ -84,13 +101,27 @@ export function MembersPage() {
       </div>
 
       <div className="rounded-lg border bg-white p-4 space-y-3">
-        <div className="flex items-center justify-between gap-3">
-          <input
-            className="w-full max-w-md rounded-md border px-3 py-2 text-sm"
-            placeholder="Search by email..."
-            value={q}
-            onChange={(e) => setQ(e.target.value)}
-          />
+        <div className="flex flex-col md:flex-row md:items-center md:justify-between gap-3">
+          <div className="flex flex-col md:flex-row md:items-center gap-2 w-full">
+            <input
+              className="w-full md:max-w-md rounded-md border px-3 py-2 text-sm"
+              placeholder="Email starts with..."
+              value={q}
+              onChange={(e) => setQ(e.target.value)}
+            />
+            <select
+              className="w-full md:max-w-xs rounded-md border px-3 py-2 text-sm"
+              value={roleFilter}
+              onChange={(e) => setRoleFilter(e.target.value)}
+            >
+              <option value="">All roles</option>
+              {roles.map((r) => (
+                <option key={r.id} value={r.id}>
+                  {r.name}
+                </option>
+              ))}
+            </select>
+          </div>
           <Button type="button" onClick={refresh} disabled={isLoading}>
             Refresh
           </Button>
@@ -98,11 +129,11 @@ export function MembersPage() {
 
         {isLoading ? <div className="text-sm text-slate-600 py-6">Loading…</div> : null}
         {error ? <div className="text-sm text-red-700 py-2">{error}</div> : null}
-        {!isLoading && !error && filtered.length === 0 ? (
+        {!isLoading && !error && members.length === 0 ? (
           <div className="text-sm text-slate-600 py-6">No members found.</div>
         ) : null}
 
-        {!isLoading && !error && filtered.length > 0 ? (
+        {!isLoading && !error && members.length > 0 ? (
           <div className="space-y-3">
             <div className="overflow-x-auto">
               <table className="w-full text-sm">
@@ -114,7 +145,7 @@ export function MembersPage() {
                   </tr>
                 </thead>
                 <tbody className="divide-y">
-                  {paged.map((m) => (
+                  {members.map((m) => (
                     <tr key={m.id}>
                       <td className="py-2 pr-4 font-medium">{m.email}</td>
                       <td className="py-2 pr-4">{m.role_name}</td>
@@ -127,20 +158,11 @@ export function MembersPage() {
 
             <div className="flex items-center justify-between gap-3">
               <div className="text-xs text-slate-600">
-                Page {page} of {totalPages} · {filtered.length} total
-              </div>
-              <div className="flex items-center gap-2">
-                <Button type="button" disabled={page <= 1} onClick={() => setPage((p) => Math.max(1, p - 1))}>
-                  Prev
-                </Button>
-                <Button
-                  type="button"
-                  disabled={page >= totalPages}
-                  onClick={() => setPage((p) => Math.min(totalPages, p + 1))}
-                >
-                  Next
-                </Button>
+                {members.length} loaded · {nextCursor ? `about ${totalEstimate}` : members.length} total
               </div>
+              <Button type="button" onClick={loadMore} disabled={!nextCursor}>
+                {nextCursor ? "Load more" : "End"}
+              </Button>
             </div>
           </div>
         ) : null}